@@ -1,8 +1,25 @@
+from .aggregates import LogHistogram, MetricAggregate
+from .calibration import OverheadCalibration, calibrate_overhead
+from .composite_profiler import (CompositeProfiler, MetricProvider, TimeProvider, MemoryProvider, DiskProvider,
+                                 NetworkProvider)
+from .context import ContextExecutor
 from .cpu_profiler import CPUProfiler
 from .disk_profiler import DiskProfiler
+from .event_loop_profiler import EventLoopProfiler
+from .exporters import export_folded, export_speedscope
+from .file_io_profiler import FileIOProfiler
 from .function_profiler import FunctionProfiler
 from .memory_profiler import MemoryProfiler
 from .network_profiler import NetworkProfiler
+from .retention import RetentionPolicy, RingBufferRetention, ReservoirRetention, TimeWindowRetention
+from .sampler import MetricsSampler
+from .sampling_profiler import SamplingProfiler
+from .stats_store import StatsStore, ColumnarStatsStore, ListStatsStore
 from .visualizer import plot_profiling_stats
 
-__all__ = ['CPUProfiler', 'DiskProfiler', 'FunctionProfiler', 'MemoryProfiler', 'NetworkProfiler', 'plot_profiling_stats']
\ No newline at end of file
+__all__ = ['CPUProfiler', 'CompositeProfiler', 'DiskProfiler', 'EventLoopProfiler', 'FileIOProfiler', 'FunctionProfiler', 'MemoryProfiler',
+           'NetworkProfiler', 'SamplingProfiler', 'MetricProvider', 'TimeProvider', 'MemoryProvider', 'DiskProvider',
+           'NetworkProvider', 'ContextExecutor', 'StatsStore', 'ColumnarStatsStore', 'ListStatsStore', 'RetentionPolicy',
+           'RingBufferRetention', 'ReservoirRetention', 'TimeWindowRetention', 'LogHistogram', 'MetricAggregate',
+           'MetricsSampler', 'OverheadCalibration', 'calibrate_overhead', 'export_folded', 'export_speedscope',
+           'plot_profiling_stats']
@@ -0,0 +1,369 @@
+import sys
+import math
+import operator
+import itertools
+from array import array
+from collections import Counter
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+
+class LogHistogram:
+    """Sparse, mergeable log-linear histogram (HDR-style).
+
+    Every power of two is split into `sub_buckets` linear buckets, so a recorded value is
+    reproduced with a relative error of at most 1 / sub_buckets regardless of its magnitude.
+    Only buckets that were hit are stored, and percentile queries walk the buckets rather
+    than the recorded values. Infinite values are counted below or above every bucket; NaN is
+    not recorded.
+    """
+
+    def __init__(self, sub_buckets: int = 64):
+        if sub_buckets <= 0:
+            raise ValueError(f"sub_buckets must be positive, got {sub_buckets}")
+        self.sub_buckets = sub_buckets
+        self.count = 0
+        self.zero_count = 0
+        self.inf_count = 0
+        self.neg_inf_count = 0
+        self._positive: Dict[int, int] = {}
+        self._negative: Dict[int, int] = {}
+        # Bits of a float's representation below its bucket, for power-of-two resolutions
+        self._shift = 52 - sub_buckets.bit_length() + 1 if sub_buckets & (sub_buckets - 1) == 0 and sub_buckets <= 2 ** 52 else None
+
+    def _bucket_value(self, bucket: int) -> float:
+        """Midpoint of a bucket."""
+        exponent, sub_bucket = divmod(bucket, self.sub_buckets)
+        return math.ldexp(0.5 + (sub_bucket + 0.5) / (2 * self.sub_buckets), exponent)
+
+    def _bucket(self, magnitude: float) -> int:
+        """Bucket of a finite, positive magnitude."""
+        mantissa, exponent = math.frexp(magnitude)
+        return exponent * self.sub_buckets + int((mantissa - 0.5) * 2 * self.sub_buckets)
+
+    def _buckets(self, magnitudes: List[float]) -> List[int]:
+        """
+        Buckets of finite, positive magnitudes.
+
+        With a power-of-two resolution, the bucket of a normal float is its exponent followed by
+        the leading bits of its mantissa, so whole batches are bucketed by shifting the IEEE 754
+        representation instead of calling frexp per value.
+        """
+        if self._shift is not None and min(magnitudes) >= sys.float_info.min:
+            try:
+                bits = array('q', array('d', magnitudes).tobytes())
+            except OverflowError:
+                pass
+            else:
+                shift, offset = self._shift, 1022 * self.sub_buckets
+                return [(value >> shift) - offset for value in bits]
+        return list(map(self._bucket, magnitudes))
+
+    def record(self, value: float, count: float = 1) -> None:
+        """Add `count` occurrences of `value` (fractional counts are allowed for weighted samples)."""
+        if value != value:
+            return
+        self.count += count
+        if value > 0:
+            if value == math.inf:
+                self.inf_count += count
+                return
+            bucket = self._bucket(value)
+            self._positive[bucket] = self._positive.get(bucket, 0) + count
+        elif value < 0:
+            if value == -math.inf:
+                self.neg_inf_count += count
+                return
+            bucket = self._bucket(-value)
+            self._negative[bucket] = self._negative.get(bucket, 0) + count
+        else:
+            self.zero_count += count
+
+    def record_many(self, values: Sequence[float], counts: Optional[Sequence[float]] = None) -> None:
+        """
+        Add a batch of values.
+
+        Args:
+            values: The values to add.
+            counts: Occurrences of each value (default: 1 each).
+        """
+        if counts is None:
+            self._record_magnitudes([value for value in values if value > 0], None, 1)
+            self._record_magnitudes([-value for value in values if value < 0], None, -1)
+            zeros = values.count(0)
+        else:
+            for sign in (1, -1):
+                pairs = [(value * sign, count) for value, count in zip(values, counts) if value * sign > 0]
+                if pairs:
+                    magnitudes, weights = zip(*pairs)
+                    self._record_magnitudes(list(magnitudes), list(weights), sign)
+            zeros = sum(count for value, count in zip(values, counts) if value == 0)
+        self.zero_count += zeros
+        self.count += zeros
+
+    def _record_magnitudes(self, magnitudes: List[float], counts: Optional[List[float]], sign: int) -> None:
+        """Add positive magnitudes of values with the given sign (counts: None for 1 each)."""
+        if math.inf in magnitudes:
+            finite = [magnitude != math.inf for magnitude in magnitudes]
+            infinite = finite.count(False) if counts is None else sum(itertools.compress(counts, map(operator.not_, finite)))
+            if sign > 0:
+                self.inf_count += infinite
+            else:
+                self.neg_inf_count += infinite
+            self.count += infinite
+            magnitudes = list(itertools.compress(magnitudes, finite))
+            if counts is not None:
+                counts = list(itertools.compress(counts, finite))
+        if not magnitudes:
+            return
+        buckets = self._positive if sign > 0 else self._negative
+        if counts is None:
+            bucket_counts = Counter(self._buckets(magnitudes)).items()
+            self.count += len(magnitudes)
+        else:
+            bucket_counts = zip(self._buckets(magnitudes), counts)
+            self.count += sum(counts)
+        for bucket, count in bucket_counts:
+            buckets[bucket] = buckets.get(bucket, 0) + count
+
+    def merge(self, other: 'LogHistogram') -> None:
+        """Add all counts of another histogram with the same resolution into this one."""
+        if other.sub_buckets != self.sub_buckets:
+            raise ValueError(
+                f"Cannot merge histograms with different resolutions ({self.sub_buckets} vs {other.sub_buckets})"
+            )
+        self.count += other.count
+        self.zero_count += other.zero_count
+        self.inf_count += other.inf_count
+        self.neg_inf_count += other.neg_inf_count
+        for bucket, count in other._positive.items():
+            self._positive[bucket] = self._positive.get(bucket, 0) + count
+        for bucket, count in other._negative.items():
+            self._negative[bucket] = self._negative.get(bucket, 0) + count
+
+    def _ordered_buckets(self) -> Iterable:
+        """Yield (representative value, count) pairs in ascending value order."""
+        if self.neg_inf_count:
+            yield -math.inf, self.neg_inf_count
+        for bucket in sorted(self._negative, reverse=True):
+            yield -self._bucket_value(bucket), self._negative[bucket]
+        if self.zero_count:
+            yield 0.0, self.zero_count
+        for bucket in sorted(self._positive):
+            yield self._bucket_value(bucket), self._positive[bucket]
+        if self.inf_count:
+            yield math.inf, self.inf_count
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Return the approximate q-th percentile (0-100), or None if the histogram is empty."""
+        if not 0 <= q <= 100:
+            raise ValueError(f"Percentile must be between 0 and 100, got {q}")
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(q / 100 * self.count))
+        seen = 0
+        value = None
+        for value, count in self._ordered_buckets():
+            seen += count
+            if seen >= rank:
+                return value
+        return value
+
+
+class MetricAggregate:
+    """Online count/sum/min/max/mean/variance (Welford) plus a LogHistogram for one metric.
+
+    Values may carry a frequency weight (e.g. 1 / sample rate), in which case count, sum, mean,
+    variance and percentiles are estimates for the full, unsampled population.
+
+    Args:
+        sub_buckets: Resolution of the histogram (see LogHistogram).
+        histogram: If False, no histogram is kept and `percentile` returns None.
+    """
+
+    __slots__ = ('count', 'total', 'min', 'max', 'mean', '_m2', 'histogram')
+
+    def __init__(self, sub_buckets: int = 64, histogram: bool = True):
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.histogram = LogHistogram(sub_buckets) if histogram else None
+
+    def add(self, value: float, weight: float = 1) -> None:
+        self.count += weight
+        self.total += value * weight
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        delta = value - self.mean
+        self.mean += delta * weight / self.count
+        self._m2 += weight * delta * (value - self.mean)
+        if self.histogram is not None:
+            self.histogram.record(value, weight)
+
+    def add_many(self, values: Sequence[float], weights: Optional[Sequence[float]] = None) -> None:
+        """
+        Fold a batch of values in at once: the batch's own moments are computed in bulk and then
+        combined like `merge` does.
+
+        Args:
+            values: The values to add.
+            weights: Frequency weight of each value (default: 1 each).
+        """
+        if not values:
+            return
+        if weights is None:
+            count = len(values)
+            total = sum(values)
+            mean = total / count
+            deviations = [value - mean for value in values]
+            m2 = sum(map(operator.mul, deviations, deviations))
+        else:
+            count = sum(weights)
+            total = sum(map(operator.mul, values, weights))
+            mean = total / count
+            m2 = sum([weight * (value - mean) * (value - mean) for value, weight in zip(values, weights)])
+        self._combine(count, total, mean, m2, min(values), max(values))
+        if self.histogram is not None:
+            self.histogram.record_many(values, weights)
+
+    def _combine(self, count: float, total: float, mean: float, m2: float, low: float, high: float) -> None:
+        """Combine with the moments of another set of values (Chan et al. parallel variance)."""
+        combined = self.count + count
+        delta = mean - self.mean
+        self._m2 += m2 + delta * delta * self.count * count / combined
+        self.mean += delta * count / combined
+        self.count = combined
+        self.total += total
+        self.min = min(self.min, low)
+        self.max = max(self.max, high)
+
+    def merge(self, other: 'MetricAggregate') -> None:
+        """Combine with another aggregate (Chan et al. parallel variance)."""
+        if not other.count:
+            return
+        self._combine(other.count, other.total, other.mean, other._m2, other.min, other.max)
+        if self.histogram is not None:
+            if other.histogram is None:
+                raise ValueError("Cannot merge an aggregate without a histogram into one with a histogram")
+            self.histogram.merge(other.histogram)
+
+    @property
+    def variance(self) -> float:
+        """Sample variance (0.0 for fewer than two values)."""
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Approximate q-th percentile (0-100), clamped to the exact observed min/max; None without a histogram."""
+        if self.histogram is None:
+            return None
+        value = self.histogram.percentile(q)
+        if value is None:
+            return None
+        return min(max(value, self.min), self.max)
+
+    def to_dict(self, percentiles: Iterable[float] = (50, 90, 99)) -> Dict[str, float]:
+        result = {
+            'count': self.count,
+            'sum': self.total,
+            'min': self.min,
+            'max': self.max,
+            'mean': self.mean,
+            'variance': self.variance,
+            'stddev': math.sqrt(self.variance),
+        }
+        for q in percentiles:
+            result[f"p{q:g}"] = self.percentile(q)
+        return result
+
+
+def _is_numeric(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+# Exact types accepted without the isinstance checks of _is_numeric
+_NUMERIC_TYPES = frozenset((int, float))
+
+
+class LabelAggregate:
+    """Event count and per-metric MetricAggregates (with or without histograms) for one label."""
+
+    __slots__ = ('count', 'metrics', 'sub_buckets', 'histograms')
+
+    def __init__(self, sub_buckets: int = 64, histograms: bool = True):
+        self.count = 0
+        self.metrics: Dict[str, MetricAggregate] = {}
+        self.sub_buckets = sub_buckets
+        self.histograms = histograms
+
+    def add(self, metrics: Dict[str, Any], exclude: FrozenSet[str] = frozenset(), weight: float = 1) -> None:
+        """
+        Fold one event into the aggregate; non-numeric metrics and keys in `exclude` are ignored.
+
+        Args:
+            metrics: The event's metrics.
+            exclude: Metric keys that are not aggregated.
+            weight: Number of events this one stands for (1 / sample rate for sampled calls).
+        """
+        self.count += weight
+        aggregates = self.metrics
+        for key, value in metrics.items():
+            if key in exclude or (type(value) not in _NUMERIC_TYPES and not _is_numeric(value)):
+                continue
+            aggregate = aggregates.get(key)
+            if aggregate is None:
+                aggregate = aggregates[key] = MetricAggregate(self.sub_buckets, self.histograms)
+            aggregate.add(value, weight)
+
+    def add_many(self, events: Sequence[Tuple[Dict[str, Any], float]], exclude: FrozenSet[str] = frozenset()) -> None:
+        """
+        Fold a batch of events into the aggregate, one metric column at a time (see `add`).
+
+        Args:
+            events: (metrics, weight) pairs.
+            exclude: Metric keys that are not aggregated.
+        """
+        if not events:
+            return
+        all_metrics = [metrics for metrics, _ in events]
+        event_weights = [weight for _, weight in events]
+        self.count += sum(event_weights)
+        unweighted = event_weights.count(1) == len(event_weights)
+        # Gather each metric's column in bulk
+        first = all_metrics[0]
+        columns = None
+        if all(map(len(first).__eq__, map(len, all_metrics))):
+            # Events of the same size that all have the first event's keys report exactly its metrics
+            try:
+                columns = [(key, list(map(operator.itemgetter(key), all_metrics))) for key in first if key not in exclude]
+            except KeyError:
+                pass
+        if columns is None:
+            # Events without a metric contribute None to its column, which is dropped below
+            columns = [
+                (key, [metrics.get(key) for metrics in all_metrics])
+                for key in dict.fromkeys(itertools.chain.from_iterable(all_metrics)) if key not in exclude
+            ]
+        aggregates = self.metrics
+        for key, values in columns:
+            weights = event_weights
+            if not _NUMERIC_TYPES.issuperset(map(type, values)):
+                numeric = list(map(_is_numeric, values))
+                values = list(itertools.compress(values, numeric))
+                weights = list(itertools.compress(weights, numeric))
+                if not values:
+                    continue
+            aggregate = aggregates.get(key)
+            if aggregate is None:
+                aggregate = aggregates[key] = MetricAggregate(self.sub_buckets, self.histograms)
+            aggregate.add_many(values, None if unweighted else weights)
+
+    def merge(self, other: 'LabelAggregate') -> None:
+        self.count += other.count
+        for key, aggregate in other.metrics.items():
+            if key not in self.metrics:
+                self.metrics[key] = MetricAggregate(self.sub_buckets, self.histograms)
+            self.metrics[key].merge(aggregate)
@@ -1,25 +1,201 @@
+import sys
+import copy
+import time
+import random
+import inspect
 import logging
+import itertools
+import weakref
 import threading
+from collections import deque
 from abc import ABC, abstractmethod
-from typing import Optional, Callable, Dict, List, Any
+from types import CodeType, CoroutineType
+from contextvars import ContextVar
+from typing import Optional, Callable, ContextManager, Deque, Dict, FrozenSet, Iterable, Iterator, List, Tuple, Any
 from functools import wraps
 from .logger_adapter import LoggerAdapter
+from .stats_store import StatsStore, ColumnarStatsStore
+from .retention import RetentionPolicy
+from .aggregates import LabelAggregate
+from .context import current_span
 
 # Thread-local storage for thread-safe profiling
 _thread_local = threading.local()
 
+# Metric added to events of sampled calls: the number of calls each recorded event stands for
+SAMPLE_WEIGHT_METRIC = 'sample_weight'
+
+# Metrics added to events recorded inside a logical span (see smartprofiler.context)
+CONTEXT_METRICS = ('trace_id', 'context_span_id')
+
+# Weights of the sampled profile_function calls running in this thread or task, by (profiler id, label)
+_sample_weights: ContextVar[Dict[Tuple[int, str], float]] = ContextVar('smartprofiler_sample_weights', default={})
+
+# Metrics added to events of profiled coroutines, async generators and generators
+TASK_METRICS = ('task_wall_time', 'task_cpu_time', 'task_steps')
+
+# Task metrics of the suspendable call whose event is being recorded, by (profiler id, label)
+_task_metrics: ContextVar[Dict[Tuple[int, str], Dict[str, float]]] = ContextVar('smartprofiler_task_metrics', default={})
+
+# Call counts of the FunctionProfiler sections open in the current thread or asyncio task
+_call_count_sections: ContextVar[Tuple[Dict[CodeType, int], ...]] = ContextVar('smartprofiler_call_sections', default=())
+
+# Events buffered before they are folded into running totals (e.g. the streaming aggregates) at once
+_FOLD_BATCH_SIZE = 256
+
+# Code of each profiled coroutine function, by id of its wrapper's own code object
+_wrapped_codes: Dict[int, CodeType] = {}
+
+
+def _register_wrapper_code(wrapper: Callable, func: Callable):
+    """Give a coroutine wrapper its own code object and remember the code of the function it wraps."""
+    code = getattr(inspect.unwrap(func), '__code__', None)
+    if code is None:
+        return
+    wrapper.__code__ = wrapper.__code__.replace()
+    key = id(wrapper.__code__)
+    _wrapped_codes[key] = code
+    weakref.finalize(wrapper.__code__, _wrapped_codes.pop, key, None)
+
+
+def _fold_events(
+    aggregates: Dict[str, LabelAggregate],
+    events: Iterable[Tuple[str, Dict[str, Any], float]],
+    exclude: FrozenSet[str],
+    histograms: bool = True
+) -> Dict[str, LabelAggregate]:
+    """Fold (label, metrics, weight) events into per-label aggregates, one batch per label."""
+    by_label: Dict[str, List[Tuple[Dict[str, Any], float]]] = {}
+    for label, metrics, weight in events:
+        batch = by_label.get(label)
+        if batch is None:
+            batch = by_label[label] = []
+        batch.append((metrics, weight))
+    for label, batch in by_label.items():
+        aggregate = aggregates.get(label)
+        if aggregate is None:
+            aggregate = aggregates[label] = LabelAggregate(histograms=histograms)
+        aggregate.add_many(batch, exclude)
+    return aggregates
+
+
+def _wrapped_code(code: CodeType) -> CodeType:
+    """
+    Return the profiled function's code for the code of a coroutine wrapper, else `code` itself.
+
+    A finished wrapper coroutine has no frame left, so its `cr_code` is the only link back to the
+    coroutine function it ran.
+    """
+    return _wrapped_codes.get(id(code), code)
+
+
+class _StepTimer:
+    """Times a coroutine or generator: total elapsed time, and thread CPU time of the steps it runs in."""
+
+    __slots__ = ('start', 'cpu_time', 'steps')
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.cpu_time = 0.0
+        self.steps = 0
+
+    def metrics(self) -> Dict[str, float]:
+        return {
+            'task_wall_time': time.perf_counter() - self.start,
+            'task_cpu_time': self.cpu_time,
+            'task_steps': self.steps,
+        }
+
+
+def _timed_steps(iterator: Iterator, timer: _StepTimer) -> Any:
+    """Delegate to a generator or await iterator, adding the thread CPU time of each step to `timer`.
+
+    Time spent suspended (at `await`/`yield`, while the event loop runs other tasks or the
+    consumer runs) falls outside the steps and is not counted.
+    """
+    value, error = None, None
+    while True:
+        timer.steps += 1
+        cpu_start = time.thread_time()
+        try:
+            item = iterator.send(value) if error is None else iterator.throw(error)
+        except StopIteration as stop:
+            timer.cpu_time += time.thread_time() - cpu_start
+            return stop.value
+        except BaseException:
+            timer.cpu_time += time.thread_time() - cpu_start
+            raise
+        timer.cpu_time += time.thread_time() - cpu_start
+        try:
+            value, error = (yield item), None
+        except GeneratorExit:
+            iterator.close()
+            raise
+        except BaseException as e:
+            value, error = None, e
+
+
+class _TimedAwaitable:
+    """Awaitable running another awaitable through `_timed_steps`."""
+
+    __slots__ = ('awaitable', 'timer')
+
+    def __init__(self, awaitable: Any, timer: _StepTimer):
+        self.awaitable = awaitable
+        self.timer = timer
+
+    def __await__(self):
+        # Native coroutines are driven directly, keeping their frames reachable from the await chain
+        awaitable = self.awaitable
+        return _timed_steps(awaitable if isinstance(awaitable, CoroutineType) else awaitable.__await__(), self.timer)
+
+
 class BaseProfiler(ABC):
     """Abstract base class for profiling implementations with aggregate statistics."""
 
-    def __init__(self, logger: Optional[Any] = None, log_level: int = logging.INFO, enable_logging: bool = True):
+    # Metrics that identify an event rather than measure it; skipped by aggregates without a type check
+    _identity_metrics: FrozenSet[str] = frozenset()
+
+    def __init__(
+        self,
+        logger: Optional[Any] = None,
+        log_level: int = logging.INFO,
+        enable_logging: bool = True,
+        stats_store: Optional[StatsStore] = None,
+        retention: Optional[RetentionPolicy] = None,
+        store_events: bool = True,
+        sample_rate: float = 1.0,
+        sample_every: Optional[int] = None,
+        async_logging: bool = False,
+        aggregates: bool = True,
+        histograms: Optional[bool] = None
+    ):
         """
         Initialize the profiler with an optional custom logger, log level, and logging enablement.
 
         Args:
             logger: Custom logger instance (default: None, uses default logger).
                   Can be logging.Logger, loguru.Logger, structlog.BoundLogger, or any custom logger.
+                  A LoggerAdapter is used as is, so several profilers can share one async writer.
             log_level: Logging level to use (e.g., logging.INFO, logging.DEBUG).
             enable_logging: If False, disables logging of metrics.
+            stats_store: Storage backend for profiling events (default: a new ColumnarStatsStore).
+            retention: Retention policy for the default store (e.g., RingBufferRetention(10000)).
+                  Bounds memory use of long-running processes; by default every event is kept.
+            store_events: If False, only per-label aggregates are kept and raw events are discarded.
+            sample_rate: Fraction of profile_function calls that are profiled, chosen at random
+                  (default: 1.0, every call). Other calls go straight to the function.
+            sample_every: Profile every N-th profile_function call instead (deterministic; cannot be
+                  combined with sample_rate). Sampled events carry 'sample_weight' and aggregates
+                  are scaled by it, so counts, sums and percentiles estimate all calls.
+            async_logging: If True, log messages are queued and written by a background thread
+                  (see LoggerAdapter); call `flush_logs()` before reading the log output.
+            aggregates: If False, no streaming per-label aggregates are updated as events arrive;
+                  `get_aggregates()` and `percentile()` then compute them from the stored events.
+            histograms: If True, the streaming aggregates also keep a LogHistogram per metric,
+                  updated for every event. Otherwise percentiles are computed from the stored
+                  events when they are queried (with a retention policy, from the retained events
+                  only). Default: only when store_events=False, as there are no stored events then.
         """
         # Create a default logger if none provided
         default_logger = logging.getLogger(__name__)
@@ -29,12 +205,36 @@ class BaseProfiler(ABC):
             default_logger.addHandler(handler)
         
         # Wrap the logger with our adapter
-        self.logger = LoggerAdapter(logger or default_logger)
+        if isinstance(logger, LoggerAdapter):
+            self.logger = logger
+        else:
+            self.logger = LoggerAdapter(logger or default_logger, async_mode=async_logging)
         self.logger.setLevel(log_level)
         self.log_level = log_level
         self.enable_logging = enable_logging
         # Store profiling results for aggregate statistics
-        self.stats: List[Dict] = []
+        if stats_store is not None and retention is not None:
+            raise ValueError("Pass the retention policy to the stats store itself when providing a custom stats_store")
+        self.stats: StatsStore = stats_store if stats_store is not None else ColumnarStatsStore(retention=retention)
+        self.store_events = store_events
+        if not store_events and not aggregates:
+            raise ValueError("store_events=False needs aggregates=True, otherwise nothing is kept")
+        self.aggregates = aggregates
+        self.histograms = not store_events if histograms is None else histograms
+        if not 0 < sample_rate <= 1:
+            raise ValueError(f"sample_rate must be in (0, 1], got {sample_rate}")
+        if sample_every is not None and sample_every < 1:
+            raise ValueError(f"sample_every must be at least 1, got {sample_every}")
+        if sample_every is not None and sample_rate != 1.0:
+            raise ValueError("Pass either sample_rate or sample_every, not both")
+        self.sample_rate = sample_rate
+        self.sample_every = sample_every
+        self._aggregate_exclude = self._identity_metrics | {SAMPLE_WEIGHT_METRIC, *CONTEXT_METRICS}
+        # Streaming per-label aggregates, folded in from the pending events in batches
+        self._aggregates: Dict[str, LabelAggregate] = {}
+        # Appended to without the lock (deque appends and pops are atomic); drained under it
+        self._pending_aggregates: Deque[Tuple[str, Dict[str, Any], float]] = deque()
+        self._aggregates_lock = threading.Lock()
 
     @abstractmethod
     def profile_function(self, func: Callable) -> Callable:
@@ -52,27 +252,346 @@ class BaseProfiler(ABC):
         pass
 
     def _wrap_function(self, func: Callable, profile_logic: Callable) -> Callable:
-        """Helper to wrap a function with profiling logic."""
+        """
+        Helper to wrap a function with profiling logic, honouring sample_rate/sample_every.
+
+        Coroutine functions, async generator functions and generator functions are profiled from
+        their first step to their completion instead (see `_wrap_suspendable`).
+        """
+        if inspect.iscoroutinefunction(func) or inspect.isasyncgenfunction(func) or inspect.isgeneratorfunction(func):
+            return self._wrap_suspendable(func)
+        if self.sample_every is not None and self.sample_every > 1:
+            every = self.sample_every
+            calls = itertools.count()
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if next(calls) % every:
+                    return func(*args, **kwargs)
+                return self._run_sampled(func, profile_logic, every, args, kwargs)
+            return wrapper
+        if self.sample_rate < 1.0:
+            rate = self.sample_rate
+            weight = 1.0 / rate
+            draw = random.random
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if draw() >= rate:
+                    return func(*args, **kwargs)
+                return self._run_sampled(func, profile_logic, weight, args, kwargs)
+            return wrapper
+
         @wraps(func)
         def wrapper(*args, **kwargs):
             return profile_logic(func, *args, **kwargs)
         return wrapper
 
+    def _call_sampler(self) -> Callable[[], Optional[float]]:
+        """Return a callable deciding per call whether to profile it: None to skip, else the call's weight."""
+        if self.sample_every is not None and self.sample_every > 1:
+            every = self.sample_every
+            calls = itertools.count()
+            return lambda: None if next(calls) % every else float(every)
+        if self.sample_rate < 1.0:
+            rate = self.sample_rate
+            weight = 1.0 / rate
+            draw = random.random
+            return lambda: None if draw() >= rate else weight
+        return lambda: 1.0
+
+    def _function_section(self, label: str) -> ContextManager:
+        """Context manager profiling one call of a coroutine or generator (default: profile_block)."""
+        return self.profile_block(label)
+
+    def _exit_function_section(self, section: ContextManager, label: str, timer: _StepTimer, weight: float,
+                               exc_info: Tuple):
+        """Close a suspendable call's section, adding its task metrics and sample weight to the event."""
+        key = (id(self), label)
+        metrics_token = _task_metrics.set({**_task_metrics.get(), key: timer.metrics()})
+        weights_token = _sample_weights.set({**_sample_weights.get(), key: weight}) if weight != 1.0 else None
+        try:
+            section.__exit__(*exc_info)
+        finally:
+            if weights_token is not None:
+                _sample_weights.reset(weights_token)
+            _task_metrics.reset(metrics_token)
+
+    def _wrap_suspendable(self, func: Callable) -> Callable:
+        """
+        Wrap a coroutine, async generator or generator function.
+
+        The section opens when the call first runs and closes when it returns, raises or is
+        closed, so it spans the awaited work. Events get TASK_METRICS: 'task_wall_time' (first
+        step to completion), 'task_cpu_time' (thread CPU time of the steps the call itself ran,
+        excluding time suspended at `await` or `yield`) and 'task_steps'. Profilers measuring
+        process-wide counters (memory, disk, network) also see other tasks that ran meanwhile,
+        and sections the consumer of a generator opens between items nest under its section.
+        """
+        label = f"Function '{func.__name__}'"
+        sample = self._call_sampler()
+
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def wrapper(*args, **kwargs):
+                weight = sample()
+                if weight is None:
+                    return await func(*args, **kwargs)
+                section = self._function_section(label)
+                section.__enter__()
+                timer = _StepTimer()
+                try:
+                    result = await _TimedAwaitable(func(*args, **kwargs), timer)
+                except BaseException:
+                    self._exit_function_section(section, label, timer, weight, sys.exc_info())
+                    raise
+                self._exit_function_section(section, label, timer, weight, (None, None, None))
+                return result
+            _register_wrapper_code(wrapper, func)
+            return wrapper
+
+        if inspect.isasyncgenfunction(func):
+            @wraps(func)
+            async def wrapper(*args, **kwargs):
+                weight = sample()
+                generator = func(*args, **kwargs)
+                section = timer = None
+                if weight is not None:
+                    section = self._function_section(label)
+                    section.__enter__()
+                    timer = _StepTimer()
+                # Unsampled calls are delegated the same way, only without timing the steps, so
+                # asend() values, athrow() and aclose() always reach the wrapped generator
+                value, error = None, None
+                try:
+                    while True:
+                        step = generator.asend(value) if error is None else generator.athrow(error)
+                        try:
+                            item = await (step if timer is None else _TimedAwaitable(step, timer))
+                        except StopAsyncIteration:
+                            break
+                        try:
+                            value, error = (yield item), None
+                        except GeneratorExit:
+                            close = generator.aclose()
+                            await (close if timer is None else _TimedAwaitable(close, timer))
+                            raise
+                        except BaseException as e:
+                            value, error = None, e
+                except BaseException:
+                    if section is not None:
+                        self._exit_function_section(section, label, timer, weight, sys.exc_info())
+                    raise
+                if section is not None:
+                    self._exit_function_section(section, label, timer, weight, (None, None, None))
+            return wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            weight = sample()
+            if weight is None:
+                return (yield from func(*args, **kwargs))
+            section = self._function_section(label)
+            section.__enter__()
+            timer = _StepTimer()
+            try:
+                result = yield from _timed_steps(func(*args, **kwargs), timer)
+            except BaseException:
+                self._exit_function_section(section, label, timer, weight, sys.exc_info())
+                raise
+            self._exit_function_section(section, label, timer, weight, (None, None, None))
+            return result
+        return wrapper
+
+    def _run_sampled(self, func: Callable, profile_logic: Callable, weight: float, args: Tuple, kwargs: Dict):
+        """Run a sampled call, registering its weight for the event it records."""
+        # The label every profiler's profile_function records its events under
+        key = (id(self), f"Function '{func.__name__}'")
+        weights = dict(_sample_weights.get())
+        weights[key] = weight
+        token = _sample_weights.set(weights)
+        try:
+            return profile_logic(func, *args, **kwargs)
+        finally:
+            _sample_weights.reset(token)
+
+    def _sample_weight(self, label: str) -> float:
+        """Return how many calls the event being recorded for `label` stands for."""
+        weights = _sample_weights.get()
+        return weights.get((id(self), label), 1.0) if weights else 1.0
+
+    def _record_stat(self, label: str, metrics: Dict[str, Any]) -> float:
+        """Store a single profiling event, fold it into the label's aggregates and return its timestamp."""
+        timestamp = time.time()
+        weight = self._sample_weight(label)
+        if weight != 1.0:
+            metrics[SAMPLE_WEIGHT_METRIC] = weight
+        pending = _task_metrics.get()
+        if pending:
+            task_metrics = pending.get((id(self), label))
+            if task_metrics is not None:
+                metrics.update(task_metrics)
+        span = current_span()
+        if span is not None:
+            metrics['trace_id'] = span.trace_id
+            metrics['context_span_id'] = span.span_id
+        if self.aggregates:
+            pending = self._pending_aggregates
+            pending.append((label, metrics, weight))
+            if len(pending) >= _FOLD_BATCH_SIZE:
+                with self._aggregates_lock:
+                    self._fold_pending_aggregates()
+        if self.store_events:
+            self.stats.record(label, metrics, timestamp)
+        return timestamp
+
+    def _log_event(self, label: str, metrics: Dict[str, Any], timestamp: float, fmt: str, *args: Any):
+        """Log one profiling event as a structured record plus its `fmt % args` message (see LoggerAdapter.log_record)."""
+        if not self.enable_logging:
+            return
+        if _call_count_sections.get():
+            # Logging a nested section's event is profiler work, not calls of the enclosing sections
+            token = _call_count_sections.set(())
+            try:
+                self._write_event(label, metrics, timestamp, fmt, args)
+            finally:
+                _call_count_sections.reset(token)
+        else:
+            self._write_event(label, metrics, timestamp, fmt, args)
+
+    def _write_event(self, label: str, metrics: Dict[str, Any], timestamp: float, fmt: str, args: tuple):
+        if not self.logger.is_enabled(self.log_level):
+            return
+        record = {
+            'profiler': type(self).__name__,
+            'label': label,
+            'metrics': metrics,
+            'timestamp': timestamp,
+            'thread': threading.current_thread().name,
+            'span_id': metrics.get('span_id', metrics.get('context_span_id')),
+            'trace_id': metrics.get('trace_id'),
+        }
+        self.logger.log_record(self.log_level, record, fmt, *args)
+
     def get_stats(self) -> List[Dict]:
-        """Return collected profiling statistics."""
-        return self.stats
+        """Return collected profiling statistics, materialized as a list of dicts."""
+        return self.stats.to_list()
+
+    def get_aggregates(self, percentiles: Iterable[float] = (50, 90, 99)) -> Dict[str, Dict[str, Any]]:
+        """
+        Return streaming aggregates for every label.
+
+        Args:
+            percentiles: Percentiles (0-100) to report for each numeric metric.
+
+        Returns:
+            Dict mapping each label to {'count': events, 'metrics': {metric: {'count', 'sum', 'min',
+            'max', 'mean', 'variance', 'stddev', 'p50', ...}}}. Non-numeric metrics are not aggregated.
+        """
+        percentiles = list(percentiles)
+        with self._aggregates_lock:
+            aggregates = self._label_aggregates()
+            ranked = self._percentile_aggregates(aggregates)
+            result = {}
+            for label, aggregate in aggregates.items():
+                metrics = {}
+                for key, metric in aggregate.metrics.items():
+                    summary = metric.to_dict(())
+                    ranked_metric = ranked[label].metrics.get(key) if label in ranked else None
+                    for q in percentiles:
+                        summary[f"p{q:g}"] = ranked_metric.percentile(q) if ranked_metric is not None else None
+                    metrics[key] = summary
+                result[label] = {'count': aggregate.count, 'metrics': metrics}
+            return result
+
+    def percentile(self, label: str, metric: str, q: float) -> Optional[float]:
+        """Return the approximate q-th percentile (0-100) of a metric for a label, or None if unseen."""
+        with self._aggregates_lock:
+            aggregate = self._percentile_aggregates(self._label_aggregates()).get(label)
+            if aggregate is None or metric not in aggregate.metrics:
+                return None
+            return aggregate.metrics[metric].percentile(q)
+
+    def _label_aggregates(self) -> Dict[str, LabelAggregate]:
+        """The streaming aggregates, or with aggregates=False, aggregates built from the stored events."""
+        if self.aggregates:
+            self._fold_pending_aggregates()
+            return self._aggregates
+        return self._stored_event_aggregates()
+
+    def _stored_event_aggregates(self) -> Dict[str, LabelAggregate]:
+        """Aggregates, with histograms, of the stored events."""
+        return _fold_events(
+            {},
+            ((event['label'], event['metrics'], event['metrics'].get(SAMPLE_WEIGHT_METRIC, 1.0)) for event in self.stats),
+            self._aggregate_exclude
+        )
+
+    def _percentile_aggregates(self, aggregates: Dict[str, LabelAggregate]) -> Dict[str, LabelAggregate]:
+        """The aggregates whose histograms answer percentile queries, given the current aggregates."""
+        if self.histograms or not self.aggregates or not self.store_events:
+            return aggregates
+        return self._stored_event_aggregates()
+
+    def _fold_pending_aggregates(self):
+        """Fold the events recorded since the last fold into the aggregates; the caller holds the lock."""
+        if self._pending_aggregates:
+            popleft = self._pending_aggregates.popleft
+            pending = [popleft() for _ in range(len(self._pending_aggregates))]
+            _fold_events(self._aggregates, pending, self._aggregate_exclude, self.histograms)
+
+    def _configuration(self) -> Dict[str, Any]:
+        """
+        Return constructor arguments, apart from the logger, for an equivalent profiler.
+
+        The stats store is replaced by an empty one of the same class, with a fresh copy of its
+        retention policy; custom stores are recreated through their no-argument constructor.
+        """
+        store = self.stats
+        if isinstance(store, ColumnarStatsStore):
+            retention = copy.deepcopy(store.retention)
+            if retention is not None:
+                retention.reset()
+            store = ColumnarStatsStore(retention=retention)
+        else:
+            store = type(store)()
+        return {
+            'log_level': self.log_level,
+            'enable_logging': self.enable_logging,
+            'stats_store': store,
+            'store_events': self.store_events,
+            'sample_rate': self.sample_rate,
+            'sample_every': self.sample_every,
+            'async_logging': self.logger.async_mode,
+            'aggregates': self.aggregates,
+            'histograms': self.histograms,
+        }
 
     def clear_stats(self):
-        """Clear collected profiling statistics."""
+        """Clear collected profiling statistics and aggregates."""
         self.stats.clear()
+        with self._aggregates_lock:
+            self._aggregates.clear()
+            self._pending_aggregates.clear()
+
+    def flush_logs(self):
+        """Wait until all log messages queued by async logging have been written."""
+        self.logger.flush()
 
     def summarize_stats(self):
-        """Log a summary of collected statistics."""
+        """Log a per-label summary of the collected statistics."""
         if not self.enable_logging:
             return
-        if not self.stats:
-            self.logger.log(self.log_level, "No profiling statistics available.")
+        aggregates = self.get_aggregates(percentiles=(50, 99))
+        if not aggregates:
+            self.logger.emit(self.log_level, "No profiling statistics available.")
             return
-        self.logger.log(self.log_level, f"Summary of {len(self.stats)} profiling events:")
-        for stat in self.stats:
-            self.logger.log(self.log_level, f"{stat['label']}: {stat['metrics']}")
+        total = round(sum(aggregate['count'] for aggregate in aggregates.values()))
+        self.logger.emit(self.log_level, "Summary of %d profiling events across %d labels:", total, len(aggregates))
+        for label, aggregate in aggregates.items():
+            parts = [
+                f"{key} mean={summary['mean']:.4g} p50={summary['p50']:.4g} "
+                f"p99={summary['p99']:.4g} max={summary['max']:.4g}"
+                for key, summary in aggregate['metrics'].items()
+            ]
+            self.logger.emit(self.log_level, "%s (%d events): %s", label, round(aggregate['count']), '; '.join(parts))
@@ -0,0 +1,364 @@
+"""Overhead benchmark suite for the profilers.
+
+Measures, for each profiler, section kind and logging setting, how much one profiled event
+costs in time (ns/call, over an unprofiled baseline) and how much memory the profiler retains
+per event (bytes/event, via tracemalloc). Results can be written as JSON and compared against a
+previous run to catch overhead regressions:
+
+    python -m smartprofiler.bench --events 1000 10000 --output bench.json
+    python -m smartprofiler.bench --baseline bench.json
+
+Every case also reports its cost relative to a reference section (an empty context manager that
+times itself and appends the measurement to a list, i.e. the least any profiler does per event),
+which is comparable across machines; OVERHEAD_BUDGETS caps it for the core profilers:
+
+    python -m smartprofiler.bench --profilers cpu --logging off --check-budgets
+"""
+import gc
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import tracemalloc
+from contextlib import contextmanager
+from typing import Callable, Optional, Dict, List, Sequence, Any
+
+from .composite_profiler import CompositeProfiler
+from .cpu_profiler import CPUProfiler
+from .disk_profiler import DiskProfiler
+from .event_loop_profiler import EventLoopProfiler
+from .file_io_profiler import FileIOProfiler
+from .function_profiler import FunctionProfiler
+from .memory_profiler import MemoryProfiler
+from .network_profiler import NetworkProfiler
+from .sampling_profiler import SamplingProfiler
+
+# Profiler configurations benchmarked by default; each factory accepts BaseProfiler keyword arguments
+PROFILERS: Dict[str, Callable[..., Any]] = {
+    'cpu': lambda **kwargs: CPUProfiler(**kwargs),
+    'cpu_time': lambda **kwargs: CPUProfiler(time_func='cpu_time', **kwargs),
+    'cpu_async_logging': lambda **kwargs: CPUProfiler(async_logging=True, **kwargs),
+    'function': lambda **kwargs: FunctionProfiler(**kwargs),
+    'memory_rss': lambda **kwargs: MemoryProfiler(mode='rss', **kwargs),
+    'memory_tracemalloc': lambda **kwargs: MemoryProfiler(mode='tracemalloc', **kwargs),
+    'disk': lambda **kwargs: DiskProfiler(**kwargs),
+    'network': lambda **kwargs: NetworkProfiler(**kwargs),
+    'file_io': lambda **kwargs: FileIOProfiler(**kwargs),
+    'event_loop': lambda **kwargs: EventLoopProfiler(**kwargs),
+    'sampling': lambda **kwargs: SamplingProfiler(**kwargs),
+    'composite': lambda **kwargs: CompositeProfiler(**kwargs),
+}
+
+MODES = ('function', 'block', 'line')
+
+# Fields identifying one benchmark case across runs
+CASE_FIELDS = ('profiler', 'mode', 'logging', 'events')
+
+# Highest allowed 'relative_cost' (ns/call over that of the reference section) per (profiler, mode),
+# with logging off and default options
+OVERHEAD_BUDGETS: Dict[tuple, float] = {
+    ('cpu', 'function'): 6.0,
+    ('cpu', 'block'): 6.0,
+    ('cpu', 'line'): 6.0,
+}
+
+
+def _noop():
+    pass
+
+
+def _bench_logger() -> logging.Logger:
+    """Logger that builds records for enabled profilers but discards them without handler I/O."""
+    logger = logging.getLogger('smartprofiler.bench')
+    if not logger.handlers:
+        logger.addHandler(logging.NullHandler())
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    return logger
+
+
+def _make_profiler(name: str, logging_enabled: bool) -> Any:
+    return PROFILERS[name](logger=_bench_logger(), enable_logging=logging_enabled)
+
+
+def _run_events(profiler: Any, mode: str, events: int) -> int:
+    """Profile `events` empty sections and return the elapsed nanoseconds."""
+    if mode == 'function':
+        function = profiler.profile_function(_noop)
+        start = time.perf_counter_ns()
+        for _ in range(events):
+            function()
+        return time.perf_counter_ns() - start
+    section = profiler.profile_block if mode == 'block' else profiler.profile_line
+    start = time.perf_counter_ns()
+    for _ in range(events):
+        with section('bench'):
+            pass
+    return time.perf_counter_ns() - start
+
+
+@contextmanager
+def _reference_section(measurements: List[Dict[str, float]]):
+    start = time.perf_counter()
+    yield
+    measurements.append({'execution_time': time.perf_counter() - start})
+
+
+def _run_reference(events: int) -> int:
+    """Time `events` reference sections and return the elapsed nanoseconds."""
+    measurements: List[Dict[str, float]] = []
+    start = time.perf_counter_ns()
+    for _ in range(events):
+        with _reference_section(measurements):
+            pass
+    return time.perf_counter_ns() - start
+
+
+def _run_baseline(mode: str, events: int) -> int:
+    """Time the same loop without a profiler."""
+    start = time.perf_counter_ns()
+    if mode == 'function':
+        for _ in range(events):
+            _noop()
+    else:
+        for _ in range(events):
+            pass
+    return time.perf_counter_ns() - start
+
+
+def _bytes_per_event(name: str, mode: str, logging_enabled: bool, events: int) -> float:
+    profiler = _make_profiler(name, logging_enabled)
+    try:
+        _run_events(profiler, mode, 1)  # create lazily allocated per-label state outside the measurement
+        gc.collect()
+        was_tracing = tracemalloc.is_tracing()
+        if not was_tracing:
+            tracemalloc.start()
+        try:
+            before = tracemalloc.get_traced_memory()[0]
+            _run_events(profiler, mode, events)
+            gc.collect()
+            after = tracemalloc.get_traced_memory()[0]
+        finally:
+            if not was_tracing:
+                tracemalloc.stop()
+    finally:
+        profiler.logger.close()  # stop an async writer so it cannot skew later cases
+    return (after - before) / events
+
+
+def bench_case(name: str, mode: str, logging_enabled: bool, events: int, repeat: int = 3) -> Dict[str, Any]:
+    """
+    Benchmark one profiler configuration.
+
+    Args:
+        name: Key of PROFILERS.
+        mode: 'function' (decorator), 'block' (profile_block) or 'line' (profile_line).
+        logging_enabled: Whether the profiler logs every event (records are discarded by a
+              NullHandler, so handler output is not included).
+        events: Number of profiled events per run; every run uses a fresh profiler, so this also
+              covers the cost of a growing stats store.
+        repeat: Runs per case; the fastest is reported.
+
+    Returns:
+        Dict with the CASE_FIELDS, 'ns_per_call', 'bytes_per_event' and 'relative_cost' (ns_per_call
+        over the ns/call of the reference section), or 'error' if the profiler is unavailable on
+        this machine.
+    """
+    if name not in PROFILERS:
+        raise ValueError(f"Unknown profiler: '{name}'. Supported: {list(PROFILERS.keys())}")
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode: '{mode}'. Supported: {list(MODES)}")
+    if events < 1 or repeat < 1:
+        raise ValueError("events and repeat must be at least 1")
+    result: Dict[str, Any] = {'profiler': name, 'mode': mode, 'logging': logging_enabled, 'events': events}
+    try:
+        profiled, baseline, reference, reference_baseline = [], [], [], []
+        for _ in range(repeat):
+            profiler = _make_profiler(name, logging_enabled)
+            try:
+                baseline.append(_run_baseline(mode, events))
+                profiled.append(_run_events(profiler, mode, events))
+                reference_baseline.append(_run_baseline('block', events))
+                reference.append(_run_reference(events))
+            finally:
+                profiler.logger.close()
+            del profiler
+            gc.collect()
+        result['ns_per_call'] = max(0.0, (min(profiled) - min(baseline)) / events)
+        reference_ns = max(1.0, (min(reference) - min(reference_baseline)) / events)
+        result['relative_cost'] = result['ns_per_call'] / reference_ns
+        result['bytes_per_event'] = _bytes_per_event(name, mode, logging_enabled, events)
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+    return result
+
+
+def run_benchmarks(
+    profilers: Optional[Sequence[str]] = None,
+    modes: Sequence[str] = MODES,
+    logging_options: Sequence[bool] = (False, True),
+    event_counts: Sequence[int] = (1000, 10000),
+    repeat: int = 3
+) -> Dict[str, Any]:
+    """
+    Run every combination of profiler, mode, logging setting and event count.
+
+    Returns:
+        Dict with 'environment' (interpreter and machine) and 'results' (one bench_case per combination).
+    """
+    results = [
+        bench_case(name, mode, logging_enabled, events, repeat)
+        for name in (profilers or list(PROFILERS))
+        for mode in modes
+        for logging_enabled in logging_options
+        for events in event_counts
+    ]
+    return {
+        'environment': {
+            'python': f"{platform.python_implementation()} {platform.python_version()}",
+            'platform': sys.platform,
+            'machine': platform.machine(),
+        },
+        'results': results,
+    }
+
+
+def _case_key(result: Dict[str, Any]) -> tuple:
+    return tuple(result[field] for field in CASE_FIELDS)
+
+
+def compare(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    threshold: float = 0.25,
+    min_ns: float = 100.0,
+    min_bytes: float = 16.0
+) -> List[Dict[str, Any]]:
+    """
+    Compare a run against a baseline run.
+
+    A case regresses when ns/call or bytes/event grew by more than `threshold` (relative) and by
+    more than `min_ns` / `min_bytes` (absolute, to ignore noise on very cheap profilers).
+
+    Returns:
+        One dict per case present in both runs, with the CASE_FIELDS, the baseline and current
+        values, the relative 'ns_change' and 'bytes_change', and 'regression'.
+    """
+    previous = {_case_key(result): result for result in baseline['results'] if 'error' not in result}
+    comparisons = []
+    for result in current['results']:
+        old = previous.get(_case_key(result))
+        if old is None or 'error' in result:
+            continue
+        comparison = {field: result[field] for field in CASE_FIELDS}
+        regression = False
+        for metric, change, floor in (('ns_per_call', 'ns_change', min_ns), ('bytes_per_event', 'bytes_change', min_bytes)):
+            before, after = old[metric], result[metric]
+            comparison[f"baseline_{metric}"] = before
+            comparison[metric] = after
+            comparison[change] = (after - before) / before if before > 0 else None
+            if after - before > max(floor, before * threshold):
+                regression = True
+        comparison['regression'] = regression
+        comparisons.append(comparison)
+    return comparisons
+
+
+def check_budgets(report: Dict[str, Any], budgets: Optional[Dict[tuple, float]] = None) -> List[Dict[str, Any]]:
+    """
+    Return the cases of a run whose relative cost exceeds their budget.
+
+    Only cases with logging off are checked, as logging costs depend on the logger.
+
+    Args:
+        report: Output of `run_benchmarks`.
+        budgets: Highest allowed relative cost per (profiler, mode) (default: OVERHEAD_BUDGETS).
+
+    Returns:
+        One dict per violation, with the CASE_FIELDS, 'relative_cost' and 'budget'.
+    """
+    budgets = OVERHEAD_BUDGETS if budgets is None else budgets
+    violations = []
+    for result in report['results']:
+        budget = budgets.get((result['profiler'], result['mode']))
+        if budget is None or result['logging'] or 'error' in result:
+            continue
+        if result['relative_cost'] > budget:
+            violation = {field: result[field] for field in CASE_FIELDS}
+            violation.update(relative_cost=result['relative_cost'], budget=budget)
+            violations.append(violation)
+    return violations
+
+
+def format_results(report: Dict[str, Any]) -> str:
+    """Format a run as a plain-text table."""
+    lines = [f"{'profiler':<20} {'mode':<9} {'logging':<8} {'events':>8} {'ns/call':>12} {'bytes/event':>12} "
+             f"{'relative':>9}"]
+    for result in report['results']:
+        prefix = f"{result['profiler']:<20} {result['mode']:<9} {str(result['logging']):<8} {result['events']:>8}"
+        if 'error' in result:
+            lines.append(f"{prefix} {result['error']}")
+        else:
+            lines.append(f"{prefix} {result['ns_per_call']:>12.1f} {result['bytes_per_event']:>12.1f} "
+                         f"{result['relative_cost']:>8.1f}x")
+    return '\n'.join(lines)
+
+
+def format_comparison(comparisons: List[Dict[str, Any]]) -> str:
+    """Format the output of `compare` as a plain-text table."""
+    def change(value: Optional[float]) -> str:
+        return f"{value:+.1%}" if value is not None else 'n/a'
+
+    lines = [f"{'profiler':<20} {'mode':<9} {'logging':<8} {'events':>8} {'ns/call':>22} {'bytes/event':>22}"]
+    for comparison in comparisons:
+        ns = f"{comparison['ns_per_call']:.1f} ({change(comparison['ns_change'])})"
+        memory = f"{comparison['bytes_per_event']:.1f} ({change(comparison['bytes_change'])})"
+        flag = '  REGRESSION' if comparison['regression'] else ''
+        lines.append(f"{comparison['profiler']:<20} {comparison['mode']:<9} {str(comparison['logging']):<8} "
+                     f"{comparison['events']:>8} {ns:>22} {memory:>22}{flag}")
+    return '\n'.join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Command-line entry point; returns 1 if a comparison against --baseline found a regression."""
+    parser = argparse.ArgumentParser(prog='python -m smartprofiler.bench', description=__doc__.split('\n')[0])
+    parser.add_argument('--profilers', nargs='+', choices=list(PROFILERS), help='profilers to run (default: all)')
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+    parser.add_argument('--logging', choices=('off', 'on', 'both'), default='both')
+    parser.add_argument('--events', nargs='+', type=int, default=[1000, 10000], help='events per run')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per case; the fastest is reported')
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    parser.add_argument('--baseline', help='JSON results of a previous run to compare against')
+    parser.add_argument('--threshold', type=float, default=0.25, help='relative growth counted as a regression')
+    parser.add_argument('--check-budgets', action='store_true', help='fail if a case exceeds OVERHEAD_BUDGETS')
+    args = parser.parse_args(argv)
+
+    logging_options = {'off': (False,), 'on': (True,), 'both': (False, True)}[args.logging]
+    report = run_benchmarks(args.profilers, args.modes, logging_options, args.events, args.repeat)
+    print(format_results(report))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        comparisons = compare(report, baseline, threshold=args.threshold)
+        print()
+        print(format_comparison(comparisons))
+        if any(comparison['regression'] for comparison in comparisons):
+            return 1
+    if args.check_budgets:
+        violations = check_budgets(report)
+        for violation in violations:
+            print(f"{violation['profiler']} {violation['mode']} ({violation['events']} events): "
+                  f"{violation['relative_cost']:.1f}x the reference section, budget {violation['budget']:.1f}x")
+        if violations:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
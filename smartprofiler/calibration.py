@@ -0,0 +1,192 @@
+import gc
+import os
+import sys
+import json
+import math
+import logging
+import platform
+import statistics
+from typing import Any, Callable, Optional, Dict, List, Tuple
+from .retention import RetentionPolicy
+
+# Section kinds calibrated separately: decorated calls and context managers (blocks and lines)
+SECTION_KINDS = ('function', 'block')
+
+# Fraction of the slowest samples dropped before averaging (GC pauses, preemption)
+_TRIM = 0.01
+
+
+class OverheadCalibration:
+    """Measured profiler overhead of one section kind, in the units of the profiler's time function.
+
+    `inner` is the bias inside every measured duration (what an empty section reports); `outer`
+    is the full cost of one empty section as seen by an enclosing section of the same profiler.
+    The stddevs describe the spread of individual events.
+    """
+
+    __slots__ = ('inner', 'inner_stddev', 'outer', 'outer_stddev', 'iterations')
+
+    def __init__(self, inner: float, inner_stddev: float, outer: float, outer_stddev: float, iterations: int):
+        self.inner = inner
+        self.inner_stddev = inner_stddev
+        self.outer = outer
+        self.outer_stddev = outer_stddev
+        self.iterations = iterations
+
+    def to_dict(self) -> Dict[str, float]:
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, float]) -> 'OverheadCalibration':
+        return cls(**{slot: data[slot] for slot in cls.__slots__})
+
+    def __repr__(self):
+        return (f"OverheadCalibration(inner={self.inner:.3e}±{self.inner_stddev:.1e}, "
+                f"outer={self.outer:.3e}±{self.outer_stddev:.1e})")
+
+
+def _trimmed_stats(samples: List[float]) -> Tuple[float, float]:
+    samples = sorted(samples)[:max(2, int(len(samples) * (1 - _TRIM)))]
+    return statistics.fmean(samples), statistics.stdev(samples)
+
+
+def _null_logger() -> logging.Logger:
+    """Logger that formats records like a real one but never emits them."""
+    logger = logging.getLogger('smartprofiler.calibration')
+    if not logger.handlers:
+        logger.addHandler(logging.NullHandler())
+    logger.propagate = False
+    return logger
+
+
+def _describe(value: Any) -> str:
+    """Stable description of a configuration value, e.g. a retention policy and its parameters."""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return repr(value)
+    parameters = ', '.join(
+        f"{key}={_describe(item)}" for key, item in sorted(vars(value).items())
+        if not key.startswith('_') and (item is None or isinstance(item, (bool, int, float, str, RetentionPolicy)))
+    )
+    return f"{type(value).__name__}({parameters})"
+
+
+def configuration_name(profiler_class: str, configuration: Dict[str, Any]) -> str:
+    """Cache name of a profiler configuration, e.g. "CPUProfiler(time_func='cpu_time', ...)"."""
+    return f"{profiler_class}({', '.join(f'{key}={_describe(value)}' for key, value in sorted(configuration.items()))})"
+
+
+def _empty():
+    pass
+
+
+def _timer_cost(time_func: Callable[[], float]) -> float:
+    """Smallest observed interval between two back-to-back clock reads."""
+    cost = math.inf
+    for _ in range(100):
+        start = time_func()
+        cost = min(cost, time_func() - start)
+    return cost
+
+
+def _measure(profiler_factory: Callable, metric: str, time_func: Callable[[], float], kind: str,
+             iterations: int) -> OverheadCalibration:
+    profiler = profiler_factory()
+    function = profiler.profile_function(_empty)
+    label = f"Function '{_empty.__name__}'" if kind == 'function' else 'calibration'
+    timer_cost = _timer_cost(time_func)
+    outer_samples = []
+    for iteration in range(iterations + 100):  # the first 100 warm up caches and lazily created state
+        if kind == 'function':
+            start = time_func()
+            function()
+            end = time_func()
+        else:
+            start = time_func()
+            with profiler.profile_block(label):
+                pass
+            end = time_func()
+        if iteration == 99:
+            profiler.clear_stats()
+        elif iteration >= 100:
+            outer_samples.append(end - start - timer_cost)
+    inner_samples = [event['metrics'][metric] for event in profiler.get_stats() if event['label'] == label]
+    if len(inner_samples) >= 2:
+        inner, inner_stddev = _trimmed_stats(inner_samples)
+    else:
+        # Events are not stored (store_events=False) or mostly skipped by sampling: use the aggregates
+        summary = profiler.get_aggregates().get(label, {}).get('metrics', {}).get(metric)
+        inner, inner_stddev = (summary['mean'], summary['stddev']) if summary else (0.0, 0.0)
+    profiler.clear_stats()
+    profiler.logger.close()
+    outer, outer_stddev = _trimmed_stats(outer_samples)
+    return OverheadCalibration(inner, inner_stddev, max(outer, inner), outer_stddev, iterations)
+
+
+def _load_cache(cache_path: str) -> Dict:
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_cache(cache_path: str, cache: Dict):
+    directory = os.path.dirname(os.path.abspath(cache_path))
+    os.makedirs(directory, exist_ok=True)
+    temporary = f"{cache_path}.{os.getpid()}.tmp"
+    with open(temporary, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, indent=2, sort_keys=True)
+    os.replace(temporary, cache_path)
+
+
+def calibration_key(name: str) -> str:
+    """Cache key for a profiler configuration `name` on this interpreter and machine."""
+    return f"{name}|{platform.python_implementation()} {platform.python_version()}|{platform.machine()}|{sys.platform}"
+
+
+def calibrate_overhead(
+    profiler_factory: Callable,
+    metric: str,
+    time_func: Callable[[], float],
+    name: str,
+    iterations: int = 2000,
+    cache_path: Optional[str] = None
+) -> Dict[str, OverheadCalibration]:
+    """
+    Measure a profiler configuration's per-event overhead for each section kind.
+
+    Args:
+        profiler_factory: Callable creating a fresh, uncalibrated profiler with the configuration
+              to measure; it records `metric` as a duration measured with `time_func`.
+        metric: Name of the recorded duration metric (e.g. 'execution_time').
+        time_func: Clock used by the profiler.
+        name: Description of the configuration, used as the cache key together with the
+              interpreter and machine.
+        iterations: Empty sections timed per section kind.
+        cache_path: JSON file to load the calibration from and store it in (default: no cache).
+
+    Returns:
+        Dict mapping 'function' and 'block' to an OverheadCalibration.
+    """
+    if iterations < 10:
+        raise ValueError(f"iterations must be at least 10, got {iterations}")
+    key = calibration_key(name)
+    if cache_path is not None:
+        cached = _load_cache(cache_path).get(key)
+        if cached is not None:
+            try:
+                return {kind: OverheadCalibration.from_dict(cached[kind]) for kind in SECTION_KINDS}
+            except (KeyError, TypeError):
+                pass
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        result = {kind: _measure(profiler_factory, metric, time_func, kind, iterations) for kind in SECTION_KINDS}
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    if cache_path is not None:
+        cache = _load_cache(cache_path)
+        cache[key] = {kind: calibration.to_dict() for kind, calibration in result.items()}
+        _save_cache(cache_path, cache)
+    return result
@@ -0,0 +1,231 @@
+import logging
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Callable, Optional, Dict, List, Sequence, Tuple, Any
+from .base_profiler import BaseProfiler
+from .cpu_profiler import TIME_FUNCTIONS
+from .disk_profiler import DiskProfiler
+from .memory_profiler import MemoryProfiler
+from .network_profiler import NetworkProfiler
+
+
+class MetricProvider(ABC):
+    """One measurement dimension of a CompositeProfiler.
+
+    `cost` orders providers: at section entry the most expensive provider starts first and the
+    cheapest last, at exit the cheapest stops first. Cheap probes (timers) therefore bracket the
+    profiled code as tightly as possible and never measure the expensive probes' own work.
+    """
+
+    cost = 0
+
+    @abstractmethod
+    def start(self) -> Any:
+        """Take the entry snapshot and return whatever `stop` needs."""
+        pass
+
+    @abstractmethod
+    def stop(self, state: Any) -> Dict[str, Any]:
+        """Take the exit snapshot and return this provider's metrics for the section."""
+        pass
+
+
+class TimeProvider(MetricProvider):
+    """Elapsed time, measured with one of CPUProfiler's time functions."""
+
+    cost = 0
+
+    def __init__(self, time_func: str = 'execution_time'):
+        """
+        Args:
+            time_func: 'execution_time', 'cpu_time' or 'wall_time' (see CPUProfiler).
+        """
+        if time_func not in TIME_FUNCTIONS:
+            raise ValueError(f"Unknown time_func: '{time_func}'. Supported: {list(TIME_FUNCTIONS.keys())}")
+        self.time_func = TIME_FUNCTIONS[time_func][0]
+        self.time_func_name = time_func
+
+    def start(self) -> float:
+        return self.time_func()
+
+    def stop(self, state: float) -> Dict[str, Any]:
+        return {self.time_func_name: self.time_func() - state}
+
+
+class MemoryProvider(MetricProvider):
+    """Memory usage as reported by MemoryProfiler ('current_mb', 'peak_mb', ...)."""
+
+    def __init__(self, mode: str = 'rss', **kwargs):
+        """
+        Args:
+            mode: 'tracemalloc', 'rss' or 'uss' (see MemoryProfiler).
+            **kwargs: Additional MemoryProfiler arguments (e.g., nframe, sample_interval, sampler).
+        """
+        self._profiler = MemoryProfiler(mode=mode, enable_logging=False, store_events=False, **kwargs)
+        # tracemalloc snapshots and USS map walks dwarf a single statm read
+        self.cost = 100 if mode in ('tracemalloc', 'uss') else 10
+
+    def start(self) -> Any:
+        return self._profiler._begin_section()
+
+    def stop(self, state: Any) -> Dict[str, Any]:
+        return self._profiler._end_section(state)
+
+
+class DiskProvider(MetricProvider):
+    """Disk I/O counter deltas as reported by DiskProfiler (without disk_usage)."""
+
+    cost = 20
+
+    def __init__(self, **kwargs):
+        """
+        Args:
+            **kwargs: Additional DiskProfiler arguments (e.g., scope, disk_metrics, sampler).
+        """
+        disk_metrics = {'disk_usage': False}
+        disk_metrics.update(kwargs.pop('disk_metrics', None) or {})
+        self._profiler = DiskProfiler(enable_logging=False, store_events=False, disk_metrics=disk_metrics, **kwargs)
+
+    def start(self) -> Any:
+        return self._profiler._get_io_counters()
+
+    def stop(self, state: Any) -> Dict[str, Any]:
+        totals, per_device = self._profiler._io_diff(state, self._profiler._get_io_counters())
+        enabled = self._profiler.disk_metrics
+        metrics: Dict[str, Any] = {field: value for field, value in totals.items() if enabled.get(field)}
+        if per_device is not None:
+            metrics['per_device'] = per_device
+        return metrics
+
+
+class NetworkProvider(MetricProvider):
+    """Network counter deltas as reported by NetworkProfiler."""
+
+    cost = 20
+
+    def __init__(self, **kwargs):
+        """
+        Args:
+            **kwargs: Additional NetworkProfiler arguments (e.g., scope, exclude_interfaces, sampler).
+        """
+        self._profiler = NetworkProfiler(enable_logging=False, store_events=False, **kwargs)
+
+    def start(self) -> Any:
+        return self._profiler._get_network_stats()
+
+    def stop(self, state: Any) -> Dict[str, Any]:
+        totals, per_interface = self._profiler._counter_diff(state, self._profiler._get_network_stats())
+        enabled = self._profiler.network_metrics
+        metrics: Dict[str, Any] = {field: value for field, value in totals.items() if enabled.get(field)}
+        if per_interface is not None and self._profiler.pernic:
+            metrics['per_interface'] = per_interface
+        return metrics
+
+
+class _NumericSummary:
+    """Renders an event's numeric metrics as 'key=value, ...' only when the log message is formatted."""
+
+    __slots__ = ('metrics',)
+
+    def __init__(self, metrics: Dict[str, Any]):
+        self.metrics = metrics
+
+    def __str__(self) -> str:
+        return ', '.join(
+            f"{key}={value:.4g}" for key, value in self.metrics.items()
+            if isinstance(value, (int, float)) and not isinstance(value, bool)
+        )
+
+
+class CompositeProfiler(BaseProfiler):
+    """Profiler that measures several dimensions of one section and records a single combined event.
+
+    Replaces stacking one decorator per profiler: every call takes one snapshot pass at entry and
+    one at exit over the configured providers, ordered by their cost (see MetricProvider).
+    """
+
+    def __init__(
+        self,
+        providers: Optional[Sequence[MetricProvider]] = None,
+        logger: Optional[logging.Logger] = None,
+        **kwargs
+    ):
+        """
+        Initialize the CompositeProfiler.
+
+        Args:
+            providers: Metric providers to combine (default: TimeProvider, MemoryProvider in 'rss'
+                  mode, DiskProvider and NetworkProvider). Later providers overwrite metrics of the
+                  same name reported by earlier ones.
+            logger: Custom logger instance (default: None, uses default logger).
+            **kwargs: Additional arguments passed to BaseProfiler (e.g., log_level, enable_logging).
+        """
+        super().__init__(logger=logger, **kwargs)
+        if providers is None:
+            providers = [TimeProvider(), MemoryProvider(), DiskProvider(), NetworkProvider()]
+        if not providers:
+            raise ValueError("CompositeProfiler needs at least one provider")
+        self.providers: List[MetricProvider] = list(providers)
+        # Stable sort: providers of equal cost start in the given order and stop in reverse
+        self._entry_order: List[MetricProvider] = sorted(self.providers, key=lambda provider: -provider.cost)
+
+    def _begin_section(self) -> List[Tuple[MetricProvider, Any]]:
+        started: List[Tuple[MetricProvider, Any]] = []
+        try:
+            for provider in self._entry_order:
+                started.append((provider, provider.start()))
+        except BaseException:
+            for provider, state in reversed(started):
+                try:
+                    provider.stop(state)
+                except Exception:
+                    pass
+            raise
+        return started
+
+    def _end_section(self, label: str, started: List[Tuple[MetricProvider, Any]]):
+        results: Dict[int, Dict[str, Any]] = {}
+        error: Optional[Exception] = None
+        for provider, state in reversed(started):
+            try:
+                results[id(provider)] = provider.stop(state)
+            except Exception as exc:
+                # Keep stopping the rest so no provider is left running, then report the first failure
+                if error is None:
+                    error = exc
+        if error is not None:
+            raise error
+        metrics: Dict[str, Any] = {}
+        for provider in self.providers:
+            metrics.update(results[id(provider)])
+        timestamp = self._record_stat(label, metrics)
+        self._log_event(label, metrics, timestamp, "%s - %s", label, _NumericSummary(metrics))
+
+    def profile_function(self, func: Callable) -> Callable:
+        """Decorator to profile all configured dimensions of a function."""
+        def profile_logic(func, *args, **kwargs):
+            started = self._begin_section()
+            try:
+                result = func(*args, **kwargs)
+            finally:
+                self._end_section(f"Function '{func.__name__}'", started)
+            return result
+        return self._wrap_function(func, profile_logic)
+
+    @contextmanager
+    def profile_block(self, label: str = "Composite block"):
+        """Context manager to profile all configured dimensions of a block of code."""
+        started = self._begin_section()
+        try:
+            yield
+        finally:
+            self._end_section(label, started)
+
+    @contextmanager
+    def profile_line(self, label: str = "Composite line(s)"):
+        """Context manager to profile all configured dimensions of a specific line or small block."""
+        started = self._begin_section()
+        try:
+            yield
+        finally:
+            self._end_section(label, started)
@@ -0,0 +1,143 @@
+"""Active-span context shared by the profilers, kept in contextvars.
+
+A span marks one logical unit of work, such as a request. The innermost open span is stored in
+a ContextVar, so it follows the code that opened it:
+- asyncio tasks copy the context when they are created and inherit the span that was active;
+- plain threads start with an empty context;
+- executor submissions inherit the span when the executor is wrapped in ContextExecutor (or the
+  function in `wrap`), which also makes `loop.run_in_executor` propagate it.
+
+Events recorded while a span is active carry its 'trace_id' (the id of the outermost span) and
+'context_span_id', so measurements of concurrent requests can be told apart.
+"""
+import itertools
+import contextvars
+from concurrent.futures import Executor, Future
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, Optional, Any
+
+_span_ids = itertools.count(1)
+
+# Innermost open span of every span tree in the current thread or task, by SpanContext key
+_open_spans: ContextVar[Dict[int, 'Span']] = ContextVar('smartprofiler_open_spans', default={})
+_tree_keys = itertools.count()
+
+
+def next_span_id() -> int:
+    """Return a process-wide unique span id."""
+    return next(_span_ids)
+
+
+class Span:
+    """An open or closed section in a span tree."""
+
+    __slots__ = ('label', 'span_id', 'parent', 'trace_id', 'closed')
+
+    def __init__(self, label: str, parent: Optional['Span'] = None):
+        self.label = label
+        self.span_id = next_span_id()
+        self.parent = parent
+        self.trace_id = parent.trace_id if parent is not None else self.span_id
+        self.closed = False
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.label!r}, span_id={self.span_id}, trace_id={self.trace_id})"
+
+
+class SpanContext:
+    """The innermost open span of one span tree, per thread and asyncio task.
+
+    All span trees share one module-level ContextVar holding {tree key: innermost span}, since
+    ContextVars are never freed and must not be created per profiler instance.
+
+    Spans may be closed out of order (e.g. overlapping context managers): closing a span that is
+    not the innermost one only marks it closed, and closing the innermost one makes its nearest
+    open ancestor current again.
+    """
+
+    __slots__ = ('_key',)
+
+    def __init__(self):
+        self._key = next(_tree_keys)
+
+    def current(self) -> Optional[Span]:
+        """Return the innermost open span in the current context, or None."""
+        return _open_spans.get().get(self._key)
+
+    def enter(self, span: Span):
+        """Make `span` (whose parent is the current span) the current span."""
+        _open_spans.set({**_open_spans.get(), self._key: span})
+
+    def exit(self, span: Span):
+        """Close `span`, restoring its nearest open ancestor if it is the current span."""
+        span.closed = True
+        spans = _open_spans.get()
+        if spans.get(self._key) is not span:
+            return
+        parent = span.parent
+        while parent is not None and parent.closed:
+            parent = parent.parent
+        spans = dict(spans)
+        if parent is None:
+            del spans[self._key]
+        else:
+            spans[self._key] = parent
+        _open_spans.set(spans)
+
+
+# Logical spans opened with `span()`; shared by all profilers
+_active_spans = SpanContext()
+
+
+def current_span() -> Optional[Span]:
+    """Return the innermost logical span open in the current thread or task, or None."""
+    return _open_spans.get().get(_active_spans._key)
+
+
+@contextmanager
+def span(label: str) -> Iterator[Span]:
+    """
+    Context manager opening a logical span, e.g. around the handling of one request.
+
+    Args:
+        label: Description of the unit of work.
+    """
+    opened = Span(label, _active_spans.current())
+    _active_spans.enter(opened)
+    try:
+        yield opened
+    finally:
+        _active_spans.exit(opened)
+
+
+def wrap(func: Callable) -> Callable:
+    """Return a callable that runs `func` in a copy of the caller's current context."""
+    context = contextvars.copy_context()
+
+    def run_in_context(*args, **kwargs):
+        # A Context can only be entered by one thread at a time, so every call gets its own copy
+        return context.copy().run(func, *args, **kwargs)
+    return run_in_context
+
+
+class ContextExecutor(Executor):
+    """Executor wrapper that runs every submitted call in the submitter's context.
+
+    Open spans, profiling sections of context-aware profilers (function calls, socket and file
+    I/O) and any other contextvars carry over into the worker thread. Process pools are not
+    supported, as contexts cannot be pickled.
+    """
+
+    def __init__(self, executor: Executor):
+        """
+        Args:
+            executor: The executor to delegate to (e.g. a ThreadPoolExecutor).
+        """
+        self._executor = executor
+
+    def submit(self, fn: Callable, *args: Any, **kwargs: Any) -> Future:
+        return self._executor.submit(wrap(fn), *args, **kwargs)
+
+    def shutdown(self, wait: bool = True, **kwargs: Any):
+        self._executor.shutdown(wait, **kwargs)
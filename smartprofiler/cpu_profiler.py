@@ -1,8 +1,13 @@
+import math
 import time
 import logging
+import threading
+from collections import deque
 from contextlib import contextmanager
-from typing import Callable, Optional
-from .base_profiler import BaseProfiler, _thread_local
+from typing import Callable, Deque, Optional, Dict, List, Tuple, Union, Any
+from .base_profiler import BaseProfiler, _FOLD_BATCH_SIZE
+from .calibration import OverheadCalibration, calibrate_overhead, configuration_name, _null_logger
+from .context import Span, SpanContext, next_span_id
 
 # Supported time functions
 TIME_FUNCTIONS = {
@@ -11,56 +16,253 @@ TIME_FUNCTIONS = {
     'wall_time': (time.time, "measures wall-clock time"),
 }
 
+# Separator between labels in a call path (compatible with folded-stack flamegraph input)
+CALL_PATH_SEPARATOR = ';'
+
+
+class _Span(Span):
+    """A CPUProfiler section in its profiler's span tree."""
+
+    __slots__ = ('path', 'child_time', 'kind', 'nested_overhead', 'nested_variance')
+
+    def __init__(self, label: str, parent: Optional['_Span'], kind: str, path: str):
+        # Span.__init__, inlined as one span is created per profiled event
+        self.label = label
+        self.span_id = next_span_id()
+        self.parent = parent
+        self.trace_id = parent.trace_id if parent is not None else self.span_id
+        self.closed = False
+        self.path = path
+        self.child_time = 0.0
+        self.kind = kind
+        # Calibrated cost (and its variance) of the profiler's own work in nested sections
+        self.nested_overhead = 0.0
+        self.nested_variance = 0.0
+
+
 class CPUProfiler(BaseProfiler):
-    """Profiler for measuring execution time (CPU or wall-clock)."""
+    """Profiler for measuring execution time (CPU or wall-clock).
+
+    Nested sections form a span tree: every event records its call path and parent span, and
+    both inclusive time and exclusive (self) time are reported. The open span is tracked with
+    contextvars (see smartprofiler.context), so sections in asyncio tasks and in ContextExecutor
+    submissions become children of the section that started them; concurrent children can then
+    add up to more than their parent's time, and self time is clamped at zero. With sample_rate
+    or sample_every, the self time of a sampled call also includes its unsampled profiled children.
+    """
 
-    def __init__(self, time_func: str = 'execution_time', logger: Optional[logging.Logger] = None, **kwargs):
+    _identity_metrics = frozenset({'span_id', 'parent_id', 'call_path'})
+
+    def __init__(
+        self,
+        time_func: str = 'execution_time',
+        logger: Optional[logging.Logger] = None,
+        calibrate: Union[bool, Dict[str, OverheadCalibration]] = False,
+        calibration_cache: Optional[str] = None,
+        **kwargs
+    ):
+        """
+        Initialize the CPUProfiler.
+
+        Args:
+            time_func: 'execution_time' (perf_counter), 'cpu_time' (process_time) or 'wall_time' (time).
+            logger: Custom logger instance (default: None, uses default logger).
+            calibrate: If True, measure this configuration's own per-event overhead at startup and
+                  subtract it from recorded durations, including the overhead of nested sections.
+                  Events then report 'overhead_correction' and 'overhead_uncertainty' (a stddev).
+                  A result of `calibrate_overhead` may be passed instead.
+            calibration_cache: JSON file the calibration is loaded from and saved to, keyed by
+                  configuration, interpreter and machine (default: calibrate on every start).
+            **kwargs: Additional arguments passed to BaseProfiler (e.g., log_level, enable_logging).
+        """
         super().__init__(logger=logger, **kwargs)
         if time_func not in TIME_FUNCTIONS:
             raise ValueError(f"Unknown time_func: '{time_func}'. Supported: {list(TIME_FUNCTIONS.keys())}")
         self.time_func = TIME_FUNCTIONS[time_func][0]
         self.time_func_name = time_func
+        if calibrate is True:
+            calibrate = self.calibrate(cache_path=calibration_cache)
+        self.calibration: Optional[Dict[str, OverheadCalibration]] = calibrate or None
+        self._spans = SpanContext()
+        # One shared string per call path, so stored events reference it instead of a fresh copy
+        self._path_strings: Dict[Tuple[Optional[str], str], str] = {}
+        # Per call path: [count, total (inclusive) time, self (exclusive) time]
+        self._call_paths: Dict[str, List[float]] = {}
+        self._call_paths_lock = threading.Lock()
+        # (path, weight, duration, self time) of closed spans not yet added to _call_paths
+        self._pending_call_paths: Deque[Tuple[str, float, float, float]] = deque()
+
+    def calibrate(self, iterations: int = 2000, cache_path: Optional[str] = None) -> Dict[str, OverheadCalibration]:
+        """
+        Measure the per-event overhead of this profiler's configuration.
+
+        The measured profilers share every constructor option of this one (time function, logging,
+        stats store and retention, store_events, aggregates, sampling) but start with an empty store.
+        Logging is measured up to formatting; handler output (e.g. writing to a terminal) is not.
+
+        Args:
+            iterations: Empty sections timed per section kind.
+            cache_path: JSON file to load the calibration from and store it in.
+
+        Returns:
+            Dict mapping 'function' and 'block' to an OverheadCalibration, suitable for `calibrate=`.
+        """
+        def make_profiler():
+            return CPUProfiler(time_func=self.time_func_name, logger=_null_logger(), **self._configuration())
+        name = configuration_name('CPUProfiler', {'time_func': self.time_func_name, **self._configuration()})
+        return calibrate_overhead(make_profiler, self.time_func_name, self.time_func, name, iterations, cache_path)
+
+    def _enter_span(self, label: str, kind: str = 'block') -> _Span:
+        parent = self._spans.current()
+        key = (parent.path if parent is not None else None, label)
+        path = self._path_strings.get(key)
+        if path is None:
+            path = self._path_strings.setdefault(key, f"{key[0]}{CALL_PATH_SEPARATOR}{label}" if parent else label)
+        span = _Span(label, parent, kind, path)
+        self._spans.enter(span)
+        return span
+
+    def _exit_span(self, span: _Span, duration: float) -> Dict[str, Any]:
+        """Close a span, charge its time to the parent and return the event metrics."""
+        self._spans.exit(span)
+        corrections = None
+        if self.calibration is not None:
+            calibration = self.calibration[span.kind]
+            correction = calibration.inner + span.nested_overhead
+            variance = calibration.inner_stddev ** 2 + span.nested_variance
+            duration = max(0.0, duration - correction)
+            corrections = {'overhead_correction': correction, 'overhead_uncertainty': math.sqrt(variance)}
+            if span.parent is not None:
+                span.parent.nested_overhead += span.nested_overhead + calibration.outer
+                span.parent.nested_variance += span.nested_variance + calibration.outer_stddev ** 2
+        self_time = max(0.0, duration - span.child_time)
+        if span.parent is not None:
+            span.parent.child_time += duration
+        pending = self._pending_call_paths
+        pending.append((span.path, self._sample_weight(span.label), duration, self_time))
+        if len(pending) >= _FOLD_BATCH_SIZE:
+            with self._call_paths_lock:
+                self._fold_call_paths()
+        metrics = {
+            self.time_func_name: duration,
+            'self_time': self_time,
+            'call_path': span.path,
+            'span_id': span.span_id,
+            'parent_id': span.parent.span_id if span.parent is not None else 0,
+        }
+        if corrections:
+            metrics.update(corrections)
+        return metrics
 
     def profile_function(self, func: Callable) -> Callable:
         """Decorator to profile the execution time of a function."""
         def profile_logic(func, *args, **kwargs):
+            label = f"Function '{func.__name__}'"
+            span = self._enter_span(label, 'function')
             start_time = self.time_func()
             try:
                 result = func(*args, **kwargs)
             finally:
                 end_time = self.time_func()
-                duration = end_time - start_time
-                metrics = {self.time_func_name: duration}
-                self.stats.append({'label': f"Function '{func.__name__}'", 'metrics': metrics})
-                if self.enable_logging:
-                    self.logger.log(self.log_level, f"Function '{func.__name__}' took {duration:.4f} seconds of {self.time_func_name}")
+                metrics = self._exit_span(span, end_time - start_time)
+                timestamp = self._record_stat(label, metrics)
+                self._log_event(label, metrics, timestamp, "%s took %.4f seconds of %s",
+                                label, metrics[self.time_func_name], self.time_func_name)
             return result
         return self._wrap_function(func, profile_logic)
 
     @contextmanager
     def profile_block(self, label: str = "Code block"):
         """Context manager to profile a block of code for time."""
+        span = self._enter_span(label)
+        start_time = self.time_func()
+        try:
+            yield
+        finally:
+            end_time = self.time_func()
+            metrics = self._exit_span(span, end_time - start_time)
+            timestamp = self._record_stat(label, metrics)
+            self._log_event(label, metrics, timestamp, "%s took %.4f seconds of %s",
+                            label, metrics[self.time_func_name], self.time_func_name)
+
+    @contextmanager
+    def _function_section(self, label: str):
+        """Profile one call of a coroutine or generator, corrected with the 'function' calibration."""
+        span = self._enter_span(label, 'function')
         start_time = self.time_func()
         try:
             yield
         finally:
             end_time = self.time_func()
-            duration = end_time - start_time
-            metrics = {self.time_func_name: duration}
-            self.stats.append({'label': label, 'metrics': metrics})
-            if self.enable_logging:
-                self.logger.log(self.log_level, f"{label} took {duration:.4f} seconds of {self.time_func_name}")
+            metrics = self._exit_span(span, end_time - start_time)
+            timestamp = self._record_stat(label, metrics)
+            self._log_event(label, metrics, timestamp, "%s took %.4f seconds of %s",
+                            label, metrics[self.time_func_name], self.time_func_name)
 
     @contextmanager
     def profile_line(self, label: str = "Line(s)"):
         """Context manager to profile a specific line or small block for time."""
+        span = self._enter_span(label)
         start_time = self.time_func()
         try:
             yield
         finally:
             end_time = self.time_func()
-            duration = end_time - start_time
-            metrics = {self.time_func_name: duration}
-            self.stats.append({'label': label, 'metrics': metrics})
-            if self.enable_logging:
-                self.logger.log(self.log_level, f"{label} took {duration:.4f} seconds of {self.time_func_name}")
+            metrics = self._exit_span(span, end_time - start_time)
+            timestamp = self._record_stat(label, metrics)
+            self._log_event(label, metrics, timestamp, "%s took %.4f seconds of %s",
+                            label, metrics[self.time_func_name], self.time_func_name)
+
+    def _fold_call_paths(self):
+        """Add the pending closed spans to the call path totals; the caller holds the lock."""
+        popleft = self._pending_call_paths.popleft
+        call_paths = self._call_paths
+        for _ in range(len(self._pending_call_paths)):
+            path, weight, duration, self_time = popleft()
+            totals = call_paths.get(path)
+            if totals is None:
+                totals = call_paths[path] = [0, 0.0, 0.0]
+            totals[0] += weight
+            totals[1] += duration * weight
+            totals[2] += self_time * weight
+
+    def get_call_paths(self) -> Dict[str, Dict[str, float]]:
+        """
+        Return inclusive and exclusive time per call path.
+
+        Returns:
+            Dict mapping each call path ("outer;inner") to {'count', 'total_time', 'self_time'}.
+        """
+        with self._call_paths_lock:
+            self._fold_call_paths()
+            return {
+                path: {'count': int(round(count)), 'total_time': total, 'self_time': self_time}
+                for path, (count, total, self_time) in self._call_paths.items()
+            }
+
+    def get_call_tree(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Return the call paths as a nested tree.
+
+        Returns:
+            Dict mapping each root label to a node {'count', 'total_time', 'self_time', 'children'},
+            where 'children' maps child labels to nodes of the same shape.
+        """
+        tree: Dict[str, Dict[str, Any]] = {}
+        for path, totals in sorted(self.get_call_paths().items()):
+            children = tree
+            node = None
+            for label in path.split(CALL_PATH_SEPARATOR):
+                node = children.get(label)
+                if node is None:
+                    node = children[label] = {'count': 0, 'total_time': 0.0, 'self_time': 0.0, 'children': {}}
+                children = node['children']
+            node.update(totals)
+        return tree
+
+    def clear_stats(self):
+        """Clear collected profiling statistics, aggregates and call paths."""
+        super().clear_stats()
+        with self._call_paths_lock:
+            self._call_paths.clear()
+            self._pending_call_paths.clear()
@@ -1,8 +1,62 @@
+import time
 import psutil
 import logging
+import threading
+from collections import namedtuple
 from contextlib import contextmanager
-from typing import Callable, Optional, Dict, Tuple
+from typing import Callable, Optional, Dict, Tuple, Any
 from .base_profiler import BaseProfiler
+from .sampler import MetricsSampler
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DISK_SCOPES = ('system', 'process', 'device')
+
+# Counter fields diffed by DiskProfiler, shared by system, per-device and per-process counters
+_IO_FIELDS = ('read_bytes', 'write_bytes', 'read_count', 'write_count')
+_IOCounters = namedtuple('_IOCounters', _IO_FIELDS)
+
+# Counter fields in log messages, with their descriptions
+_LOGGED_IO_FIELDS = (
+    ('read_bytes', 'Bytes read'),
+    ('write_bytes', 'Bytes written'),
+    ('read_count', 'Read operations'),
+    ('write_count', 'Write operations'),
+)
+
+
+class _DiskUsageCache:
+    """Process-wide cache of psutil.disk_usage() results, shared by all DiskProfiler instances."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[float, psutil._common.sdiskusage]] = {}
+
+    def get(self, path: str, max_age: float) -> psutil._common.sdiskusage:
+        """Return a reading for `path` that is at most `max_age` seconds old, refreshing it if needed."""
+        now = time.monotonic()
+        entry = self._entries.get(path)
+        if entry is not None and now - entry[0] <= max_age:
+            return entry[1]
+        usage = psutil.disk_usage(path)
+        with self._lock:
+            self._entries[path] = (now, usage)
+        return usage
+
+    def peek(self, path: str) -> Optional[Tuple[float, psutil._common.sdiskusage]]:
+        """Return the cached (monotonic timestamp, reading) pair for `path` without refreshing it."""
+        return self._entries.get(path)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_usage_cache = _DiskUsageCache()
+
 
 class DiskProfiler(BaseProfiler):
     """Profiler for measuring disk I/O and usage."""
@@ -12,10 +66,49 @@ class DiskProfiler(BaseProfiler):
         disk_path: str = '/',
         logger: Optional[logging.Logger] = None,
         disk_metrics: Optional[Dict[str, bool]] = None,
+        scope: str = 'system',
+        include_children: bool = False,
+        usage_max_age: float = 0.0,
+        usage_min_duration: Optional[float] = None,
+        sampler: Optional[MetricsSampler] = None,
          **kwargs
     ):
+        """
+        Initialize the DiskProfiler.
+
+        Args:
+            disk_path: Path whose file system usage is reported.
+            logger: Custom logger instance (default: None, uses default logger).
+            disk_metrics: Dict to enable/disable disk metrics (e.g., {'disk_usage': False}).
+            scope: Which I/O counters are diffed:
+                  'system' - system-wide counters (all processes, all disks);
+                  'process' - this process's own I/O (/proc/self/io on Linux; read_count and
+                  write_count count read/write system calls there);
+                  'device' - system-wide counters broken down per block device as 'per_device'.
+            include_children: In 'process' scope, add the I/O of live child processes and the
+                  block I/O of children that have already been waited for.
+            usage_max_age: Seconds a disk_usage reading may be reused from the cache shared by all
+                  DiskProfilers (default: 0.0, always read fresh). Usage changes slowly, so e.g. 0.5
+                  avoids two statvfs calls per profiled call on hot paths.
+            usage_min_duration: If set, disk_usage is only recorded for sections lasting at least
+                  this many seconds, and no statvfs is made on entry. Once a section crosses the
+                  threshold, its entry reading is the cached one if that was taken at most
+                  usage_max_age before entry, and otherwise the exit reading (a zero delta).
+            sampler: Shared MetricsSampler that polls the I/O counters in the background; section
+                  boundaries are then interpolated from its samples ('system' and 'process' scopes).
+            **kwargs: Additional arguments passed to BaseProfiler (e.g., log_level, enable_logging).
+        """
         super().__init__(logger, **kwargs)
+        if scope not in DISK_SCOPES:
+            raise ValueError(f"Unknown scope: '{scope}'. Supported: {list(DISK_SCOPES)}")
+        if sampler is not None and scope == 'device':
+            raise ValueError("A sampler cannot be used with scope='device'")
         self.disk_path = disk_path
+        self.scope = scope
+        self.include_children = include_children
+        self.usage_max_age = usage_max_age
+        self.usage_min_duration = usage_min_duration
+        self._process = psutil.Process() if scope == 'process' else None
         self.disk_metrics = {
             'read_bytes': True,
             'write_bytes': True,
@@ -25,40 +118,149 @@ class DiskProfiler(BaseProfiler):
         }
         if disk_metrics:
             self.disk_metrics.update(disk_metrics)
+        self.sampler = sampler
+        self._sampler_source = f"disk_io:{scope}:{include_children}" if scope == 'process' else f"disk_io:{scope}"
+        if sampler is not None:
+            sampler.register(self._sampler_source, self._sample_io_counters, _IO_FIELDS)
+
+    def _get_process_io_counters(self) -> _IOCounters:
+        """Get this process's I/O counters, optionally including its children."""
+        counters = self._process.io_counters()
+        totals = [getattr(counters, field) for field in _IO_FIELDS]
+        if not self.include_children:
+            return _IOCounters(*totals)
+        for child in self._process.children(recursive=True):
+            try:
+                child_counters = child.io_counters()
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+            for index, field in enumerate(_IO_FIELDS):
+                totals[index] += getattr(child_counters, field)
+        if resource is not None:
+            # Children that have exited and been waited for only survive as 512-byte block counts
+            usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+            totals[0] += usage.ru_inblock * 512
+            totals[1] += usage.ru_oublock * 512
+        return _IOCounters(*totals)
 
-    def _get_disk_stats(self) -> Tuple[psutil._common.sdiskio, psutil._common.sdiskusage]:
-        """Get current disk I/O and usage stats."""
+    def _read_io_counters(self) -> Any:
+        """Read the I/O counters for the configured scope."""
+        if self.scope == 'process':
+            return self._get_process_io_counters()
+        if self.scope == 'device':
+            return psutil.disk_io_counters(perdisk=True)
+        return psutil.disk_io_counters()
+
+    def _sample_io_counters(self) -> Tuple[int, ...]:
+        """Read the I/O counters as a plain tuple for the sampler thread."""
+        counters = self._read_io_counters()
+        return tuple(getattr(counters, field) for field in _IO_FIELDS)
+
+    def _get_io_counters(self) -> Any:
+        """Get the I/O counters for the configured scope, from the sampler when one is set."""
+        if self.sampler is not None:
+            values = self.sampler.value_at(self._sampler_source)
+            if values is not None:
+                return _IOCounters(*(int(round(value)) for value in values))
+        return self._read_io_counters()
+
+    def _get_disk_usage(self) -> Optional[psutil._common.sdiskusage]:
+        """Get disk usage at section entry, or None when it is not read there."""
+        if not self.disk_metrics.get('disk_usage') or self.usage_min_duration is not None:
+            return None
+        return _usage_cache.get(self.disk_path, self.usage_max_age)
+
+    def _get_exit_usage(
+        self,
+        before_usage: Optional[psutil._common.sdiskusage],
+        duration: float
+    ) -> Tuple[Optional[psutil._common.sdiskusage], Optional[psutil._common.sdiskusage]]:
+        """
+        Get the entry and exit disk usage for a section at its exit.
+
+        Args:
+            before_usage: The reading taken at entry, None when it was deferred.
+            duration: Section duration in seconds.
+
+        Returns:
+            The (before, after) readings, or (None, None) when disk_usage is not recorded for this section.
+        """
+        if not self.disk_metrics.get('disk_usage'):
+            return None, None
+        if self.usage_min_duration is None:
+            return before_usage, _usage_cache.get(self.disk_path, self.usage_max_age)
+        if duration < self.usage_min_duration:
+            return None, None
+        # Look up the cache before the exit reading refreshes it
+        cached = _usage_cache.peek(self.disk_path)
+        after_usage = _usage_cache.get(self.disk_path, self.usage_max_age)
+        if cached is not None and cached[0] >= time.monotonic() - duration - self.usage_max_age:
+            return cached[1], after_usage
+        return after_usage, after_usage
+
+    def _get_disk_stats(self) -> Tuple[Any, Optional[psutil._common.sdiskusage]]:
+        """Get current disk I/O and usage stats at section entry."""
         try:
-            io_stats = psutil.disk_io_counters()
-            usage_stats = psutil.disk_usage(self.disk_path)
+            io_stats = self._get_io_counters()
+            usage_stats = self._get_disk_usage()
             return io_stats, usage_stats
         except psutil.Error as e:
-            self.logger.error(f"Error retrieving disk stats: {e}")
+            if self.enable_logging:
+                self.logger.emit(logging.ERROR, "Error retrieving disk stats: %s", e)
             raise
 
+    def _get_exit_stats(
+        self,
+        before_usage: Optional[psutil._common.sdiskusage],
+        duration: float
+    ) -> Tuple[Any, Optional[psutil._common.sdiskusage], Optional[psutil._common.sdiskusage]]:
+        """Get disk I/O stats and the (before, after) usage readings at section exit."""
+        try:
+            io_stats = self._get_io_counters()
+            before_usage, after_usage = self._get_exit_usage(before_usage, duration)
+            return io_stats, before_usage, after_usage
+        except psutil.Error as e:
+            if self.enable_logging:
+                self.logger.emit(logging.ERROR, "Error retrieving disk stats: %s", e)
+            raise
+
+    def _io_diff(self, before_io: Any, after_io: Any) -> Tuple[Dict[str, int], Optional[Dict[str, Dict[str, int]]]]:
+        """Return the total I/O counter deltas and, in 'device' scope, the deltas per device."""
+        if self.scope != 'device':
+            return {field: getattr(after_io, field) - getattr(before_io, field) for field in _IO_FIELDS}, None
+        per_device = {}
+        for device, after in after_io.items():
+            before = before_io.get(device)
+            if before is None:
+                continue
+            per_device[device] = {field: getattr(after, field) - getattr(before, field) for field in _IO_FIELDS}
+        totals = {field: sum(deltas[field] for deltas in per_device.values()) for field in _IO_FIELDS}
+        return totals, per_device
+
     def _log_disk_diff(
         self,
         label: str,
-        before_io: psutil._common.sdiskio,
-        after_io: psutil._common.sdiskio,
-        before_usage: psutil._common.sdiskusage,
-        after_usage: psutil._common.sdiskusage
+        before_io: Any,
+        after_io: Any,
+        before_usage: Optional[psutil._common.sdiskusage],
+        after_usage: Optional[psutil._common.sdiskusage]
     ):
-        """Log and store the difference in disk I/O and usage stats."""
+        """Log and store the difference in disk I/O and usage stats (one log message per section)."""
         metrics = {}
-        if self.disk_metrics.get('read_bytes'):
-            metrics['read_bytes'] = after_io.read_bytes - before_io.read_bytes
-            self.logger.info(f"{label} - Bytes read: {metrics['read_bytes']}")
-        if self.disk_metrics.get('write_bytes'):
-            metrics['write_bytes'] = after_io.write_bytes - before_io.write_bytes
-            self.logger.info(f"{label} - Bytes written: {metrics['write_bytes']}")
-        if self.disk_metrics.get('read_count'):
-            metrics['read_count'] = after_io.read_count - before_io.read_count
-            self.logger.info(f"{label} - Read operations: {metrics['read_count']}")
-        if self.disk_metrics.get('write_count'):
-            metrics['write_count'] = after_io.write_count - before_io.write_count
-            self.logger.info(f"{label} - Write operations: {metrics['write_count']}")
-        if self.disk_metrics.get('disk_usage'):
+        io_diff, per_device = self._io_diff(before_io, after_io)
+        # Message parts and their arguments; formatted by the logger only if the message is written
+        parts, args = [], []
+        for field, description in _LOGGED_IO_FIELDS:
+            if self.disk_metrics.get(field):
+                metrics[field] = io_diff[field]
+                parts.append(f"{description}: %s")
+                args.append(metrics[field])
+        if per_device is not None:
+            metrics['per_device'] = {
+                device: {field: value for field, value in deltas.items() if self.disk_metrics.get(field)}
+                for device, deltas in per_device.items()
+            }
+        if self.disk_metrics.get('disk_usage') and before_usage is not None and after_usage is not None:
             metrics['disk_usage'] = {
                 'before': {
                     'total': before_usage.total / (1024 ** 3),
@@ -71,24 +273,24 @@ class DiskProfiler(BaseProfiler):
                     'free': after_usage.free / (1024 ** 3)
                 }
             }
-            self.logger.info(
-                f"{label} - Disk space before: Total={metrics['disk_usage']['before']['total']:.2f}GB, "
-                f"Used={metrics['disk_usage']['before']['used']:.2f}GB, Free={metrics['disk_usage']['before']['free']:.2f}GB"
-            )
-            self.logger.info(
-                f"{label} - Disk space after: Total={metrics['disk_usage']['after']['total']:.2f}GB, "
-                f"Used={metrics['disk_usage']['after']['used']:.2f}GB, Free={metrics['disk_usage']['after']['free']:.2f}GB"
-            )
-        self.stats.append({'label': label, 'metrics': metrics})
+            for when in ('before', 'after'):
+                usage = metrics['disk_usage'][when]
+                parts.append(f"Disk space {when}: Total=%.2fGB, Used=%.2fGB, Free=%.2fGB")
+                args.extend((usage['total'], usage['used'], usage['free']))
+        timestamp = self._record_stat(label, metrics)
+        self._log_event(label, metrics, timestamp, "%s - " + ", ".join(parts), label, *args)
 
     def profile_function(self, func: Callable) -> Callable:
         """Decorator to profile disk I/O and usage of a function."""
         def profile_logic(func, *args, **kwargs):
             before_io, before_usage = self._get_disk_stats()
+            start_time = time.perf_counter()
             try:
                 result = func(*args, **kwargs)
             finally:
-                after_io, after_usage = self._get_disk_stats()
+                after_io, before_usage, after_usage = self._get_exit_stats(
+                    before_usage, time.perf_counter() - start_time
+                )
                 self._log_disk_diff(f"Function '{func.__name__}'", before_io, after_io, before_usage, after_usage)
             return result
         return self._wrap_function(func, profile_logic)
@@ -97,18 +299,20 @@ class DiskProfiler(BaseProfiler):
     def profile_block(self, label: str = "Disk block"):
         """Context manager to profile disk I/O and usage for a block of code."""
         before_io, before_usage = self._get_disk_stats()
+        start_time = time.perf_counter()
         try:
             yield
         finally:
-            after_io, after_usage = self._get_disk_stats()
+            after_io, before_usage, after_usage = self._get_exit_stats(before_usage, time.perf_counter() - start_time)
             self._log_disk_diff(label, before_io, after_io, before_usage, after_usage)
 
     @contextmanager
     def profile_line(self, label: str = "Disk line(s)"):
         """Context manager to profile disk I/O and usage for a specific line or small block."""
         before_io, before_usage = self._get_disk_stats()
+        start_time = time.perf_counter()
         try:
             yield
         finally:
-            after_io, after_usage = self._get_disk_stats()
+            after_io, before_usage, after_usage = self._get_exit_stats(before_usage, time.perf_counter() - start_time)
             self._log_disk_diff(label, before_io, after_io, before_usage, after_usage)
@@ -0,0 +1,322 @@
+import asyncio
+import inspect
+import logging
+import os
+import functools
+import threading
+import time
+from asyncio import events
+from contextlib import contextmanager
+from types import FrameType
+from typing import Callable, Optional, Dict, List, Tuple, Any
+from .base_profiler import BaseProfiler, _timed_steps, _wrapped_code
+
+# Event loop collectors of the sections open in each thread, by thread ident
+_thread_collectors: Dict[int, Tuple['_LoopCollector', ...]] = {}
+
+# Frames skipped when locating a suspended task: the event loop's and the profilers' own code
+_LIBRARY_DIRS = (os.path.dirname(asyncio.__file__) + os.sep, os.path.dirname(__file__) + os.sep)
+
+# Fields reported per source location of slow callbacks
+SLOW_CALLBACK_FIELDS = ('count', 'total_time', 'max_time')
+
+
+def _suspended_frame(coro: Any) -> Optional[FrameType]:
+    """Innermost frame of a coroutine's await chain outside asyncio and smartprofiler, or None."""
+    frame = None
+    while coro is not None:
+        current = getattr(coro, 'cr_frame', None) or getattr(coro, 'gi_frame', None)
+        if current is not None:
+            if not current.f_code.co_filename.startswith(_LIBRARY_DIRS):
+                frame = current
+        if current is not None and current.f_code is _timed_steps.__code__:
+            coro = current.f_locals.get('iterator')  # step timing of a profiled coroutine
+        else:
+            coro = getattr(coro, 'cr_await', None) or getattr(coro, 'gi_yieldfrom', None)
+    return frame
+
+
+def _callback_location(callback: Any) -> Tuple[str, str]:
+    """
+    Return (name, 'file:line') of a loop callback.
+
+    For a task step this is the innermost user coroutine and the line it is suspended at after
+    the step, i.e. the `await` that ended the blocking step. Once the task has finished it is the
+    definition of its coroutine function, the profiled one for `profile_function` coroutines.
+    """
+    while isinstance(callback, functools.partial):
+        callback = callback.func
+    owner = getattr(callback, '__self__', None)
+    if isinstance(owner, asyncio.Task):
+        coro = owner.get_coro()
+        frame = _suspended_frame(coro)
+        if frame is not None:
+            return frame.f_code.co_name, f"{frame.f_code.co_filename}:{frame.f_lineno}"
+        callback = coro
+    else:
+        callback = inspect.unwrap(callback)  # profile_function wrappers of plain callbacks
+    code = (getattr(callback, '__code__', None) or getattr(callback, 'cr_code', None)
+            or getattr(getattr(callback, '__func__', None), '__code__', None))
+    name = getattr(callback, '__qualname__', None) or repr(callback)
+    if code is None:
+        return name, '<unknown>'
+    code = _wrapped_code(code)
+    return name, f"{code.co_filename}:{code.co_firstlineno}"
+
+
+class _HandlePatch:
+    """Refcounted patch of asyncio.Handle._run, installed while any EventLoopProfiler section is active.
+
+    Loops that do not run callbacks through asyncio.Handle (e.g. uvloop) are not instrumented.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._users = 0
+        self._original: Optional[Callable] = None
+
+    def _install(self):
+        original_run = self._original = events.Handle._run
+        perf_counter = time.perf_counter
+        get_ident = threading.get_ident
+
+        def timed_run(handle):
+            collectors = _thread_collectors.get(get_ident())
+            if not collectors:
+                return original_run(handle)
+            loop = handle._loop
+            for collector in collectors:
+                if collector.loop is not loop:
+                    collector.attach(loop)
+            start = perf_counter()
+            try:
+                return original_run(handle)
+            finally:
+                elapsed = perf_counter() - start
+                for collector in collectors:
+                    collector.add_callback(handle, elapsed)
+
+        events.Handle._run = timed_run
+
+    def acquire(self):
+        with self._lock:
+            self._users += 1
+            if self._users == 1:
+                self._install()
+
+    def release(self):
+        with self._lock:
+            if self._users == 0:
+                return
+            self._users -= 1
+            if self._users > 0:
+                return
+            events.Handle._run = self._original
+            self._original = None
+
+
+_patch = _HandlePatch()
+
+
+class _LoopCollector:
+    """Callback timings and heartbeat lag of one profiling section.
+
+    The heartbeat is a `call_later` chain on the loop running in the section's thread: each beat
+    records how late it ran compared to when it was scheduled.
+    """
+
+    def __init__(self, profiler: 'EventLoopProfiler'):
+        self.profiler = profiler
+        self.threshold = profiler.slow_callback_threshold
+        self.interval = profiler.heartbeat_interval
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.callbacks = 0
+        self.callback_time = 0.0
+        self.max_callback_time = 0.0
+        self.slow: Dict[str, List[Any]] = {}
+        self.heartbeats = 0
+        self.total_lag = 0.0
+        self.max_lag = 0.0
+        self._heartbeat: Optional[asyncio.TimerHandle] = None
+        self._beat = self._on_heartbeat  # bound once, so heartbeat handles can be recognized
+
+    def start(self):
+        _patch.acquire()
+        ident = threading.get_ident()
+        _thread_collectors[ident] = _thread_collectors.get(ident, ()) + (self,)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # attached when the first callback of a loop runs in this thread
+        self.attach(loop)
+
+    def stop(self):
+        ident = threading.get_ident()
+        collectors = tuple(collector for collector in _thread_collectors.get(ident, ()) if collector is not self)
+        if collectors:
+            _thread_collectors[ident] = collectors
+        else:
+            _thread_collectors.pop(ident, None)
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            self._heartbeat = None
+        _patch.release()
+
+    def attach(self, loop: asyncio.AbstractEventLoop):
+        """Start the heartbeat on `loop`, the loop now running in the section's thread."""
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+        self.loop = loop
+        self._heartbeat = loop.call_at(loop.time() + self.interval, self._beat)
+
+    def _on_heartbeat(self):
+        loop = self.loop
+        now = loop.time()
+        lag = max(0.0, now - self._heartbeat.when())
+        self.heartbeats += 1
+        self.total_lag += lag
+        if lag > self.max_lag:
+            self.max_lag = lag
+        self._heartbeat = loop.call_at(now + self.interval, self._beat)
+
+    def add_callback(self, handle: asyncio.Handle, elapsed: float):
+        if handle._callback is self._beat:
+            return
+        self.callbacks += 1
+        self.callback_time += elapsed
+        if elapsed > self.max_callback_time:
+            self.max_callback_time = elapsed
+        if elapsed < self.threshold:
+            return
+        name, location = _callback_location(handle._callback)
+        counts = self.slow.get(location)
+        if counts is None:
+            counts = self.slow[location] = [name, 0, 0.0, 0.0]
+        counts[1] += 1
+        counts[2] += elapsed
+        counts[3] = max(counts[3], elapsed)
+        self.profiler._log_slow_callback(name, location, elapsed)
+
+    def metrics(self) -> Dict[str, Any]:
+        slow_callbacks = {
+            location: {'callback': counts[0], **dict(zip(SLOW_CALLBACK_FIELDS, counts[1:]))}
+            for location, counts in self.slow.items()
+        }
+        return {
+            'callbacks': self.callbacks,
+            'callback_time': self.callback_time,
+            'max_callback_time': self.max_callback_time,
+            'slow_callback_count': sum(counts['count'] for counts in slow_callbacks.values()),
+            'heartbeats': self.heartbeats,
+            'mean_lag': self.total_lag / self.heartbeats if self.heartbeats else 0.0,
+            'max_lag': self.max_lag,
+            'slow_callbacks': slow_callbacks,
+        }
+
+
+class _SlowestCallbacks:
+    """Renders the '; slowest: ...' log suffix only when the log message is formatted."""
+
+    __slots__ = ('slow_callbacks', 'top_n')
+
+    def __init__(self, slow_callbacks: Dict[str, Dict[str, Any]], top_n: int):
+        self.slow_callbacks = slow_callbacks
+        self.top_n = top_n
+
+    def __str__(self) -> str:
+        slowest = sorted(self.slow_callbacks.items(), key=lambda item: item[1]['max_time'], reverse=True)[:self.top_n]
+        details = ', '.join(f"{counts['callback']} at {location} ({counts['max_time']:.4f}s)"
+                            for location, counts in slowest)
+        return f"; slowest: {details}" if details else ""
+
+
+class EventLoopProfiler(BaseProfiler):
+    """Profiler detecting asyncio event loop blocking.
+
+    While a section is open, every callback the event loop in the section's thread runs (task
+    steps, call_soon/call_later callbacks, I/O callbacks) is timed through a patch of
+    asyncio.Handle._run, and a heartbeat measures how late the loop gets around to scheduled
+    callbacks. Callbacks running longer than `slow_callback_threshold` are reported with their
+    source location. The loop is shared by all tasks, so sections see callbacks of every task,
+    not only of the code inside them. A section may be opened around `asyncio.run()` or inside a
+    coroutine.
+    """
+
+    def __init__(
+        self,
+        logger: Optional[logging.Logger] = None,
+        slow_callback_threshold: float = 0.1,
+        heartbeat_interval: float = 0.05,
+        top_n: int = 5,
+        **kwargs
+    ):
+        """
+        Initialize the EventLoopProfiler.
+
+        Args:
+            logger: Custom logger instance (default: None, uses default logger).
+            slow_callback_threshold: Seconds a single callback may run before it is reported as
+                  slow (default: 0.1, asyncio's own debug-mode threshold).
+            heartbeat_interval: Seconds between heartbeats measuring loop lag (default: 0.05).
+            top_n: Number of slowest callback locations included in each section's log line.
+            **kwargs: Additional arguments passed to BaseProfiler (e.g., log_level, enable_logging).
+        """
+        super().__init__(logger=logger, **kwargs)
+        if slow_callback_threshold <= 0:
+            raise ValueError(f"slow_callback_threshold must be positive, got {slow_callback_threshold}")
+        if heartbeat_interval <= 0:
+            raise ValueError(f"heartbeat_interval must be positive, got {heartbeat_interval}")
+        self.slow_callback_threshold = slow_callback_threshold
+        self.heartbeat_interval = heartbeat_interval
+        self.top_n = top_n
+
+    def _begin_section(self) -> _LoopCollector:
+        collector = _LoopCollector(self)
+        collector.start()
+        return collector
+
+    def _end_section(self, label: str, collector: _LoopCollector):
+        collector.stop()
+        metrics = collector.metrics()
+        timestamp = self._record_stat(label, metrics)
+        self._log_event(
+            label, metrics, timestamp,
+            "%s - Event loop: %d callbacks in %.4f seconds (max %.4f), %d slow, lag max %.4f mean %.4f seconds%s",
+            label, metrics['callbacks'], metrics['callback_time'], metrics['max_callback_time'],
+            metrics['slow_callback_count'], metrics['max_lag'], metrics['mean_lag'],
+            _SlowestCallbacks(metrics['slow_callbacks'], self.top_n)
+        )
+
+    def _log_slow_callback(self, name: str, location: str, elapsed: float):
+        if self.enable_logging:
+            self.logger.emit(logging.WARNING, "Slow event loop callback %s at %s took %.4f seconds",
+                             name, location, elapsed)
+
+    def profile_function(self, func: Callable) -> Callable:
+        """Decorator to profile the event loop while a function (typically a coroutine) runs."""
+        def profile_logic(func, *args, **kwargs):
+            collector = self._begin_section()
+            try:
+                result = func(*args, **kwargs)
+            finally:
+                self._end_section(f"Function '{func.__name__}'", collector)
+            return result
+        return self._wrap_function(func, profile_logic)
+
+    @contextmanager
+    def profile_block(self, label: str = "Event loop block"):
+        """Context manager to profile the event loop while a block of code runs."""
+        collector = self._begin_section()
+        try:
+            yield
+        finally:
+            self._end_section(label, collector)
+
+    @contextmanager
+    def profile_line(self, label: str = "Event loop line(s)"):
+        """Context manager to profile the event loop while a specific line or small block runs."""
+        collector = self._begin_section()
+        try:
+            yield
+        finally:
+            self._end_section(label, collector)
@@ -0,0 +1,117 @@
+import json
+import os
+from array import array
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+from .cpu_profiler import CPUProfiler, CALL_PATH_SEPARATOR
+from .function_profiler import FunctionProfiler
+from .sampling_profiler import SamplingProfiler
+
+SPEEDSCOPE_SCHEMA = 'https://www.speedscope.app/file-format-schema.json'
+
+
+def iter_weighted_stacks(profiler) -> Iterator[Tuple[Sequence[str], float]]:
+    """
+    Yield (frames, weight) pairs describing where a profiler's cost went.
+
+    Frames run from the outermost to the innermost entry. Weights are self time in seconds
+    for CPUProfiler (one stack per call path), sample counts for SamplingProfiler, and call
+    counts for FunctionProfiler (one two-frame stack per section and function, read lazily
+    from the stats store).
+
+    Args:
+        profiler: A CPUProfiler, SamplingProfiler or FunctionProfiler instance.
+    """
+    if isinstance(profiler, CPUProfiler):
+        for path, totals in profiler.get_call_paths().items():
+            yield path.split(CALL_PATH_SEPARATOR), totals['self_time']
+    elif isinstance(profiler, SamplingProfiler):
+        yield from profiler.iter_stacks()
+    elif isinstance(profiler, FunctionProfiler):
+        for stat in profiler.stats:
+            for function, count in stat['metrics'].get('calls_by_function', {}).items():
+                yield (stat['label'], function), count
+    else:
+        raise TypeError(
+            f"Cannot export stacks from {type(profiler).__name__}; "
+            f"supported: CPUProfiler, SamplingProfiler, FunctionProfiler"
+        )
+
+
+def _weight_unit(profiler) -> str:
+    return 'seconds' if isinstance(profiler, CPUProfiler) else 'none'
+
+
+def _as_list(profilers) -> List:
+    return list(profilers) if isinstance(profilers, (list, tuple)) else [profilers]
+
+
+def export_folded(profilers, output_path: str) -> str:
+    """
+    Write Brendan Gregg folded-stack text ("outer;inner;leaf weight" per line).
+
+    Stacks are written as they are produced, without building the whole profile in memory.
+    CPUProfiler self time is written in integer microseconds, other profilers write counts.
+
+    Args:
+        profilers: A profiler instance or a list of them.
+        output_path: File to write.
+
+    Returns:
+        The path of the written file.
+    """
+    with open(output_path, 'w', encoding='utf-8') as f:
+        for profiler in _as_list(profilers):
+            scale = 1_000_000 if isinstance(profiler, CPUProfiler) else 1
+            for frames, weight in iter_weighted_stacks(profiler):
+                value = int(round(weight * scale))
+                if value <= 0:
+                    continue
+                stack = ';'.join(frame.replace(';', ',') for frame in frames)
+                f.write(f"{stack} {value}\n")
+    return os.path.abspath(output_path)
+
+
+def export_speedscope(profilers, output_path: str, name: str = 'smartprofiler') -> str:
+    """
+    Write a speedscope (https://www.speedscope.app) JSON file with one sampled profile per profiler.
+
+    Samples are streamed to disk as they are produced; only the frame table (one entry per
+    distinct function) and a compact array of weights are held in memory.
+
+    Args:
+        profilers: A profiler instance or a list of them.
+        output_path: File to write.
+        name: Name shown by the viewer.
+
+    Returns:
+        The path of the written file.
+    """
+    frame_index: Dict[str, int] = {}
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write(f'{{"$schema": {json.dumps(SPEEDSCOPE_SCHEMA)}, "name": {json.dumps(name)}, '
+                f'"exporter": "smartprofiler", "activeProfileIndex": 0, "profiles": [')
+        for profile_number, profiler in enumerate(_as_list(profilers)):
+            if profile_number:
+                f.write(', ')
+            f.write(f'{{"type": "sampled", "name": {json.dumps(type(profiler).__name__)}, '
+                    f'"unit": "{_weight_unit(profiler)}", "startValue": 0, "samples": [')
+            weights = array('d')
+            for frames, weight in iter_weighted_stacks(profiler):
+                if weight <= 0:
+                    continue
+                indices = []
+                for frame in frames:
+                    index = frame_index.get(frame)
+                    if index is None:
+                        index = frame_index[frame] = len(frame_index)
+                    indices.append(index)
+                f.write((', ' if weights else '') + json.dumps(indices))
+                weights.append(weight)
+            f.write('], "weights": [')
+            f.write(', '.join(repr(weight) for weight in weights))
+            f.write(f'], "endValue": {sum(weights)!r}}}')
+        f.write('], "shared": {"frames": [')
+        f.write(', '.join(json.dumps({'name': frame}) for frame in frame_index))
+        f.write(']}}')
+    return os.path.abspath(output_path)
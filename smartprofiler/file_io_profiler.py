@@ -0,0 +1,345 @@
+import io
+import os
+import time
+import builtins
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from fnmatch import fnmatchcase
+from typing import Callable, Optional, Dict, List, Sequence, Tuple, Any
+from .base_profiler import BaseProfiler
+
+# Collectors of the profiling sections active in the current thread or asyncio task
+_active_collectors: ContextVar[Tuple['_FileIOCollector', ...]] = ContextVar('smartprofiler_file_io_collectors', default=())
+
+# Paths of file descriptors opened through the patched open()/os.open(), for os.read/os.write
+_fd_paths: Dict[int, str] = {}
+
+FILE_FIELDS = ('bytes_read', 'bytes_written', 'read_ops', 'write_ops', 'io_time')
+
+
+def _account(path: str, nbytes: int, writing: bool, elapsed: float):
+    for collector in _active_collectors.get():
+        collector.add(path, nbytes, writing, elapsed)
+
+
+def _path_of_fd(fd: int) -> str:
+    return _fd_paths.get(fd) or f"fd:{fd}"
+
+
+def _timed(path: str, writing: bool, operation: Callable, size: Callable[[Any], int], *args, **kwargs) -> Any:
+    """Run a file operation and, if a section is active in this context, account for it."""
+    if not _active_collectors.get():
+        return operation(*args, **kwargs)
+    start = time.perf_counter()
+    result = operation(*args, **kwargs)
+    _account(path, size(result), writing, time.perf_counter() - start)
+    return result
+
+
+def _length(result: Any) -> int:
+    return len(result) if result is not None else 0
+
+
+def _count(result: Any) -> int:
+    return result or 0
+
+
+def _total_length(lines: Any) -> int:
+    return sum(len(line) for line in lines)
+
+
+class _TrackedFile:
+    """Proxy returned by the patched open(); accounts reads and writes to the file's path.
+
+    Text-mode files are accounted in characters rather than encoded bytes. Attributes that are
+    not I/O calls are forwarded to the wrapped file object. Only files opened in a thread or task
+    with an open section are wrapped; the proxy is not an io.IOBase, so isinstance checks against
+    io classes fail for those files, while every other open() returns the plain file object.
+    """
+
+    __slots__ = ('_file', '_path', '_fd')
+
+    def __init__(self, file: Any, path: str, fd: Optional[int] = None):
+        self._file = file
+        self._path = path
+        # Descriptor registered in _fd_paths for this file, forgotten when it is closed
+        self._fd = fd
+
+    def _forget_fd(self):
+        if self._fd is not None:
+            if _fd_paths.get(self._fd) == self._path:
+                _fd_paths.pop(self._fd, None)
+            self._fd = None
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._file, name)
+
+    def __enter__(self):
+        self._file.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._forget_fd()
+        return self._file.__exit__(*exc_info)
+
+    def close(self):
+        self._forget_fd()
+        return self._file.close()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return _timed(self._path, False, self._file.__next__, _length)
+
+    def __repr__(self):
+        return repr(self._file)
+
+    def read(self, *args, **kwargs):
+        return _timed(self._path, False, self._file.read, _length, *args, **kwargs)
+
+    def read1(self, *args, **kwargs):
+        return _timed(self._path, False, self._file.read1, _length, *args, **kwargs)
+
+    def readline(self, *args, **kwargs):
+        return _timed(self._path, False, self._file.readline, _length, *args, **kwargs)
+
+    def readlines(self, *args, **kwargs):
+        return _timed(self._path, False, self._file.readlines, _total_length, *args, **kwargs)
+
+    def readinto(self, buffer):
+        return _timed(self._path, False, self._file.readinto, _count, buffer)
+
+    def readinto1(self, buffer):
+        return _timed(self._path, False, self._file.readinto1, _count, buffer)
+
+    def write(self, data):
+        return _timed(self._path, True, self._file.write, _count, data)
+
+    def writelines(self, lines):
+        lines = list(lines)
+        _timed(self._path, True, self._file.writelines, lambda result: _total_length(lines), lines)
+
+
+class _FileIOPatch:
+    """Refcounted patch of builtins.open/io.open and os.open/os.close/os.read/os.write.
+
+    Installed while any FileIOProfiler section is active. Code that bound these functions before
+    the patch (e.g. `from os import read`) keeps the originals and is not accounted.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._users = 0
+        self._saved: List[Tuple[Any, str, Any]] = []
+
+    def _install(self):
+        original_open = builtins.open
+        original_os_open, original_os_close = os.open, os.close
+        original_os_read, original_os_write = os.read, os.write
+
+        def tracked_open(file, *args, **kwargs):
+            handle = original_open(file, *args, **kwargs)
+            if not _active_collectors.get():
+                return handle  # no section in this thread or task: a plain file object
+            if isinstance(file, int):
+                return _TrackedFile(handle, _path_of_fd(file))
+            path = os.fsdecode(os.fspath(file))
+            try:
+                fd = handle.fileno()
+            except (AttributeError, OSError, ValueError):
+                return _TrackedFile(handle, path)
+            _fd_paths[fd] = path
+            return _TrackedFile(handle, path, fd)
+
+        def tracked_os_open(path, *args, **kwargs):
+            fd = original_os_open(path, *args, **kwargs)
+            _fd_paths[fd] = os.fsdecode(os.fspath(path))
+            return fd
+
+        def tracked_os_close(fd):
+            _fd_paths.pop(fd, None)
+            return original_os_close(fd)
+
+        def tracked_os_read(fd, n):
+            if not _active_collectors.get():
+                return original_os_read(fd, n)
+            return _timed(_path_of_fd(fd), False, original_os_read, _length, fd, n)
+
+        def tracked_os_write(fd, data):
+            if not _active_collectors.get():
+                return original_os_write(fd, data)
+            return _timed(_path_of_fd(fd), True, original_os_write, _count, fd, data)
+
+        replacements = [
+            (builtins, 'open', tracked_open),
+            (io, 'open', tracked_open),
+            (os, 'open', tracked_os_open),
+            (os, 'close', tracked_os_close),
+            (os, 'read', tracked_os_read),
+            (os, 'write', tracked_os_write),
+        ]
+        self._saved = [(module, name, getattr(module, name)) for module, name, _ in replacements]
+        for module, name, replacement in replacements:
+            setattr(module, name, replacement)
+
+    def acquire(self):
+        with self._lock:
+            self._users += 1
+            if self._users == 1:
+                self._install()
+
+    def release(self):
+        with self._lock:
+            if self._users == 0:
+                return
+            self._users -= 1
+            if self._users > 0:
+                return
+            for module, name, original in self._saved:
+                setattr(module, name, original)
+            self._saved = []
+            # Descriptors closed while unpatched are not seen, so their paths cannot be trusted later
+            _fd_paths.clear()
+
+
+_patch = _FileIOPatch()
+
+
+class _FileIOCollector:
+    """File I/O of one profiling section, counted per path or per matching glob."""
+
+    def __init__(self, path_patterns: Optional[Sequence[str]] = None):
+        self.path_patterns = path_patterns
+        self.files: Dict[str, List[float]] = {}
+        self._keys: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, path: str) -> str:
+        key = self._keys.get(path)
+        if key is None:
+            key = next((pattern for pattern in self.path_patterns or () if fnmatchcase(path, pattern)), path)
+            self._keys[path] = key
+        return key
+
+    def start(self):
+        _patch.acquire()
+        _active_collectors.set(_active_collectors.get() + (self,))
+
+    def stop(self):
+        _active_collectors.set(tuple(collector for collector in _active_collectors.get() if collector is not self))
+        _patch.release()
+
+    def add(self, path: str, nbytes: int, writing: bool, elapsed: float):
+        offset = 1 if writing else 0
+        with self._lock:
+            key = self._key(path)
+            counts = self.files.get(key)
+            if counts is None:
+                counts = self.files[key] = [0, 0, 0, 0, 0.0]
+            counts[offset] += nbytes
+            counts[offset + 2] += 1
+            counts[4] += elapsed
+
+    def to_dict(self) -> Dict[str, Dict[str, float]]:
+        """Return {path or glob: {'bytes_read', 'bytes_written', 'read_ops', 'write_ops', 'io_time'}}."""
+        with self._lock:
+            return {key: dict(zip(FILE_FIELDS, counts)) for key, counts in self.files.items()}
+
+
+class _SlowestFiles:
+    """Renders the '; slowest: ...' log suffix only when the log message is formatted."""
+
+    __slots__ = ('files', 'top_n')
+
+    def __init__(self, files: Dict[str, Dict[str, float]], top_n: int):
+        self.files = files
+        self.top_n = top_n
+
+    def __str__(self) -> str:
+        slowest = sorted(self.files.items(), key=lambda item: item[1]['io_time'], reverse=True)[:self.top_n]
+        details = ', '.join(f"{path} ({counts['io_time']:.4f}s)" for path, counts in slowest)
+        return f"; slowest: {details}" if details else ""
+
+
+class FileIOProfiler(BaseProfiler):
+    """Profiler attributing file I/O to the files read and written inside each section.
+
+    Unlike DiskProfiler's kernel counters this also sees reads served from the page cache, and
+    reports bytes, operations and time spent per path. open() and os.read/os.write are patched
+    only while a section is open, so only files opened during a section are tracked, and only the
+    thread or asyncio task that opened the section is accounted. Memory-mapped I/O (mmap) is not
+    accounted: its reads and writes are page faults that no Python call sees.
+    """
+
+    def __init__(
+        self,
+        logger: Optional[logging.Logger] = None,
+        path_patterns: Optional[Sequence[str]] = None,
+        top_n: int = 10,
+        **kwargs
+    ):
+        """
+        Initialize the FileIOProfiler.
+
+        Args:
+            logger: Custom logger instance (default: None, uses default logger).
+            path_patterns: Glob patterns (e.g. ['/data/*.parquet']); files matching one are reported
+                  under the first matching pattern instead of their own path.
+            top_n: Number of files (by I/O time) included in each section's log line.
+            **kwargs: Additional arguments passed to BaseProfiler (e.g., log_level, enable_logging).
+        """
+        super().__init__(logger=logger, **kwargs)
+        self.path_patterns = list(path_patterns) if path_patterns else None
+        self.top_n = top_n
+
+    def _begin_section(self) -> _FileIOCollector:
+        collector = _FileIOCollector(self.path_patterns)
+        collector.start()
+        return collector
+
+    def _end_section(self, label: str, collector: _FileIOCollector):
+        collector.stop()
+        files = collector.to_dict()
+        metrics: Dict[str, Any] = {
+            field: sum(counts[field] for counts in files.values()) for field in FILE_FIELDS
+        }
+        metrics['files'] = files
+        timestamp = self._record_stat(label, metrics)
+        self._log_event(
+            label, metrics, timestamp,
+            "%s - File I/O: read %d bytes in %d ops, wrote %d bytes in %d ops, %.4f seconds%s",
+            label, metrics['bytes_read'], metrics['read_ops'], metrics['bytes_written'], metrics['write_ops'],
+            metrics['io_time'], _SlowestFiles(files, self.top_n)
+        )
+
+    def profile_function(self, func: Callable) -> Callable:
+        """Decorator to profile the file I/O of a function."""
+        def profile_logic(func, *args, **kwargs):
+            collector = self._begin_section()
+            try:
+                result = func(*args, **kwargs)
+            finally:
+                self._end_section(f"Function '{func.__name__}'", collector)
+            return result
+        return self._wrap_function(func, profile_logic)
+
+    @contextmanager
+    def profile_block(self, label: str = "File I/O block"):
+        """Context manager to profile the file I/O of a block of code."""
+        collector = self._begin_section()
+        try:
+            yield
+        finally:
+            self._end_section(label, collector)
+
+    @contextmanager
+    def profile_line(self, label: str = "File I/O line(s)"):
+        """Context manager to profile the file I/O of a specific line or small block."""
+        collector = self._begin_section()
+        try:
+            yield
+        finally:
+            self._end_section(label, collector)
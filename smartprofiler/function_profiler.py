@@ -1,59 +1,351 @@
+import os
+import dis
 import sys
+import inspect
 import logging
+import threading
+from abc import ABC, abstractmethod
 from contextlib import contextmanager
-from typing import Callable, Optional
-from .base_profiler import BaseProfiler, _thread_local
+from contextvars import ContextVar
+from types import CodeType
+from typing import Callable, Optional, Dict, FrozenSet, Tuple, Any
+from .base_profiler import BaseProfiler, _call_count_sections, _thread_local
+
+# Directory of the smartprofiler package: its code runs inside sections (nested sections, span
+# lookups, aggregates, the stats store, the step timing of profiled coroutines) and is never counted
+_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__)) + os.sep
+
+# smartprofiler context managers whose every use also runs the @contextmanager machinery below
+_SECTION_FUNCTIONS = frozenset(('profile_block', 'profile_line', '_function_section', 'span'))
+
+# Marker for a nested acquire that left the thread's profile function untouched
+_UNCHANGED = object()
+
+
+def _context_manager_codes() -> Tuple[FrozenSet[CodeType], CodeType]:
+    """Code run by every @contextmanager use (the factory, __init__, __enter__, __exit__), and __exit__'s."""
+    @contextmanager
+    def probe():
+        yield
+
+    manager_type = type(probe())
+    codes = (probe.__code__, manager_type.__init__.__code__, manager_type.__enter__.__code__,
+             manager_type.__exit__.__code__)
+    return frozenset(codes), manager_type.__exit__.__code__
+
+
+# A nested section runs each of these once; a section's own `__exit__` runs while it still counts
+_CONTEXT_MANAGER_CODES, _CONTEXT_MANAGER_EXIT = _context_manager_codes()
+
+# Code flags of functions whose frames are suspended and resumed; sys.setprofile reports every
+# resumption as a 'call' event
+_SUSPENDABLE_FLAGS = inspect.CO_GENERATOR | inspect.CO_COROUTINE | inspect.CO_ASYNC_GENERATOR
+
+# Opcode a frame starts (oparg 0) or resumes at on Python 3.11+; None on older interpreters
+_RESUME = dis.opmap.get('RESUME')
+
+# Per suspendable code object: the f_lasti of a frame that has not run yet
+_start_offsets: Dict[CodeType, int] = {}
+
+# Call counts of the sections open in the current thread or asyncio task (see smartprofiler.context)
+_active_sections = _call_count_sections
+
+
+def _is_resumption(frame) -> bool:
+    """Whether a 'call' event of a generator or coroutine frame resumes it rather than starting it."""
+    code = frame.f_code
+    start = _start_offsets.get(code)
+    if start is None:
+        start = -1
+        if _RESUME is not None:
+            start = next(instruction.offset for instruction in dis.get_instructions(code)
+                         if instruction.opcode == _RESUME and not instruction.arg & 3)
+        _start_offsets[code] = start
+    return frame.f_lasti != start
+
+
+class _CallCounter(ABC):
+    """Hooks Python function starts while at least one section is active.
+
+    The hook counts each call into the sections open in the calling thread's or task's context,
+    so concurrent sections in other threads, tasks or requests never see each other's calls.
+    """
+
+    name = ''
+
+    def __init__(self):
+        self._active = 0
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def acquire(self):
+        """Start counting (refcounted)."""
+        pass
+
+    @abstractmethod
+    def release(self):
+        """Stop counting once the last active section has released the counter."""
+        pass
+
+
+class _MonitoringCallCounter(_CallCounter):
+    """PEP 669 backend (Python 3.12+): a PY_START callback under its own sys.monitoring tool ID.
+
+    Counts calls on every thread and leaves sys.settrace/sys.setprofile users untouched.
+    """
+
+    name = 'monitoring'
+    _TOOL_NAME = 'smartprofiler'
+
+    def __init__(self):
+        super().__init__()
+        self._tool_id: Optional[int] = None
+
+    def _claim_tool_id(self) -> int:
+        monitoring = sys.monitoring
+        for tool_id in (monitoring.PROFILER_ID, 3, 4):
+            if monitoring.get_tool(tool_id) is None:
+                monitoring.use_tool_id(tool_id, self._TOOL_NAME)
+                return tool_id
+        raise RuntimeError("No free sys.monitoring tool ID available for FunctionProfiler")
+
+    def acquire(self):
+        with self._lock:
+            self._active += 1
+            if self._active > 1:
+                return
+            monitoring = sys.monitoring
+            active_sections = _active_sections.get
+
+            def on_start(code, instruction_offset):
+                for counts in active_sections():
+                    counts[code] = counts.get(code, 0) + 1
+
+            self._tool_id = self._claim_tool_id()
+            monitoring.register_callback(self._tool_id, monitoring.events.PY_START, on_start)
+            monitoring.set_events(self._tool_id, monitoring.events.PY_START)
+
+    def release(self):
+        with self._lock:
+            self._active -= 1
+            if self._active > 0 or self._tool_id is None:
+                return
+            monitoring = sys.monitoring
+            monitoring.set_events(self._tool_id, 0)
+            monitoring.register_callback(self._tool_id, monitoring.events.PY_START, None)
+            monitoring.free_tool_id(self._tool_id)
+            self._tool_id = None
+
+
+class _SetprofileCallCounter(_CallCounter):
+    """sys.setprofile backend for interpreters without sys.monitoring.
+
+    Unlike sys.settrace it receives no line events. Resumptions of generators and coroutines are
+    reported as 'call' events too and are skipped, so each is counted once, as with sys.monitoring's
+    PY_START. An already installed profile function is
+    chained rather than replaced, and threads started while counting are profiled as well.
+    sys.setprofile is per thread, so calls in pool threads that already existed when counting
+    started are not seen, even when the section's context is propagated to them.
+    """
+
+    name = 'setprofile'
+
+    def __init__(self):
+        super().__init__()
+        self._previous_thread_hook: Optional[Callable] = None
+
+    def _make_profile_function(self, previous: Optional[Callable] = None) -> Callable:
+        active_sections = _active_sections.get
+        if previous is None:
+            def profile(frame, event, arg):
+                if event == 'call':
+                    code = frame.f_code
+                    if not (code.co_flags & _SUSPENDABLE_FLAGS and _is_resumption(frame)):
+                        for counts in active_sections():
+                            counts[code] = counts.get(code, 0) + 1
+        else:
+            def profile(frame, event, arg):
+                if event == 'call':
+                    code = frame.f_code
+                    if not (code.co_flags & _SUSPENDABLE_FLAGS and _is_resumption(frame)):
+                        for counts in active_sections():
+                            counts[code] = counts.get(code, 0) + 1
+                previous(frame, event, arg)
+        profile._smartprofiler_counter = self
+        return profile
+
+    def _thread_bootstrap(self, frame, event, arg):
+        """Profile function for threads started while counting; uninstalls itself when idle."""
+        previous = self._previous_thread_hook
+        if not self._active:
+            sys.setprofile(previous)
+            return
+        active_sections = _active_sections.get
+        counter = self
+
+        def profile(frame, event, arg):
+            if not counter._active:
+                # The last section was released: hand the thread back to its previous hook
+                sys.setprofile(previous)
+            elif event == 'call':
+                code = frame.f_code
+                if not (code.co_flags & _SUSPENDABLE_FLAGS and _is_resumption(frame)):
+                    for counts in active_sections():
+                        counts[code] = counts.get(code, 0) + 1
+            if previous is not None:
+                previous(frame, event, arg)
+        profile._smartprofiler_counter = self
+        sys.setprofile(profile)
+        profile(frame, event, arg)
+
+    def acquire(self):
+        stacks = getattr(_thread_local, 'setprofile_stacks', None)
+        if stacks is None:
+            stacks = _thread_local.setprofile_stacks = []
+        previous = sys.getprofile()
+        if getattr(previous, '_smartprofiler_counter', None) is self:
+            stacks.append(_UNCHANGED)
+        else:
+            stacks.append(previous)
+            sys.setprofile(self._make_profile_function(previous))
+        with self._lock:
+            self._active += 1
+            if self._active == 1:
+                self._previous_thread_hook = threading.getprofile() if hasattr(threading, 'getprofile') else None
+                threading.setprofile(self._thread_bootstrap)
+
+    def release(self):
+        previous = _thread_local.setprofile_stacks.pop()
+        if previous is not _UNCHANGED:
+            sys.setprofile(previous)
+        with self._lock:
+            self._active -= 1
+            if self._active == 0:
+                threading.setprofile(self._previous_thread_hook)
+
+
+_COUNTER_BACKENDS = {
+    'monitoring': _MonitoringCallCounter,
+    'setprofile': _SetprofileCallCounter,
+}
+_counters: Dict[str, _CallCounter] = {}
+_counters_lock = threading.Lock()
+
+
+def _get_call_counter(backend: str) -> _CallCounter:
+    """Return the process-wide counter for a backend, resolving 'auto'."""
+    if backend == 'auto':
+        backend = 'monitoring' if hasattr(sys, 'monitoring') else 'setprofile'
+    if backend not in _COUNTER_BACKENDS:
+        raise ValueError(f"Unknown backend: '{backend}'. Supported: ['auto'] + {list(_COUNTER_BACKENDS)}")
+    if backend == 'monitoring' and not hasattr(sys, 'monitoring'):
+        raise ValueError("The 'monitoring' backend requires Python 3.12 or newer (sys.monitoring)")
+    with _counters_lock:
+        counter = _counters.get(backend)
+        if counter is None:
+            counter = _counters[backend] = _COUNTER_BACKENDS[backend]()
+        return counter
+
+
+def _function_key(code: CodeType) -> str:
+    qualname = getattr(code, 'co_qualname', code.co_name)
+    return f"{qualname} ({code.co_filename}:{code.co_firstlineno})"
+
 
 class FunctionProfiler(BaseProfiler):
-    """Profiler for counting function calls."""
+    """Profiler for counting function calls, broken down per function.
 
-    def __init__(self, logger: Optional[logging.Logger] = None,  **kwargs):
+    Only calls made in the section's own thread or asyncio task are counted, plus calls in
+    threads the section's context is propagated to (see smartprofiler.context.ContextExecutor).
+    smartprofiler's own work inside a section is not counted: code in the package, the
+    @contextmanager calls of nested sections and the logging of their events.
+    """
+
+    def __init__(self, logger: Optional[logging.Logger] = None, backend: str = 'auto', **kwargs):
+        """
+        Initialize the FunctionProfiler.
+
+        Args:
+            logger: Custom logger instance (default: None, uses default logger).
+            backend: Call counting backend: 'monitoring' (PEP 669, Python 3.12+), 'setprofile',
+                  or 'auto' to pick 'monitoring' when available.
+            **kwargs: Additional arguments passed to BaseProfiler (e.g., log_level, enable_logging).
+        """
         super().__init__(logger, **kwargs)
+        self._counter = _get_call_counter(backend)
+        self.backend = self._counter.name
         self.call_count = 0
 
-    def _trace_function(self, frame, event, arg):
-        """Trace function to count function calls."""
-        if event == 'call':
-            self.call_count += 1
-        return self._trace_function
+    def _start_counting(self) -> Dict[CodeType, int]:
+        """Activate the shared counter and return the section's counts, filled in by the hook."""
+        self._counter.acquire()
+        counts: Dict[CodeType, int] = {}
+        _active_sections.set(_active_sections.get() + (counts,))
+        return counts
+
+    def _stop_counting(self, counts: Dict[CodeType, int], own_exit: bool = False) -> Dict[str, Any]:
+        """
+        Deactivate the shared counter and return the section's metrics.
+
+        Args:
+            counts: Counts returned by `_start_counting` for this section.
+            own_exit: True when called from a context manager, whose own `__exit__` call was counted.
+        """
+        _active_sections.set(tuple(section for section in _active_sections.get() if section is not counts))
+        self._counter.release()
+        counts = dict(counts)  # the hook may still be adding to it from a propagated context
+        nested_sections = sum(
+            count for code, count in counts.items()
+            if code.co_name in _SECTION_FUNCTIONS and code.co_flags & inspect.CO_GENERATOR
+            and code.co_filename.startswith(_PACKAGE_DIR)
+        )
+        calls_by_function: Dict[str, int] = {}
+        total = 0
+        for code, count in counts.items():
+            if code.co_filename.startswith(_PACKAGE_DIR):
+                continue
+            if code in _CONTEXT_MANAGER_CODES:
+                count -= nested_sections + (own_exit and code is _CONTEXT_MANAGER_EXIT)
+            if count <= 0:
+                continue
+            key = _function_key(code)
+            calls_by_function[key] = calls_by_function.get(key, 0) + count
+            total += count
+        self.call_count = total
+        return {'call_count': total, 'calls_by_function': calls_by_function}
 
     def profile_function(self, func: Callable) -> Callable:
         """Decorator to profile function call counts."""
         def profile_logic(func, *args, **kwargs):
-            self.call_count = 0
-            sys.settrace(self._trace_function)
+            counts = self._start_counting()
             try:
                 result = func(*args, **kwargs)
             finally:
-                sys.settrace(None)
-                metrics = {'call_count': self.call_count}
-                self.stats.append({'label': f"Function '{func.__name__}'", 'metrics': metrics})
-                self.logger.info(f"Function '{func.__name__}' made {self.call_count} function calls")
+                metrics = self._stop_counting(counts)
+                label = f"Function '{func.__name__}'"
+                timestamp = self._record_stat(label, metrics)
+                self._log_event(label, metrics, timestamp, "%s made %d function calls", label, metrics['call_count'])
             return result
         return self._wrap_function(func, profile_logic)
 
     @contextmanager
     def profile_block(self, label: str = "Function call block"):
         """Context manager to profile function calls in a block of code."""
-        self.call_count = 0
-        sys.settrace(self._trace_function)
+        counts = self._start_counting()
         try:
             yield
         finally:
-            sys.settrace(None)
-            metrics = {'call_count': self.call_count}
-            self.stats.append({'label': label, 'metrics': metrics})
-            self.logger.info(f"{label} made {self.call_count} function calls")
+            metrics = self._stop_counting(counts, own_exit=True)
+            timestamp = self._record_stat(label, metrics)
+            self._log_event(label, metrics, timestamp, "%s made %d function calls", label, metrics['call_count'])
 
     @contextmanager
     def profile_line(self, label: str = "Function call line(s)"):
         """Context manager to profile function calls for a specific line or small block."""
-        self.call_count = 0
-        sys.settrace(self._trace_function)
+        counts = self._start_counting()
         try:
             yield
         finally:
-            sys.settrace(None)
-            metrics = {'call_count': self.call_count}
-            self.stats.append({'label': label, 'metrics': metrics})
-            self.logger.info(f"{label} made {self.call_count} function calls")
+            metrics = self._stop_counting(counts, own_exit=True)
+            timestamp = self._record_stat(label, metrics)
+            self._log_event(label, metrics, timestamp, "%s made %d function calls", label, metrics['call_count'])
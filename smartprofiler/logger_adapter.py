@@ -1,7 +1,78 @@
-from typing import Any, Optional, Union
+from typing import Any, Dict, IO, Optional, Union, Tuple, List
+import json
+import time
+import queue
+import atexit
 import logging
+import weakref
+import threading
 from abc import ABC, abstractmethod
 
+# Queued message: (level, format or message, args, logger kwargs or None for emit-style formatting, event record)
+_QueuedMessage = Tuple[int, str, tuple, Optional[dict], Optional[Dict[str, Any]]]
+
+# Attribute of stdlib LogRecords carrying the structured event (see LoggerAdapter.log_record)
+RECORD_ATTRIBUTE = 'smartprofiler'
+
+# Async adapters with a running writer, flushed at interpreter exit
+_async_adapters: 'weakref.WeakSet[LoggerAdapter]' = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_async_adapters() -> None:
+    for adapter in list(_async_adapters):
+        adapter.close()
+
+
+def _write_record(logger: Any, style: str, level: int, record: Dict[str, Any], fmt: str, args: tuple) -> None:
+    """Hand a structured event record to `logger` in its record style (see LoggerAdapter.log_record)."""
+    if style == 'write_record':
+        logger.write_record(level, record)
+    elif style == 'extra':
+        logger.log(level, fmt, *args, extra={RECORD_ATTRIBUTE: record})
+    elif style == 'bind':
+        logger.bind(**record).log(level, fmt % args if args else fmt)
+    else:
+        logger.log(level, fmt % args if args else fmt)
+
+
+def _write_message(logger: Any, style: str, message: _QueuedMessage) -> None:
+    level, msg, args, kwargs, record = message
+    try:
+        if record is not None:
+            _write_record(logger, style, level, record, msg, args)
+        elif kwargs is None:
+            logger.log(level, msg % args if args else msg)
+        else:
+            logger.log(level, msg, *args, **kwargs)
+    except Exception:
+        pass  # a failing sink must not kill the writer; the message is lost like a dropped one
+
+
+def _run_writer(messages: 'queue.Queue[Optional[_QueuedMessage]]', logger: Any, style: str, batch_size: int,
+                flush_interval: float) -> None:
+    """Body of an async adapter's writer thread; returns after writing everything queued before None."""
+    while True:
+        try:
+            batch: List[Any] = [messages.get(timeout=flush_interval)]
+        except queue.Empty:
+            continue
+        while len(batch) < batch_size:
+            try:
+                batch.append(messages.get_nowait())
+            except queue.Empty:
+                break
+        stop = False
+        for message in batch:
+            if message is None:
+                stop = True
+            else:
+                _write_message(logger, style, message)
+            messages.task_done()
+        if stop:
+            return
+
+
 class LoggerInterface(ABC):
     """Abstract base class defining the required logging interface."""
     
@@ -31,18 +102,49 @@ class LoggerInterface(ABC):
         pass
 
 class LoggerAdapter(LoggerInterface):
-    """Adapter for different logging libraries to provide a consistent interface."""
+    """Adapter for different logging libraries to provide a consistent interface.
+
+    In async mode, messages are put on a bounded queue as (level, format, args) records and a
+    background writer thread formats them and passes them to the wrapped logger in batches, so
+    slow handlers or sinks never run on the profiled thread. Records are written in order, but
+    timestamps added by the wrapped logger are those of the write, not of the profiled event.
+    When the queue is full new records are dropped and counted in `dropped`.
+    """
     
-    def __init__(self, logger: Any):
+    def __init__(
+        self,
+        logger: Any,
+        async_mode: bool = False,
+        max_queue_size: int = 10000,
+        batch_size: int = 256,
+        flush_interval: float = 0.1
+    ):
         """
         Initialize the adapter with a logger object.
         
         Args:
             logger: Any logger object that implements at least some of the standard logging methods.
                    Can be logging.Logger, loguru.Logger, structlog.BoundLogger, or any custom logger.
+            async_mode: If True, write messages from a background thread (see class docstring).
+            max_queue_size: Records buffered in async mode before new ones are dropped.
+            batch_size: Records the writer formats and writes per wake-up.
+            flush_interval: Seconds the writer waits for more records before writing a partial batch.
         """
         self._logger = logger
         self._validate_logger()
+        if max_queue_size < 1 or batch_size < 1:
+            raise ValueError("max_queue_size and batch_size must be at least 1")
+        if flush_interval <= 0:
+            raise ValueError(f"flush_interval must be positive, got {flush_interval}")
+        self.async_mode = async_mode
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._queue: 'queue.Queue[Optional[_QueuedMessage]]' = queue.Queue(max_queue_size)
+        self._record_style = self._detect_record_style()
+        self._writer: Optional[threading.Thread] = None
+        self._writer_finalizer: Optional[weakref.finalize] = None
+        self._writer_lock = threading.Lock()
     
     def _validate_logger(self) -> None:
         """Validate that the logger has at least the basic required methods."""
@@ -71,26 +173,140 @@ class LoggerAdapter(LoggerInterface):
             return level_map[level]
         return level
 
+    def is_enabled(self, level: Union[str, int]) -> bool:
+        """Return False if the wrapped logger is known to discard messages at this level."""
+        is_enabled_for = getattr(self._logger, 'isEnabledFor', None)
+        return is_enabled_for is None or bool(is_enabled_for(self._get_log_level_int(level)))
+
+    def _detect_record_style(self) -> str:
+        if hasattr(self._logger, 'write_record'):
+            return 'write_record'  # JSONLinesLogger or another record-aware sink
+        if isinstance(self._logger, logging.Logger) or hasattr(self._logger, 'makeRecord'):
+            return 'extra'
+        if hasattr(self._logger, 'bind'):
+            return 'bind'  # loguru and structlog
+        return 'message'
+
+    def log_record(self, level: Union[str, int], record: Dict[str, Any], fmt: str, *args: Any) -> None:
+        """
+        Log a structured event record along with its `fmt % args` message.
+
+        How the record reaches the logger depends on its type:
+        - stdlib logging.Logger: `extra={'smartprofiler': record}`, so handlers and formatters can
+          read `logrecord.smartprofiler`; the message is formatted lazily by logging itself.
+        - loguru / structlog: `logger.bind(**record)`, then the message is logged.
+        - JSONLinesLogger (anything with `write_record`): the record is written as one JSON line
+          and no message is formatted.
+        - any other logger: only the message.
+
+        Args:
+            level: Logging level.
+            record: The event, e.g. {'profiler', 'label', 'metrics', 'timestamp', 'thread', 'span_id'}.
+                  It must not be modified afterwards (in async mode it is written later).
+            fmt: %-style message format.
+            *args: Message arguments.
+        """
+        level_int = self._get_log_level_int(level)
+        if not self.is_enabled(level_int):
+            return
+        if self.async_mode:
+            self._enqueue((level_int, fmt, args, None, record))
+        else:
+            self._write_record(level_int, record, fmt, args)
+
+    def _write_record(self, level: int, record: Dict[str, Any], fmt: str, args: tuple) -> None:
+        _write_record(self._logger, self._record_style, level, record, fmt, args)
+
+    def emit(self, level: Union[str, int], fmt: str, *args: Any) -> None:
+        """
+        Log `fmt % args` at the given level, formatting only if the level is enabled.
+
+        This is the entry point used by the profilers: in async mode only the level check and
+        an enqueue run on the calling thread, and the writer formats the message.
+        """
+        level_int = self._get_log_level_int(level)
+        if not self.is_enabled(level_int):
+            return
+        if self.async_mode:
+            self._enqueue((level_int, fmt, args, None, None))
+        else:
+            self._logger.log(level_int, fmt % args if args else fmt)
+
     def info(self, msg: str, *args: Any, **kwargs: Any) -> None:
         """Log an info message."""
-        self._logger.info(msg, *args, **kwargs)
+        if self.async_mode:
+            self._enqueue((logging.INFO, msg, args, kwargs, None))
+        else:
+            self._logger.info(msg, *args, **kwargs)
     
     def error(self, msg: str, *args: Any, **kwargs: Any) -> None:
         """Log an error message."""
-        self._logger.error(msg, *args, **kwargs)
+        if self.async_mode:
+            self._enqueue((logging.ERROR, msg, args, kwargs, None))
+        else:
+            self._logger.error(msg, *args, **kwargs)
     
     def debug(self, msg: str, *args: Any, **kwargs: Any) -> None:
         """Log a debug message."""
-        self._logger.debug(msg, *args, **kwargs)
+        if self.async_mode:
+            self._enqueue((logging.DEBUG, msg, args, kwargs, None))
+        else:
+            self._logger.debug(msg, *args, **kwargs)
     
     def warning(self, msg: str, *args: Any, **kwargs: Any) -> None:
         """Log a warning message."""
-        self._logger.warning(msg, *args, **kwargs)
+        if self.async_mode:
+            self._enqueue((logging.WARNING, msg, args, kwargs, None))
+        else:
+            self._logger.warning(msg, *args, **kwargs)
     
     def log(self, level: Union[str, int], msg: str, *args: Any, **kwargs: Any) -> None:
         """Log a message at the specified level."""
         level_int = self._get_log_level_int(level)
-        self._logger.log(level_int, msg, *args, **kwargs)
+        if self.async_mode:
+            self._enqueue((level_int, msg, args, kwargs, None))
+        else:
+            self._logger.log(level_int, msg, *args, **kwargs)
+
+    def _enqueue(self, message: _QueuedMessage) -> None:
+        if self._writer is None:
+            self._start_writer()
+        try:
+            self._queue.put_nowait(message)
+        except queue.Full:
+            self.dropped += 1
+
+    def _start_writer(self) -> None:
+        with self._writer_lock:
+            if self._writer is not None:
+                return
+            # The thread only references the queue and the wrapped logger, never the adapter, so a
+            # dropped adapter is collected; its finalizer then stops the writer after the backlog
+            self._writer = threading.Thread(
+                target=_run_writer, args=(self._queue, self._logger, self._record_style, self.batch_size,
+                                          self.flush_interval),
+                name='smartprofiler-log-writer', daemon=True
+            )
+            self._writer.start()
+            self._writer_finalizer = weakref.finalize(self, self._queue.put, None)
+            self._writer_finalizer.atexit = False
+            _async_adapters.add(self)
+
+    def flush(self) -> None:
+        """Block until every record queued so far has been written (no-op in sync mode)."""
+        if self._writer is not None:
+            self._queue.join()
+
+    def close(self) -> None:
+        """Write the remaining records and stop the writer thread; later messages start a new one."""
+        with self._writer_lock:
+            writer, self._writer = self._writer, None
+            if writer is None:
+                return
+            _async_adapters.discard(self)
+            self._writer_finalizer.detach()
+            self._queue.put(None)
+        writer.join()
     
     def setLevel(self, level: int) -> None:
         """Set the logging level if the logger supports it."""
@@ -105,4 +321,75 @@ class LoggerAdapter(LoggerInterface):
     @property
     def handlers(self) -> list:
         """Get the logger's handlers if available."""
-        return getattr(self._logger, 'handlers', []) 
\ No newline at end of file
+        return getattr(self._logger, 'handlers', []) 
+
+
+class JSONLinesLogger:
+    """Minimal logger writing one compact JSON object per line to a file or stream.
+
+    Structured event records (see LoggerAdapter.log_record) are written as
+    {"level": ..., <record fields>} without building a message string; plain messages as
+    {"timestamp": ..., "level": ..., "message": ...}. Values JSON cannot encode are written as
+    their str(). Writes from several threads are serialized.
+    """
+
+    def __init__(self, target: Union[str, IO[str]], level: int = logging.INFO):
+        """
+        Args:
+            target: Path of a file to append to, or a text stream.
+            level: Minimum level written.
+        """
+        self._owns_stream = isinstance(target, str)
+        self._stream: IO[str] = open(target, 'a', encoding='utf-8') if isinstance(target, str) else target
+        self.level = level
+        self._encoder = json.JSONEncoder(separators=(',', ':'), default=str)
+        self._lock = threading.Lock()
+
+    def isEnabledFor(self, level: int) -> bool:
+        return level >= self.level
+
+    def setLevel(self, level: int) -> None:
+        self.level = level
+
+    def _write_line(self, data: Dict[str, Any]) -> None:
+        line = self._encoder.encode(data)
+        with self._lock:
+            self._stream.write(line + '\n')
+
+    def write_record(self, level: int, record: Dict[str, Any]) -> None:
+        """Write a structured event record."""
+        if level >= self.level:
+            data = {'level': logging.getLevelName(level)}
+            data.update(record)
+            self._write_line(data)
+
+    def log(self, level: int, msg: str, *args: Any, **kwargs: Any) -> None:
+        if level >= self.level:
+            self._write_line({
+                'timestamp': time.time(),
+                'level': logging.getLevelName(level),
+                'message': msg % args if args else msg,
+            })
+
+    def debug(self, msg: str, *args: Any, **kwargs: Any) -> None:
+        self.log(logging.DEBUG, msg, *args)
+
+    def info(self, msg: str, *args: Any, **kwargs: Any) -> None:
+        self.log(logging.INFO, msg, *args)
+
+    def warning(self, msg: str, *args: Any, **kwargs: Any) -> None:
+        self.log(logging.WARNING, msg, *args)
+
+    def error(self, msg: str, *args: Any, **kwargs: Any) -> None:
+        self.log(logging.ERROR, msg, *args)
+
+    def flush(self) -> None:
+        with self._lock:
+            self._stream.flush()
+
+    def close(self) -> None:
+        """Flush, and close the file if this logger opened it."""
+        with self._lock:
+            self._stream.flush()
+            if self._owns_stream:
+                self._stream.close()
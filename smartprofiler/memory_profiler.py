@@ -1,60 +1,418 @@
+import os
+import time
 import tracemalloc
 import logging
+import threading
+import psutil
 from contextlib import contextmanager
-from typing import Callable, Optional
+from typing import Callable, Optional, Dict, List, Tuple, Any, Sequence
 from .base_profiler import BaseProfiler
+from .sampler import MetricsSampler
+
+# tracemalloc.reset_peak() is available from Python 3.9
+_HAS_RESET_PEAK = hasattr(tracemalloc, 'reset_peak')
+
+MEMORY_MODES = ('tracemalloc', 'rss', 'uss')
+ALLOCATION_GROUPINGS = ('lineno', 'filename', 'traceback')
+
+
+class _MemorySection:
+    """Traced-memory baseline, running peak and (optionally) allocation sites of one open section."""
+
+    __slots__ = ('baseline', 'peak', 'sites')
+
+    def __init__(self, baseline: int):
+        self.baseline = baseline
+        self.peak = baseline
+        self.sites: Optional[Dict[tracemalloc.Traceback, Tuple[int, int]]] = None
+
+
+class _TracemallocSession:
+    """Process-wide, refcounted tracemalloc session shared by all MemoryProfiler sections.
+
+    Tracing is started by the first section and stopped after the last one, so nested and
+    concurrent sections never stop tracing underneath each other. A session that finds
+    tracemalloc already running leaves it running. Before every `reset_peak()` the current peak
+    is folded into all open sections, so each section keeps its own peak.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._users = 0
+        self._owns_tracing = False
+        self._sections: List[_MemorySection] = []
+
+    def _checkpoint(self) -> int:
+        current, peak = tracemalloc.get_traced_memory()
+        for section in self._sections:
+            if peak > section.peak:
+                section.peak = peak
+        if _HAS_RESET_PEAK:
+            tracemalloc.reset_peak()
+        return current
+
+    def begin(self, nframe: int = 1) -> _MemorySection:
+        """Open a section, starting tracing with `nframe` traceback frames if it is not running."""
+        with self._lock:
+            if self._users == 0 and not tracemalloc.is_tracing():
+                tracemalloc.start(nframe)
+                self._owns_tracing = True
+            self._users += 1
+            section = _MemorySection(self._checkpoint())
+            self._sections.append(section)
+            return section
+
+    def snapshot(self, reduce: Callable[[tracemalloc.Snapshot], Any]) -> Any:
+        """
+        Take a snapshot and reduce it while holding the session lock.
+
+        The snapshot is dropped as soon as `reduce` returns, and its transient memory is not
+        charged to the peaks of open sections.
+        """
+        with self._lock:
+            self._checkpoint()
+            summary = reduce(tracemalloc.take_snapshot())
+            if _HAS_RESET_PEAK:
+                tracemalloc.reset_peak()
+            return summary
+
+    def end(self, section: _MemorySection) -> Tuple[int, int]:
+        """Close a section and return its (current, peak) traced bytes relative to its baseline."""
+        with self._lock:
+            current = self._checkpoint()
+            self._sections.remove(section)
+            self._users -= 1
+            if self._users == 0 and self._owns_tracing:
+                tracemalloc.stop()
+                self._owns_tracing = False
+        return current - section.baseline, section.peak - section.baseline
+
+
+_session = _TracemallocSession()
+
+
+class _ProcessMemoryReader:
+    """Reads the process's resident (RSS) or unique (USS) set size in bytes.
+
+    RSS is read with a single pread() of /proc/self/statm on a cached descriptor where
+    available and through psutil otherwise. USS always goes through psutil, which has to walk
+    the process's memory maps and is therefore considerably more expensive.
+
+    The descriptor stays open for the life of the process, so readers are shared per mode
+    (see `_get_process_reader`) rather than created per profiler.
+    """
+
+    def __init__(self, mode: str):
+        self.mode = mode
+        self._process = psutil.Process()
+        self._statm_fd: Optional[int] = None
+        self._pid = os.getpid()
+        self._page_size = 4096
+        if mode == 'rss' and hasattr(os, 'pread'):
+            self._open_statm()
+
+    def _open_statm(self):
+        if self._statm_fd is not None:
+            os.close(self._statm_fd)
+            self._statm_fd = None
+        try:
+            self._statm_fd = os.open('/proc/self/statm', os.O_RDONLY)
+            self._page_size = os.sysconf('SC_PAGE_SIZE')
+        except (OSError, ValueError, AttributeError):
+            self._statm_fd = None
+
+    def read(self) -> int:
+        if self._statm_fd is not None:
+            if os.getpid() != self._pid:
+                # /proc/self was resolved when the descriptor was opened; reopen after a fork
+                self._pid = os.getpid()
+                self._process = psutil.Process()
+                self._open_statm()
+            return int(os.pread(self._statm_fd, 256, 0).split()[1]) * self._page_size
+        if self.mode == 'uss':
+            return self._process.memory_full_info().uss
+        return self._process.memory_info().rss
+
+
+_readers: Dict[str, _ProcessMemoryReader] = {}
+_readers_lock = threading.Lock()
+
+
+def _get_process_reader(mode: str) -> _ProcessMemoryReader:
+    """Return the process-wide reader for 'rss' or 'uss'."""
+    with _readers_lock:
+        reader = _readers.get(mode)
+        if reader is None:
+            reader = _readers[mode] = _ProcessMemoryReader(mode)
+        return reader
+
+
+class _ProcessMemorySection:
+    """Process-memory baseline and high-water mark of one open section."""
+
+    __slots__ = ('baseline', 'peak', 'start')
+
+    def __init__(self, baseline: int, start: float = 0.0):
+        self.baseline = baseline
+        self.peak = baseline
+        self.start = start
+
+
+class _WatermarkSampler:
+    """Background thread that samples process memory while sections are open.
+
+    Section boundaries only see memory at entry and exit; the sampler raises each open
+    section's high-water mark with whatever it sees in between. The thread is started by the
+    first section and parks between sections, so back-to-back sections reuse it; it exits after
+    `idle_timeout` seconds without open sections.
+    """
+
+    def __init__(self, mode: str, interval: float, idle_timeout: float = 1.0):
+        self.reader = _get_process_reader(mode)
+        self.interval = interval
+        self.idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        self._sections: List[_ProcessMemorySection] = []
+        self._thread: Optional[threading.Thread] = None
+        # Set while sections are open; the thread parks on it in between
+        self._busy = threading.Event()
+
+    def _observe(self, value: int):
+        for section in self._sections:
+            if value > section.peak:
+                section.peak = value
+
+    def _run(self):
+        while True:
+            if not self._busy.wait(self.idle_timeout):
+                with self._lock:
+                    if not self._busy.is_set():
+                        self._thread = None
+                        return
+            time.sleep(self.interval)
+            value = self.reader.read()
+            with self._lock:
+                self._observe(value)
+
+    def begin(self) -> _ProcessMemorySection:
+        section = _ProcessMemorySection(self.reader.read())
+        with self._lock:
+            self._sections.append(section)
+            if self.interval:
+                self._busy.set()
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='smartprofiler-memory-sampler', daemon=True)
+                    self._thread.start()
+        return section
+
+    def end(self, section: _ProcessMemorySection) -> Tuple[int, int, int]:
+        """Close a section and return (current delta, peak delta, absolute value) in bytes."""
+        value = self.reader.read()
+        with self._lock:
+            self._observe(value)
+            self._sections.remove(section)
+            if not self._sections:
+                self._busy.clear()
+        return value - section.baseline, section.peak - section.baseline, value
+
+
+class _SharedSamplerWatermark:
+    """Serves process-memory sections from a shared MetricsSampler's time series.
+
+    Has the same begin/end interface as _WatermarkSampler, but boundaries are interpolated from
+    the sampler's buffer and the high-water mark is the largest sample taken inside the section.
+    """
+
+    def __init__(self, mode: str, sampler: MetricsSampler):
+        self.reader = _get_process_reader(mode)
+        self.sampler = sampler
+        self.source = f"memory:{mode}"
+        sampler.register(self.source, lambda: (self.reader.read(),), ('bytes',))
+
+    def _value_at(self, timestamp: float) -> int:
+        values = self.sampler.value_at(self.source, timestamp)
+        return int(values[0]) if values is not None else self.reader.read()
+
+    def begin(self) -> _ProcessMemorySection:
+        start = time.perf_counter()
+        return _ProcessMemorySection(self._value_at(start), start)
+
+    def end(self, section: _ProcessMemorySection) -> Tuple[int, int, int]:
+        """Close a section and return (current delta, peak delta, absolute value) in bytes."""
+        end = time.perf_counter()
+        value = self._value_at(end)
+        sampled_peak = self.sampler.max_between(self.source, 'bytes', section.start, end)
+        peak = max(section.baseline, value, int(sampled_peak) if sampled_peak is not None else value)
+        return value - section.baseline, peak - section.baseline, value
+
+
+_samplers: Dict[Tuple[str, float], _WatermarkSampler] = {}
+_samplers_lock = threading.Lock()
+
+
+def _get_watermark_sampler(mode: str, interval: float) -> _WatermarkSampler:
+    with _samplers_lock:
+        sampler = _samplers.get((mode, interval))
+        if sampler is None:
+            sampler = _samplers[(mode, interval)] = _WatermarkSampler(mode, interval)
+        return sampler
+
 
 class MemoryProfiler(BaseProfiler):
     """Profiler for measuring memory usage."""
 
-    def __init__(self, logger: Optional[logging.Logger] = None,  **kwargs):
+    def __init__(
+        self,
+        logger: Optional[logging.Logger] = None,
+        nframe: int = 1,
+        mode: str = 'tracemalloc',
+        sample_interval: Optional[float] = 0.01,
+        track_allocations: bool = False,
+        top_n: int = 10,
+        group_by: str = 'lineno',
+        include: Optional[Sequence[str]] = None,
+        exclude: Optional[Sequence[str]] = None,
+        sampler: Optional[MetricsSampler] = None,
+        **kwargs
+    ):
+        """
+        Initialize the MemoryProfiler.
+
+        Args:
+            logger: Custom logger instance (default: None, uses default logger).
+            nframe: Traceback depth stored by tracemalloc for each allocation. Higher values give
+                  more detail at a higher overhead; only applied when this profiler starts tracing.
+            mode: 'tracemalloc' traces Python allocations (detailed, but slows allocation-heavy code);
+                  'rss' and 'uss' sample process memory at section boundaries at near-zero overhead.
+            sample_interval: In 'rss'/'uss' mode, seconds between background high-water-mark samples
+                  while a section is open (None: only sample at section boundaries).
+            track_allocations: In 'tracemalloc' mode, report the `top_n` allocation sites by size
+                  delta as 'top_allocations'. This takes two full tracemalloc snapshots per section,
+                  one at entry and one at exit, each copying every live trace; their cost grows with
+                  the number of live allocations, so keep it off hot paths.
+            top_n: Number of allocation sites reported per section.
+            group_by: How allocation sites are grouped: 'lineno', 'filename' or 'traceback'
+                  ('traceback' needs nframe > 1 to be useful).
+            include: Filename patterns (fnmatch) to restrict allocation sites to.
+            exclude: Filename patterns (fnmatch) of allocation sites to ignore; tracemalloc's and
+                  this module's own allocations are always ignored.
+            sampler: In 'rss'/'uss' mode, a shared MetricsSampler that polls process memory in the
+                  background instead of a per-mode watermark thread (sample_interval is then unused).
+            **kwargs: Additional arguments passed to BaseProfiler (e.g., log_level, enable_logging).
+        """
         super().__init__(logger,  **kwargs)
+        if nframe < 1:
+            raise ValueError(f"nframe must be at least 1, got {nframe}")
+        if mode not in MEMORY_MODES:
+            raise ValueError(f"Unknown mode: '{mode}'. Supported: {list(MEMORY_MODES)}")
+        if track_allocations and mode != 'tracemalloc':
+            raise ValueError("track_allocations requires mode='tracemalloc'")
+        if sampler is not None and mode == 'tracemalloc':
+            raise ValueError("A sampler requires mode='rss' or mode='uss'")
+        if group_by not in ALLOCATION_GROUPINGS:
+            raise ValueError(f"Unknown group_by: '{group_by}'. Supported: {list(ALLOCATION_GROUPINGS)}")
+        self.nframe = nframe
+        self.mode = mode
+        if sampler is not None:
+            self._sampler = _SharedSamplerWatermark(mode, sampler)
+        elif mode != 'tracemalloc':
+            self._sampler = _get_watermark_sampler(mode, sample_interval or 0)
+        else:
+            self._sampler = None
+        self.track_allocations = track_allocations
+        self.top_n = top_n
+        self.group_by = group_by
+        self._filters = [tracemalloc.Filter(True, pattern) for pattern in include or ()]
+        self._filters += [tracemalloc.Filter(False, pattern) for pattern in exclude or ()]
+        self._filters += [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+
+    def _summarize_sites(self, snapshot: tracemalloc.Snapshot) -> Dict[tracemalloc.Traceback, Tuple[int, int]]:
+        """Reduce a snapshot to {site: (size, count)} once, so only the compact summary is kept."""
+        statistics = snapshot.filter_traces(self._filters).statistics(self.group_by)
+        return {stat.traceback: (stat.size, stat.count) for stat in statistics}
+
+    def _format_site(self, traceback: tracemalloc.Traceback) -> str:
+        if self.group_by == 'filename':
+            return traceback[0].filename
+        return ' -> '.join(f"{frame.filename}:{frame.lineno}" for frame in traceback)
+
+    def _top_allocations(self, before: Dict, after: Dict) -> List[Dict[str, Any]]:
+        """Diff two site summaries and return the `top_n` sites by absolute size delta."""
+        diffs = []
+        for site in before.keys() | after.keys():
+            size, count = after.get(site, (0, 0))
+            old_size, old_count = before.get(site, (0, 0))
+            if size != old_size or count != old_count:
+                diffs.append((size - old_size, count - old_count, size, site))
+        diffs.sort(key=lambda diff: abs(diff[0]), reverse=True)
+        return [
+            {
+                'site': self._format_site(site),
+                'size_diff_kb': size_diff / 1024,
+                'count_diff': count_diff,
+                'size_kb': size / 1024,
+            }
+            for size_diff, count_diff, size, site in diffs[:self.top_n]
+        ]
+
+    def _begin_section(self):
+        if self._sampler is not None:
+            return self._sampler.begin()
+        section = _session.begin(self.nframe)
+        if self.track_allocations:
+            section.sites = _session.snapshot(self._summarize_sites)
+        return section
+
+    def _end_section(self, section) -> Dict[str, Any]:
+        if self._sampler is not None:
+            current, peak, value = self._sampler.end(section)
+            return {
+                'current_mb': current / (1024 ** 2),
+                'peak_mb': peak / (1024 ** 2),
+                f'{self.mode}_mb': value / (1024 ** 2),
+            }
+        sites = _session.snapshot(self._summarize_sites) if section.sites is not None else None
+        current, peak = _session.end(section)
+        metrics = {'current_mb': current / (1024 ** 2), 'peak_mb': peak / (1024 ** 2)}
+        if sites is not None:
+            metrics['top_allocations'] = self._top_allocations(section.sites, sites)
+        return metrics
 
     def profile_function(self, func: Callable) -> Callable:
         """Decorator to profile memory usage of a function."""
         def profile_logic(func, *args, **kwargs):
-            tracemalloc.start()
+            section = self._begin_section()
             try:
                 result = func(*args, **kwargs)
             finally:
-                current, peak = tracemalloc.get_traced_memory()
-                tracemalloc.stop()
-                metrics = {'current_mb': current / (1024 ** 2), 'peak_mb': peak / (1024 ** 2)}
-                self.stats.append({'label': f"Function '{func.__name__}'", 'metrics': metrics})
-                self.logger.info(
-                    f"Function '{func.__name__}' memory usage: Current={metrics['current_mb']:.2f}MB, "
-                    f"Peak={metrics['peak_mb']:.2f}MB"
-                )
+                metrics = self._end_section(section)
+                label = f"Function '{func.__name__}'"
+                timestamp = self._record_stat(label, metrics)
+                self._log_event(label, metrics, timestamp, "%s memory usage: Current=%.2fMB, Peak=%.2fMB",
+                                label, metrics['current_mb'], metrics['peak_mb'])
             return result
         return self._wrap_function(func, profile_logic)
 
     @contextmanager
     def profile_block(self, label: str = "Memory block"):
         """Context manager to profile memory usage for a block of code."""
-        tracemalloc.start()
+        section = self._begin_section()
         try:
             yield
         finally:
-            current, peak = tracemalloc.get_traced_memory()
-            tracemalloc.stop()
-            metrics = {'current_mb': current / (1024 ** 2), 'peak_mb': peak / (1024 ** 2)}
-            self.stats.append({'label': label, 'metrics': metrics})
-            self.logger.info(
-                f"{label} memory usage: Current={metrics['current_mb']:.2f}MB, Peak={metrics['peak_mb']:.2f}MB"
-            )
+            metrics = self._end_section(section)
+            timestamp = self._record_stat(label, metrics)
+            self._log_event(label, metrics, timestamp, "%s memory usage: Current=%.2fMB, Peak=%.2fMB",
+                            label, metrics['current_mb'], metrics['peak_mb'])
 
     @contextmanager
     def profile_line(self, label: str = "Memory line(s)"):
         """Context manager to profile memory usage for a specific line or small block."""
-        tracemalloc.start()
+        section = self._begin_section()
         try:
             yield
         finally:
-            current, peak = tracemalloc.get_traced_memory()
-            tracemalloc.stop()
-            metrics = {'current_mb': current / (1024 ** 2), 'peak_mb': peak / (1024 ** 2)}
-            self.stats.append({'label': label, 'metrics': metrics})
-            self.logger.info(
-                f"{label} memory usage: Current={metrics['current_mb']:.2f}MB, Peak={metrics['peak_mb']:.2f}MB"
-            )
-            
\ No newline at end of file
+            metrics = self._end_section(section)
+            timestamp = self._record_stat(label, metrics)
+            self._log_event(label, metrics, timestamp, "%s memory usage: Current=%.2fMB, Peak=%.2fMB",
+                            label, metrics['current_mb'], metrics['peak_mb'])
@@ -1,8 +1,67 @@
+import os
+import socket
 import psutil
 import logging
+from collections import namedtuple
 from contextlib import contextmanager
-from typing import Callable, Optional, Dict
+from fnmatch import fnmatchcase
+from typing import Callable, Optional, Dict, List, Sequence, Tuple, Any
 from .base_profiler import BaseProfiler
+from .sampler import MetricsSampler
+from .socket_accounting import _SocketCollector, _format_address
+
+NETWORK_SCOPES = ('system', 'process')
+
+# Counter fields diffed by NetworkProfiler, shared by psutil and /proc/self/net/dev counters
+_NET_FIELDS = ('bytes_sent', 'bytes_recv', 'packets_sent', 'packets_recv')
+_NetCounters = namedtuple('_NetCounters', _NET_FIELDS)
+
+# Counter fields in log messages, with their descriptions
+_LOGGED_NET_FIELDS = (
+    ('bytes_sent', 'Bytes sent'),
+    ('bytes_recv', 'Bytes received'),
+    ('packets_sent', 'Packets sent'),
+    ('packets_recv', 'Packets received'),
+)
+
+_PROC_NET_DEV = '/proc/self/net/dev'
+
+
+def _read_proc_net_dev(path: Optional[str] = None) -> Dict[str, _NetCounters]:
+    """Parse per-interface counters from a /proc/<pid>/net/dev file (default: this process's)."""
+    counters = {}
+    with open(path or _PROC_NET_DEV, 'r') as f:
+        lines = f.readlines()[2:]  # two header lines
+    for line in lines:
+        name, _, data = line.partition(':')
+        fields = data.split()
+        if len(fields) < 10:
+            continue
+        # Receive: bytes packets errs drop fifo frame compressed multicast; Transmit: bytes packets ...
+        counters[name.strip()] = _NetCounters(
+            bytes_sent=int(fields[8]),
+            bytes_recv=int(fields[0]),
+            packets_sent=int(fields[9]),
+            packets_recv=int(fields[1]),
+        )
+    return counters
+
+
+def _connection_key(conn: Any) -> Tuple:
+    return conn.fd, conn.family, conn.type, conn.laddr, conn.raddr
+
+
+def _describe_connection(conn: Any) -> Dict[str, str]:
+    protocol = 'tcp' if conn.type == socket.SOCK_STREAM else 'udp'
+    if conn.family == socket.AF_INET6:
+        protocol += '6'
+    return {
+        'type': protocol,
+        'local': _format_address(conn.laddr),
+        'remote': _format_address(conn.raddr),
+        'status': conn.status,
+    }
+
 
 class NetworkProfiler(BaseProfiler):
     """Profiler for measuring network I/O."""
@@ -11,6 +70,13 @@ class NetworkProfiler(BaseProfiler):
         self,
         logger: Optional[logging.Logger] = None,
         network_metrics: Optional[Dict[str, bool]] = None,
+        scope: str = 'system',
+        pernic: bool = False,
+        include_interfaces: Optional[Sequence[str]] = None,
+        exclude_interfaces: Optional[Sequence[str]] = None,
+        track_connections: bool = False,
+        socket_accounting: bool = False,
+        sampler: Optional[MetricsSampler] = None,
         **kwargs
     ):
         """
@@ -19,9 +85,41 @@ class NetworkProfiler(BaseProfiler):
         Args:
             logger: Custom logger instance (default: None, uses default logger).
             network_metrics: Dict to enable/disable network metrics (e.g., {'bytes_sent': True}).
+            scope: Which counters are diffed:
+                  'system' - psutil.net_io_counters() for the host;
+                  'process' - /proc/self/net/dev, i.e. only the interfaces of this process's
+                  network namespace (Linux only). Inside a container this excludes the host's
+                  other traffic; it is still shared with every process in the namespace.
+            pernic: If True, also report the deltas per interface as 'per_interface'.
+            include_interfaces: Glob patterns (e.g. ['eth*']) of interfaces to count; all by default.
+                  Setting either filter reads per-interface counters even when pernic is False.
+            exclude_interfaces: Glob patterns of interfaces to leave out (e.g. ['lo', 'veth*']).
+            track_connections: If True, record the inet sockets this process opened during the
+                  section as 'connections' (sockets opened and closed within the section are missed).
+            socket_accounting: If True, count the bytes and calls this thread or asyncio task makes
+                  through socket.socket during the section, per remote endpoint, as 'socket_bytes_sent',
+                  'socket_bytes_recv' and 'socket_endpoints'. socket.socket is patched only while such
+                  a section is open; TLS-wrapped sockets are not counted.
+            sampler: Shared MetricsSampler that polls the (filtered, summed) counters in the
+                  background; section boundaries are then interpolated from its samples. Not
+                  compatible with pernic.
             **kwargs: Additional arguments passed to BaseProfiler (e.g., log_level, enable_logging).
         """
         super().__init__(logger=logger, **kwargs)
+        if scope not in NETWORK_SCOPES:
+            raise ValueError(f"Unknown scope: '{scope}'. Supported: {list(NETWORK_SCOPES)}")
+        if scope == 'process' and not os.path.exists(_PROC_NET_DEV):
+            raise ValueError(f"The 'process' scope requires {_PROC_NET_DEV} (Linux only)")
+        if sampler is not None and pernic:
+            raise ValueError("A sampler cannot be used with pernic=True")
+        self.scope = scope
+        self.pernic = pernic
+        self.include_interfaces = list(include_interfaces) if include_interfaces else None
+        self.exclude_interfaces = list(exclude_interfaces) if exclude_interfaces else None
+        self.track_connections = track_connections
+        self.socket_accounting = socket_accounting
+        self._per_interface = scope == 'process' or pernic or bool(self.include_interfaces or self.exclude_interfaces)
+        self._process = psutil.Process() if track_connections else None
         self.network_metrics = {
             'bytes_sent': True,
             'bytes_recv': True,
@@ -30,65 +128,167 @@ class NetworkProfiler(BaseProfiler):
         }
         if network_metrics:
             self.network_metrics.update(network_metrics)
+        self.sampler = sampler
+        self._sampler_source = f"net_io:{scope}:{self.include_interfaces}:{self.exclude_interfaces}"
+        if sampler is not None:
+            sampler.register(self._sampler_source, self._read_totals, _NET_FIELDS)
 
-    def _get_network_stats(self) -> psutil._common.snetio:
-        """Get current network I/O stats."""
-        try:
+    def _interface_selected(self, name: str) -> bool:
+        if self.include_interfaces and not any(fnmatchcase(name, pattern) for pattern in self.include_interfaces):
+            return False
+        if self.exclude_interfaces and any(fnmatchcase(name, pattern) for pattern in self.exclude_interfaces):
+            return False
+        return True
+
+    def _read_counters(self) -> Any:
+        """Read the counters (a dict per interface unless summing system-wide counters)."""
+        if not self._per_interface:
             return psutil.net_io_counters()
-        except psutil.Error as e:
+        if self.scope == 'process':
+            counters = _read_proc_net_dev()
+        else:
+            counters = psutil.net_io_counters(pernic=True)
+        return {name: stats for name, stats in counters.items() if self._interface_selected(name)}
+
+    def _read_totals(self) -> _NetCounters:
+        """Read the counters summed over the selected interfaces."""
+        counters = self._read_counters()
+        if not self._per_interface:
+            return _NetCounters(*(getattr(counters, field) for field in _NET_FIELDS))
+        return _NetCounters(*(sum(getattr(stats, field) for stats in counters.values()) for field in _NET_FIELDS))
+
+    def _get_network_stats(self) -> Any:
+        """Get current network I/O stats (summed totals when a sampler is set, else as read)."""
+        if self.sampler is not None:
+            values = self.sampler.value_at(self._sampler_source)
+            if values is not None:
+                return _NetCounters(*(int(round(value)) for value in values))
+        try:
+            return self._read_totals() if self.sampler is not None else self._read_counters()
+        except (psutil.Error, OSError) as e:
             if self.enable_logging:
-                self.logger.error(f"Error retrieving network stats: {e}")
+                self.logger.emit(logging.ERROR, "Error retrieving network stats: %s", e)
             raise
 
-    def _log_network_diff(self, label: str, before: psutil._common.snetio, after: psutil._common.snetio):
-        """Log and store the difference in network I/O stats."""
-        metrics = {}
-        if self.network_metrics.get('bytes_sent'):
-            metrics['bytes_sent'] = after.bytes_sent - before.bytes_sent
-            if self.enable_logging:
-                self.logger.log(self.log_level, f"{label} - Bytes sent: {metrics['bytes_sent']}")
-        if self.network_metrics.get('bytes_recv'):
-            metrics['bytes_recv'] = after.bytes_recv - before.bytes_recv
-            if self.enable_logging:
-                self.logger.log(self.log_level, f"{label} - Bytes received: {metrics['bytes_recv']}")
-        if self.network_metrics.get('packets_sent'):
-            metrics['packets_sent'] = after.packets_sent - before.packets_sent
-            if self.enable_logging:
-                self.logger.log(self.log_level, f"{label} - Packets sent: {metrics['packets_sent']}")
-        if self.network_metrics.get('packets_recv'):
-            metrics['packets_recv'] = after.packets_recv - before.packets_recv
+    def _get_connections(self) -> Optional[Dict[Tuple, Any]]:
+        """Get this process's inet connections keyed by identity, or None when not tracked."""
+        if self._process is None:
+            return None
+        # psutil < 6.0 only has Process.connections()
+        get_connections = getattr(self._process, 'net_connections', None) or self._process.connections
+        try:
+            return {_connection_key(conn): conn for conn in get_connections(kind='inet')}
+        except psutil.Error as e:
             if self.enable_logging:
-                self.logger.log(self.log_level, f"{label} - Packets received: {metrics['packets_recv']}")
-        self.stats.append({'label': label, 'metrics': metrics})
+                self.logger.emit(logging.ERROR, "Error retrieving connections: %s", e)
+            return None
+
+    def _snapshot(self) -> Tuple[Any, Optional[Dict[Tuple, Any]]]:
+        return self._get_network_stats(), self._get_connections()
+
+    def _start_socket_accounting(self) -> Optional[_SocketCollector]:
+        if not self.socket_accounting:
+            return None
+        collector = _SocketCollector()
+        collector.start()
+        return collector
+
+    def _counter_diff(self, before: Any, after: Any) -> Tuple[Dict[str, Any], Optional[Dict[str, Dict[str, int]]]]:
+        """Return the total counter deltas and, when reading per interface, the deltas per interface."""
+        if self.sampler is not None or not self._per_interface:
+            return {field: getattr(after, field) - getattr(before, field) for field in _NET_FIELDS}, None
+        per_interface = {}
+        for name, after_stats in after.items():
+            before_stats = before.get(name)
+            if before_stats is None:
+                continue
+            per_interface[name] = {
+                field: getattr(after_stats, field) - getattr(before_stats, field) for field in _NET_FIELDS
+            }
+        totals = {field: sum(deltas[field] for deltas in per_interface.values()) for field in _NET_FIELDS}
+        return totals, per_interface
+
+    def _log_network_diff(
+        self,
+        label: str,
+        before: Any,
+        after: Any,
+        before_connections: Optional[Dict[Tuple, Any]] = None,
+        after_connections: Optional[Dict[Tuple, Any]] = None,
+        collector: Optional[_SocketCollector] = None
+    ):
+        """Log and store the difference in network I/O stats (one log message per section)."""
+        metrics = {}
+        diff, per_interface = self._counter_diff(before, after)
+        # Message parts and their arguments; formatted by the logger only if the message is written
+        parts, args = [], []
+        for field, description in _LOGGED_NET_FIELDS:
+            if self.network_metrics.get(field):
+                metrics[field] = diff[field]
+                parts.append(f"{description}: %s")
+                args.append(metrics[field])
+        if per_interface is not None and self.pernic:
+            metrics['per_interface'] = {
+                name: {field: value for field, value in deltas.items() if self.network_metrics.get(field)}
+                for name, deltas in per_interface.items()
+            }
+        if before_connections is not None and after_connections is not None:
+            opened: List[Dict[str, str]] = [
+                _describe_connection(conn) for key, conn in after_connections.items() if key not in before_connections
+            ]
+            metrics['connections'] = opened
+            parts.append("Connections opened: %d%s")
+            endpoints = ''.join(f" {conn['remote'] or conn['local']}," for conn in opened) if self.enable_logging else ''
+            args.extend((len(opened), endpoints.rstrip(',')))
+        if collector is not None:
+            endpoints = collector.to_dict()
+            metrics['socket_bytes_sent'] = sum(counts['bytes_sent'] for counts in endpoints.values())
+            metrics['socket_bytes_recv'] = sum(counts['bytes_recv'] for counts in endpoints.values())
+            metrics['socket_endpoints'] = endpoints
+            parts.append("Socket bytes sent: %s, received: %s (%d endpoints)")
+            args.extend((metrics['socket_bytes_sent'], metrics['socket_bytes_recv'], len(endpoints)))
+        timestamp = self._record_stat(label, metrics)
+        self._log_event(label, metrics, timestamp, "%s - " + ", ".join(parts), label, *args)
 
     def profile_function(self, func: Callable) -> Callable:
         """Decorator to profile network I/O of a function."""
         def profile_logic(func, *args, **kwargs):
-            before = self._get_network_stats()
+            before, before_connections = self._snapshot()
+            collector = self._start_socket_accounting()
             try:
                 result = func(*args, **kwargs)
             finally:
-                after = self._get_network_stats()
-                self._log_network_diff(f"Function '{func.__name__}'", before, after)
+                if collector is not None:
+                    collector.stop()
+                after, after_connections = self._snapshot()
+                self._log_network_diff(
+                    f"Function '{func.__name__}'", before, after, before_connections, after_connections, collector
+                )
             return result
         return self._wrap_function(func, profile_logic)
 
     @contextmanager
     def profile_block(self, label: str = "Network block"):
         """Context manager to profile network I/O for a block of code."""
-        before = self._get_network_stats()
+        before, before_connections = self._snapshot()
+        collector = self._start_socket_accounting()
         try:
             yield
         finally:
-            after = self._get_network_stats()
-            self._log_network_diff(label, before, after)
+            if collector is not None:
+                collector.stop()
+            after, after_connections = self._snapshot()
+            self._log_network_diff(label, before, after, before_connections, after_connections, collector)
 
     @contextmanager
     def profile_line(self, label: str = "Network line(s)"):
         """Context manager to profile network I/O for a specific line or small block."""
-        before = self._get_network_stats()
+        before, before_connections = self._snapshot()
+        collector = self._start_socket_accounting()
         try:
             yield
         finally:
-            after = self._get_network_stats()
-            self._log_network_diff(label, before, after)
+            if collector is not None:
+                collector.stop()
+            after, after_connections = self._snapshot()
+            self._log_network_diff(label, before, after, before_connections, after_connections, collector)
@@ -0,0 +1,153 @@
+import time
+import random
+from bisect import bisect_left
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Sequence
+
+
+class RetentionPolicy(ABC):
+    """Decides which events a ColumnarStatsStore keeps.
+
+    A policy instance holds per-store state, so each store needs its own instance.
+    """
+
+    @abstractmethod
+    def admit(self, store, label: str, timestamp: float) -> Optional[int]:
+        """
+        Choose the row a new event is written to.
+
+        Args:
+            store: The ColumnarStatsStore receiving the event.
+            label: Label of the new event.
+            timestamp: Timestamp of the new event.
+
+        Returns:
+            `store.physical_size` to append a new row, an existing row index to overwrite
+            that row, or None to drop the event.
+        """
+        pass
+
+    def rows(self, store) -> Sequence[int]:
+        """Return the physical row indices of the live events, oldest first."""
+        return range(store.physical_size)
+
+    def reset(self) -> None:
+        """Forget all state (called when the store is cleared)."""
+        pass
+
+
+class RingBufferRetention(RetentionPolicy):
+    """Keep only the most recent `capacity` events, overwriting the oldest one in place."""
+
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            raise ValueError(f"capacity must be positive, got {capacity}")
+        self.capacity = capacity
+        self._next = 0
+
+    def admit(self, store, label: str, timestamp: float) -> Optional[int]:
+        size = store.physical_size
+        if size < self.capacity:
+            return size
+        row = self._next
+        self._next = (row + 1) % self.capacity
+        return row
+
+    def rows(self, store) -> Sequence[int]:
+        size = store.physical_size
+        if size < self.capacity or self._next == 0:
+            return range(size)
+        return list(range(self._next, size)) + list(range(self._next))
+
+    def reset(self) -> None:
+        self._next = 0
+
+
+class ReservoirRetention(RetentionPolicy):
+    """Keep a uniform random sample of at most `per_label` events for every label (Algorithm R).
+
+    The number of events offered for each label is tracked in `seen`, so sampled values can be
+    scaled back up to totals.
+    """
+
+    def __init__(self, per_label: int, seed: Optional[int] = None):
+        if per_label <= 0:
+            raise ValueError(f"per_label must be positive, got {per_label}")
+        self.per_label = per_label
+        self._random = random.Random(seed)
+        self.seen: Dict[str, int] = {}
+        self._slots: Dict[str, List[int]] = {}
+        # Insertion sequence number of the event held by each physical row
+        self._sequence: List[int] = []
+        self._offered = 0
+        self._ordered: Optional[List[int]] = None
+
+    def admit(self, store, label: str, timestamp: float) -> Optional[int]:
+        seen = self.seen.get(label, 0) + 1
+        self.seen[label] = seen
+        self._offered += 1
+        slots = self._slots.setdefault(label, [])
+        if len(slots) < self.per_label:
+            row = store.physical_size
+            slots.append(row)
+            self._sequence.append(self._offered)
+            self._ordered = None
+            return row
+        index = self._random.randrange(seen)
+        if index < self.per_label:
+            row = slots[index]
+            self._sequence[row] = self._offered
+            self._ordered = None
+            return row
+        return None
+
+    def rows(self, store) -> Sequence[int]:
+        if self._ordered is None:
+            self._ordered = sorted(range(store.physical_size), key=self._sequence.__getitem__)
+        return self._ordered
+
+    def reset(self) -> None:
+        self.seen.clear()
+        self._slots.clear()
+        self._sequence.clear()
+        self._offered = 0
+        self._ordered = None
+
+
+class TimeWindowRetention(RetentionPolicy):
+    """Keep only events from the last `window` seconds, optionally capped at `max_events`.
+
+    Expired rows are skipped immediately and physically released in batches, once they make up
+    at least half of the store, so eviction stays amortized O(1) per event.
+    """
+
+    def __init__(self, window: float, max_events: Optional[int] = None):
+        if window <= 0:
+            raise ValueError(f"window must be positive, got {window}")
+        if max_events is not None and max_events <= 0:
+            raise ValueError(f"max_events must be positive, got {max_events}")
+        self.window = window
+        self.max_events = max_events
+        self._head = 0
+
+    def _live_start(self, store, now: float) -> int:
+        size = store.physical_size
+        start = bisect_left(store.timestamp_column, now - self.window, self._head, size)
+        if self.max_events is not None:
+            start = max(start, size - self.max_events)
+        return start
+
+    def admit(self, store, label: str, timestamp: float) -> Optional[int]:
+        self._head = self._live_start(store, timestamp)
+        if self.max_events is not None and store.physical_size - self._head >= self.max_events:
+            self._head += 1
+        if self._head and self._head * 2 >= store.physical_size:
+            store._drop_head(self._head)
+            self._head = 0
+        return store.physical_size
+
+    def rows(self, store) -> Sequence[int]:
+        return range(self._live_start(store, time.time()), store.physical_size)
+
+    def reset(self) -> None:
+        self._head = 0
@@ -0,0 +1,201 @@
+import time
+import threading
+from array import array
+from typing import Callable, Optional, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+
+class _Series:
+    """Fixed-capacity ring buffer of timestamped samples of one source."""
+
+    __slots__ = ('read', 'fields', 'timestamps', 'values', 'start', 'size')
+
+    def __init__(self, read: Callable[[], Sequence[float]], fields: Sequence[str], capacity: int):
+        self.read = read
+        self.fields = tuple(fields)
+        self.timestamps = array('d', bytes(8 * capacity))
+        self.values = [array('d', bytes(8 * capacity)) for _ in self.fields]
+        self.start = 0
+        self.size = 0
+
+    def append(self, timestamp: float, values: Sequence[float]):
+        capacity = len(self.timestamps)
+        if self.size < capacity:
+            index = (self.start + self.size) % capacity
+            self.size += 1
+        else:
+            index = self.start
+            self.start = (self.start + 1) % capacity
+        self.timestamps[index] = timestamp
+        for column, value in zip(self.values, values):
+            column[index] = value
+
+    def _physical(self, position: int) -> int:
+        return (self.start + position) % len(self.timestamps)
+
+    def _bisect(self, timestamp: float, inclusive: bool = True) -> int:
+        """Return the number of samples taken before (or, if inclusive, at) `timestamp`."""
+        low, high = 0, self.size
+        while low < high:
+            middle = (low + high) // 2
+            sampled = self.timestamps[self._physical(middle)]
+            if sampled < timestamp or (inclusive and sampled == timestamp):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def value_at(self, timestamp: float) -> Tuple[float, ...]:
+        after = self._bisect(timestamp)
+        if after == 0:
+            index = self._physical(0)
+            return tuple(column[index] for column in self.values)
+        if after == self.size:
+            index = self._physical(self.size - 1)
+            return tuple(column[index] for column in self.values)
+        left, right = self._physical(after - 1), self._physical(after)
+        t0, t1 = self.timestamps[left], self.timestamps[right]
+        weight = (timestamp - t0) / (t1 - t0) if t1 > t0 else 0.0
+        return tuple(column[left] + (column[right] - column[left]) * weight for column in self.values)
+
+    def max_between(self, field: int, start: float, end: float) -> Optional[float]:
+        column = self.values[field]
+        first, last = self._bisect(start, inclusive=False), self._bisect(end)
+        if first >= last:
+            return None
+        return max(column[self._physical(position)] for position in range(first, last))
+
+
+class MetricsSampler:
+    """Background thread that polls registered counter sources into timestamped ring buffers.
+
+    Profilers given a sampler read their section boundaries from the buffers, interpolating
+    linearly between the two samples around each boundary, so the polling syscalls run on the
+    sampler thread rather than on the profiled thread. Boundaries after the latest sample use
+    that sample, so resolution is bounded by `interval`. The buffers double as continuous time
+    series (see `series`).
+    """
+
+    def __init__(self, interval: float = 0.01, capacity: int = 4096):
+        """
+        Initialize the MetricsSampler.
+
+        Args:
+            interval: Seconds between polls of all registered sources (default: 0.01, i.e. 100 Hz).
+            capacity: Number of samples kept per source; older samples are overwritten.
+        """
+        if interval <= 0:
+            raise ValueError(f"interval must be positive, got {interval}")
+        if capacity < 2:
+            raise ValueError(f"capacity must be at least 2, got {capacity}")
+        self.interval = interval
+        self.capacity = capacity
+        self._series: Dict[str, _Series] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    def register(self, name: str, read: Callable[[], Sequence[float]], fields: Sequence[str]):
+        """
+        Register a source and start the sampler thread if it is not running.
+
+        Registering an existing name is a no-op, so profilers with the same configuration share
+        one source. The source is sampled once immediately.
+
+        Args:
+            name: Unique source name.
+            read: Callable returning one number per field.
+            fields: Names of the values returned by `read`.
+        """
+        with self._lock:
+            if name in self._series:
+                return
+            series = self._series[name] = _Series(read, fields, self.capacity)
+        self._poll(series)
+        self.start()
+
+    def unregister(self, name: str):
+        """Stop polling a source and drop its samples."""
+        with self._lock:
+            self._series.pop(name, None)
+
+    def start(self):
+        """Start the background thread (no-op if it is running)."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stop_event = threading.Event()
+            self._thread = threading.Thread(
+                target=self._run, args=(self._stop_event,), name='smartprofiler-metrics-sampler', daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        """Stop the background thread; registered sources and their samples are kept."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+            self._stop_event.set()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def _run(self, stop_event: threading.Event):
+        while not stop_event.wait(self.interval):
+            self.sample_now()
+
+    def _poll(self, series: _Series):
+        started = time.perf_counter()
+        try:
+            values = series.read()
+        except Exception:
+            return  # a failed poll leaves a gap that the neighbouring samples interpolate over
+        timestamp = (started + time.perf_counter()) / 2
+        with self._lock:
+            series.append(timestamp, values)
+
+    def sample_now(self):
+        """Poll every registered source once."""
+        with self._lock:
+            sources = list(self._series.values())
+        for series in sources:
+            self._poll(series)
+
+    def value_at(self, name: str, timestamp: Optional[float] = None) -> Optional[Tuple[float, ...]]:
+        """
+        Return a source's values at a time.perf_counter() timestamp, or None if it has no samples.
+
+        Args:
+            name: Source name.
+            timestamp: Time to read (default: now).
+        """
+        if timestamp is None:
+            timestamp = time.perf_counter()
+        with self._lock:
+            series = self._series.get(name)
+            if series is None or series.size == 0:
+                return None
+            return series.value_at(timestamp)
+
+    def max_between(self, name: str, field: str, start: float, end: float) -> Optional[float]:
+        """Return the largest sampled value of a field between two timestamps, or None if no sample falls in between."""
+        with self._lock:
+            series = self._series.get(name)
+            if series is None:
+                return None
+            return series.max_between(series.fields.index(field), start, end)
+
+    def series(self, name: str) -> Dict[str, np.ndarray]:
+        """Return a source's samples, oldest first, as NumPy arrays keyed by 'timestamp' and field name."""
+        with self._lock:
+            series = self._series[name]
+            order = [series._physical(position) for position in range(series.size)]
+            result = {'timestamp': np.array([series.timestamps[index] for index in order])}
+            for field, column in zip(series.fields, series.values):
+                result[field] = np.array([column[index] for index in order])
+            return result
+
+    @property
+    def sources(self) -> List[str]:
+        """Names of the registered sources."""
+        with self._lock:
+            return list(self._series)
@@ -0,0 +1,261 @@
+import sys
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from types import CodeType
+from typing import Callable, Optional, Dict, List, Tuple, Iterator
+from .base_profiler import BaseProfiler
+from .function_profiler import _function_key
+
+
+class _StackNode:
+    """Node of the sampled call-stack trie, keyed by code object."""
+
+    __slots__ = ('code', 'count', 'self_count', 'children')
+
+    def __init__(self, code: Optional[CodeType]):
+        self.code = code
+        self.count = 0
+        self.self_count = 0
+        self.children: Dict[CodeType, '_StackNode'] = {}
+
+
+class _Section:
+    """Samples attributed to one open profiling section."""
+
+    __slots__ = ('samples', 'leaf_counts')
+
+    def __init__(self):
+        self.samples = 0
+        self.leaf_counts: Dict[CodeType, int] = {}
+
+
+class SamplingProfiler(BaseProfiler):
+    """Statistical profiler that periodically samples the call stacks of running threads.
+
+    A background thread snapshots `sys._current_frames()` every `interval` seconds and folds the
+    stacks into a trie keyed by code object. Profiled code is never instrumented, so overhead
+    depends only on the sampling rate. Sections shorter than `interval` may receive no samples.
+
+    The sampler thread starts with the first section and keeps running while sections come and
+    go; it exits after `idle_timeout` seconds without open sections, unless kept alive by `start`.
+    Entering and leaving a section therefore only registers the thread under a lock.
+    """
+
+    def __init__(
+        self,
+        interval: float = 0.01,
+        logger: Optional[logging.Logger] = None,
+        all_threads: bool = False,
+        max_depth: int = 128,
+        top_n: int = 5,
+        idle_timeout: float = 1.0,
+        **kwargs
+    ):
+        """
+        Initialize the SamplingProfiler.
+
+        Args:
+            interval: Seconds between samples (default: 0.01, i.e. 100 Hz).
+            logger: Custom logger instance (default: None, uses default logger).
+            all_threads: If True, sample every thread while the sampler runs; otherwise only threads
+                  inside a profiled section.
+            max_depth: Maximum number of frames kept per sampled stack.
+            top_n: Number of hottest functions reported in each section's metrics.
+            idle_timeout: Seconds the sampler thread keeps running without open sections.
+            **kwargs: Additional arguments passed to BaseProfiler (e.g., log_level, enable_logging).
+        """
+        super().__init__(logger=logger, **kwargs)
+        if interval <= 0:
+            raise ValueError(f"interval must be positive, got {interval}")
+        self.interval = interval
+        self.all_threads = all_threads
+        self.max_depth = max_depth
+        self.top_n = top_n
+        if idle_timeout < 0:
+            raise ValueError(f"idle_timeout must not be negative, got {idle_timeout}")
+        self.idle_timeout = idle_timeout
+        self.total_samples = 0
+        self._root = _StackNode(None)
+        self._sections: Dict[int, List[_Section]] = {}
+        self._lock = threading.Lock()
+        self._users = 0
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    def start(self):
+        """Keep the background sampler running until the matching `stop` (refcounted)."""
+        with self._lock:
+            self._users += 1
+            self._ensure_thread()
+
+    def stop(self):
+        """Release a `start`; the sampler stops at once if no section is open either."""
+        with self._lock:
+            if self._users == 0:
+                return
+            self._users -= 1
+            if self._users > 0 or self._sections:
+                return
+            thread, self._thread = self._thread, None
+            self._stop_event.set()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def _ensure_thread(self):
+        """Start the sampler thread if it is not running; the caller holds the lock."""
+        if self._thread is not None:
+            return
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(self._stop_event,), name='smartprofiler-sampler',
+                                        daemon=True)
+        self._thread.start()
+
+    def _run(self, stop_event: threading.Event):
+        own_ident = threading.get_ident()
+        idle_since = None
+        while not stop_event.wait(self.interval):
+            self._take_sample(own_ident)
+            with self._lock:
+                if self._sections or self._users:
+                    idle_since = None
+                    continue
+                now = time.monotonic()
+                if idle_since is None:
+                    idle_since = now
+                elif now - idle_since >= self.idle_timeout:
+                    if self._thread is threading.current_thread():
+                        self._thread = None
+                    return
+
+    def _take_sample(self, own_ident: int):
+        frames = sys._current_frames()
+        with self._lock:
+            for ident, frame in frames.items():
+                if ident == own_ident:
+                    continue
+                sections = self._sections.get(ident)
+                if not sections and not self.all_threads:
+                    continue
+                codes = []
+                while frame is not None and len(codes) < self.max_depth:
+                    codes.append(frame.f_code)
+                    frame = frame.f_back
+                if not codes:
+                    continue
+                node = self._root
+                node.count += 1
+                for code in reversed(codes):
+                    child = node.children.get(code)
+                    if child is None:
+                        child = node.children[code] = _StackNode(code)
+                    child.count += 1
+                    node = child
+                node.self_count += 1
+                self.total_samples += 1
+                if sections:
+                    leaf = codes[0]
+                    for section in sections:
+                        section.samples += 1
+                        section.leaf_counts[leaf] = section.leaf_counts.get(leaf, 0) + 1
+
+    def _enter_section(self) -> _Section:
+        section = _Section()
+        with self._lock:
+            self._sections.setdefault(threading.get_ident(), []).append(section)
+            self._ensure_thread()
+        return section
+
+    def _exit_section(self, section: _Section) -> Dict:
+        ident = threading.get_ident()
+        with self._lock:
+            sections = self._sections.get(ident, [])
+            if section in sections:
+                sections.remove(section)
+            if not sections:
+                self._sections.pop(ident, None)
+        hottest = sorted(section.leaf_counts.items(), key=lambda item: item[1], reverse=True)[:self.top_n]
+        return {
+            'samples': section.samples,
+            'sampled_time': section.samples * self.interval,
+            'top_functions': {_function_key(code): count for code, count in hottest},
+        }
+
+    def _log_section(self, label: str, metrics: Dict, timestamp: float):
+        self._log_event(label, metrics, timestamp, "%s collected %d samples (~%.4f seconds)",
+                        label, metrics['samples'], metrics['sampled_time'])
+
+    def profile_function(self, func: Callable) -> Callable:
+        """Decorator to sample the call stacks of a function while it runs."""
+        def profile_logic(func, *args, **kwargs):
+            section = self._enter_section()
+            try:
+                result = func(*args, **kwargs)
+            finally:
+                metrics = self._exit_section(section)
+                label = f"Function '{func.__name__}'"
+                self._log_section(label, metrics, self._record_stat(label, metrics))
+            return result
+        return self._wrap_function(func, profile_logic)
+
+    @contextmanager
+    def profile_block(self, label: str = "Sampled block"):
+        """Context manager to sample the call stacks of a block of code."""
+        section = self._enter_section()
+        try:
+            yield
+        finally:
+            metrics = self._exit_section(section)
+            self._log_section(label, metrics, self._record_stat(label, metrics))
+
+    @contextmanager
+    def profile_line(self, label: str = "Sampled line(s)"):
+        """Context manager to sample the call stacks of a specific line or small block."""
+        section = self._enter_section()
+        try:
+            yield
+        finally:
+            metrics = self._exit_section(section)
+            self._log_section(label, metrics, self._record_stat(label, metrics))
+
+    def iter_stacks(self) -> Iterator[Tuple[Tuple[str, ...], int]]:
+        """
+        Yield every sampled stack with its self-sample count, depth first.
+
+        Yields:
+            (frames, count) pairs, where frames runs from the outermost to the innermost function.
+        """
+        with self._lock:
+            pending = [((), child) for child in self._root.children.values()]
+            result = []
+            while pending:
+                prefix, node = pending.pop()
+                frames = prefix + (_function_key(node.code),)
+                if node.self_count:
+                    result.append((frames, node.self_count))
+                pending.extend((frames, child) for child in node.children.values())
+        return iter(result)
+
+    def get_stack_counts(self) -> Dict[Tuple[str, ...], int]:
+        """Return the self-sample count of every sampled stack."""
+        return dict(self.iter_stacks())
+
+    def get_function_samples(self) -> Dict[str, Dict[str, int]]:
+        """Return {'self': samples, 'total': samples} per function across all sampled stacks."""
+        totals: Dict[str, Dict[str, int]] = {}
+        for frames, count in self.iter_stacks():
+            for index, frame in enumerate(frames):
+                if frame in frames[:index]:
+                    continue
+                entry = totals.setdefault(frame, {'self': 0, 'total': 0})
+                entry['total'] += count
+            totals[frames[-1]]['self'] += count
+        return totals
+
+    def clear_stats(self):
+        """Clear collected statistics and the sampled stack trie."""
+        super().clear_stats()
+        with self._lock:
+            self._root = _StackNode(None)
+            self.total_samples = 0
@@ -0,0 +1,184 @@
+import socket
+import threading
+import weakref
+from contextvars import ContextVar
+from typing import Any, Dict, List, Tuple
+
+# Collectors of the profiling sections active in the current thread or asyncio task
+_active_collectors: ContextVar[Tuple['_SocketCollector', ...]] = ContextVar('smartprofiler_socket_collectors', default=())
+
+# Marker for a socket.socket attribute that was inherited rather than defined on the class
+_MISSING = object()
+
+# Per-socket cache of the formatted peer address, so getpeername() runs once per connection
+_peer_cache: 'weakref.WeakKeyDictionary[socket.socket, str]' = weakref.WeakKeyDictionary()
+
+ENDPOINT_FIELDS = ('bytes_sent', 'bytes_recv', 'send_calls', 'recv_calls')
+
+
+def _format_address(address: Any) -> str:
+    """Format a socket address as 'host:port', '[v6host]:port' or 'unix:path'."""
+    if isinstance(address, (str, bytes)):
+        if isinstance(address, bytes):
+            address = address.decode('utf-8', 'backslashreplace')
+        return f"unix:{address}" if address else 'unix:<unnamed>'
+    if not address:
+        return ''
+    host, port = address[0], address[1]
+    return f"[{host}]:{port}" if ':' in host else f"{host}:{port}"
+
+
+def _peer_of(sock: socket.socket) -> str:
+    peer = _peer_cache.get(sock)
+    if peer is None:
+        try:
+            peer = _format_address(sock.getpeername())
+        except OSError:
+            return '<unconnected>'
+        _peer_cache[sock] = peer
+    return peer
+
+
+def _account(sock: socket.socket, address: Any, nbytes: int, sending: bool):
+    collectors = _active_collectors.get()
+    if not collectors:
+        return
+    endpoint = _peer_of(sock) if address is None else _format_address(address)
+    for collector in collectors:
+        collector.add(endpoint, nbytes, sending)
+
+
+def _nbytes(data: Any) -> int:
+    with memoryview(data) as view:
+        return view.nbytes
+
+
+def _make_wrappers(originals: Dict[str, Any]) -> Dict[str, Any]:
+    send, sendall, sendto = originals['send'], originals['sendall'], originals['sendto']
+    recv, recv_into = originals['recv'], originals['recv_into']
+    recvfrom, recvfrom_into = originals['recvfrom'], originals['recvfrom_into']
+
+    def wrapped_send(self, data, *args):
+        sent = send(self, data, *args)
+        _account(self, None, sent, True)
+        return sent
+
+    def wrapped_sendall(self, data, *args):
+        result = sendall(self, data, *args)
+        _account(self, None, _nbytes(data), True)
+        return result
+
+    def wrapped_sendto(self, data, *args):
+        sent = sendto(self, data, *args)
+        _account(self, args[-1], sent, True)
+        return sent
+
+    def wrapped_recv(self, *args):
+        data = recv(self, *args)
+        _account(self, None, len(data), False)
+        return data
+
+    def wrapped_recv_into(self, *args, **kwargs):
+        received = recv_into(self, *args, **kwargs)
+        _account(self, None, received, False)
+        return received
+
+    def wrapped_recvfrom(self, *args):
+        data, address = recvfrom(self, *args)
+        _account(self, address, len(data), False)
+        return data, address
+
+    def wrapped_recvfrom_into(self, *args, **kwargs):
+        received, address = recvfrom_into(self, *args, **kwargs)
+        _account(self, address, received, False)
+        return received, address
+
+    return {
+        'send': wrapped_send,
+        'sendall': wrapped_sendall,
+        'sendto': wrapped_sendto,
+        'recv': wrapped_recv,
+        'recv_into': wrapped_recv_into,
+        'recvfrom': wrapped_recvfrom,
+        'recvfrom_into': wrapped_recvfrom_into,
+    }
+
+
+class _SocketPatch:
+    """Refcounted patch of the socket.socket data methods, installed while any collector is active.
+
+    asyncio's selector transports call these methods on their sockets, so transport traffic is
+    counted too. Writes are attributed to the task calling `transport.write`; reads run in the
+    transport's callbacks and are attributed to the context that opened the connection.
+    TLS sockets (ssl.SSLSocket) override these methods and are not counted.
+    """
+
+    METHODS = ('send', 'sendall', 'sendto', 'recv', 'recv_into', 'recvfrom', 'recvfrom_into')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._users = 0
+        self._saved: Dict[str, Any] = {}
+
+    def acquire(self):
+        with self._lock:
+            self._users += 1
+            if self._users > 1:
+                return
+            self._saved = {name: socket.socket.__dict__.get(name, _MISSING) for name in self.METHODS}
+            originals = {name: getattr(socket.socket, name) for name in self.METHODS}
+            for name, wrapper in _make_wrappers(originals).items():
+                setattr(socket.socket, name, wrapper)
+
+    def release(self):
+        with self._lock:
+            if self._users == 0:
+                return
+            self._users -= 1
+            if self._users > 0:
+                return
+            for name, saved in self._saved.items():
+                if saved is _MISSING:
+                    delattr(socket.socket, name)
+                else:
+                    setattr(socket.socket, name, saved)
+            self._saved = {}
+
+    @property
+    def active(self) -> bool:
+        return self._users > 0
+
+
+_patch = _SocketPatch()
+
+
+class _SocketCollector:
+    """Socket traffic of one profiling section, counted per remote endpoint."""
+
+    def __init__(self):
+        self.endpoints: Dict[str, List[int]] = {}
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Patch the socket methods if needed and attribute traffic in the current context to this collector."""
+        _patch.acquire()
+        _active_collectors.set(_active_collectors.get() + (self,))
+
+    def stop(self):
+        """Stop attributing traffic to this collector."""
+        _active_collectors.set(tuple(collector for collector in _active_collectors.get() if collector is not self))
+        _patch.release()
+
+    def add(self, endpoint: str, nbytes: int, sending: bool):
+        offset = 0 if sending else 1
+        with self._lock:
+            counts = self.endpoints.get(endpoint)
+            if counts is None:
+                counts = self.endpoints[endpoint] = [0, 0, 0, 0]
+            counts[offset] += nbytes
+            counts[offset + 2] += 1
+
+    def to_dict(self) -> Dict[str, Dict[str, int]]:
+        """Return {endpoint: {'bytes_sent', 'bytes_recv', 'send_calls', 'recv_calls'}}."""
+        with self._lock:
+            return {endpoint: dict(zip(ENDPOINT_FIELDS, counts)) for endpoint, counts in self.endpoints.items()}
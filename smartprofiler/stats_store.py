@@ -0,0 +1,451 @@
+import time
+import operator
+import threading
+from abc import ABC, abstractmethod
+from array import array
+from collections import deque
+from typing import Any, Deque, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .retention import RetentionPolicy
+
+
+class StatsStore(ABC):
+    """Abstract storage backend for profiling events collected by a profiler."""
+
+    @abstractmethod
+    def record(self, label: str, metrics: Dict[str, Any], timestamp: Optional[float] = None) -> None:
+        """Store a single profiling event."""
+        pass
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Remove all stored events."""
+        pass
+
+    @abstractmethod
+    def __len__(self) -> int:
+        pass
+
+    @abstractmethod
+    def __iter__(self) -> Iterator[Dict]:
+        """Yield events as {'label', 'metrics', 'timestamp'} dicts, oldest first."""
+        pass
+
+    def append(self, stat: Dict) -> None:
+        """List-style append of an event dict, kept for code written against the old `stats` list."""
+        self.record(stat['label'], stat['metrics'], stat.get('timestamp'))
+
+    def to_list(self) -> List[Dict]:
+        """Materialize all stored events as a list of dicts."""
+        return list(self)
+
+    def __getitem__(self, index: Union[int, slice]):
+        return self.to_list()[index]
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+
+class ListStatsStore(StatsStore):
+    """Store that keeps every event as a plain dict (the pre-columnar behaviour)."""
+
+    def __init__(self):
+        self._events: List[Dict] = []
+
+    def record(self, label: str, metrics: Dict[str, Any], timestamp: Optional[float] = None) -> None:
+        self._events.append({
+            'label': label,
+            'metrics': metrics,
+            'timestamp': time.time() if timestamp is None else timestamp,
+        })
+
+    def clear(self) -> None:
+        self._events.clear()
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def __iter__(self) -> Iterator[Dict]:
+        return iter(list(self._events))
+
+    def __getitem__(self, index: Union[int, slice]):
+        return self._events[index]
+
+
+def _column_typecode(value: Any) -> Optional[str]:
+    """Return the array typecode able to hold `value`, or None for generic Python objects."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return 'q'
+    if isinstance(value, float):
+        return 'd'
+    return None
+
+
+# Python type accepted unchecked by a column of each typecode (None: object columns accept anything)
+_PYTYPES = {'q': int, 'd': float, None: None}
+
+# Maximum number of buffered events converted to columns at once
+_BATCH_SIZE = 256
+
+
+class _Column:
+    """A single metric column: typed values plus a presence flag per row.
+
+    `pytype` is the Python type appended without any checks (int for 'q', float for 'd', None for
+    object columns, which take anything); `append_value` and `append_present` are the bound
+    appenders of the current buffers.
+    """
+
+    __slots__ = ('typecode', 'values', 'present', 'pytype', 'append_value', 'append_present')
+
+    def __init__(self, size: int, value: Any):
+        self.typecode = _column_typecode(value)
+        if self.typecode is None:
+            self.values = [None] * size
+        else:
+            self.values = array(self.typecode, bytes(size * array(self.typecode).itemsize))
+        self.present = bytearray(size)
+        self._bind()
+
+    def _bind(self) -> None:
+        self.pytype = _PYTYPES[self.typecode]
+        self.append_value = self.values.append
+        self.append_present = self.present.append
+
+    def _to_objects(self) -> None:
+        self.values = list(self.values)
+        self.typecode = None
+        self._bind()
+
+    def _promote(self, value: Any) -> None:
+        """Widen the column so that it can hold `value` (int -> float -> object)."""
+        typecode = _column_typecode(value)
+        if self.typecode == 'q' and typecode == 'd':
+            self.values = array('d', self.values)
+            self.typecode = 'd'
+            self._bind()
+        elif self.typecode == 'd' and typecode == 'q':
+            pass
+        else:
+            self._to_objects()
+
+    def _fits(self, value: Any) -> bool:
+        if self.typecode is None:
+            return True
+        typecode = _column_typecode(value)
+        if typecode == self.typecode:
+            return True
+        return self.typecode == 'd' and typecode == 'q'
+
+    def set(self, row: int, value: Any) -> None:
+        if not self._fits(value):
+            self._promote(value)
+        try:
+            self.values[row] = value
+        except OverflowError:
+            self._to_objects()
+            self.values[row] = value
+        self.present[row] = 1
+
+    def set_missing(self, row: int) -> None:
+        self.present[row] = 0
+
+    def drop_head(self, count: int) -> None:
+        del self.values[:count]
+        del self.present[:count]
+
+    def append(self, value: Any) -> None:
+        if not self._fits(value):
+            self._promote(value)
+        try:
+            self.append_value(value)
+        except OverflowError:
+            self._to_objects()
+            self.append_value(value)
+        self.append_present(1)
+
+    def append_missing(self) -> None:
+        self.values.append(None if self.typecode is None else 0)
+        self.present.append(0)
+
+    def get(self, row: int) -> Any:
+        return self.values[row]
+
+
+class ColumnarStatsStore(StatsStore):
+    """Array-backed event store.
+
+    Labels are interned to integer IDs and every metric key gets its own typed column
+    (`array('q')` for ints, `array('d')` for floats, a plain list for anything else), next to
+    a label-ID column and a timestamp column. Event dicts are only built when the events
+    are read back through iteration, `to_list()` or indexing.
+
+    Without a retention policy, recorded events are buffered and converted to columns in
+    batches of up to `_BATCH_SIZE` (and whenever the store is read), so the per-event cost of
+    `record` is little more than a list append.
+
+    Args:
+        retention: Optional RetentionPolicy bounding which events are kept (default: keep all).
+    """
+
+    def __init__(self, retention: Optional[RetentionPolicy] = None):
+        self.retention = retention
+        self._lock = threading.Lock()
+        self._label_ids: Dict[str, int] = {}
+        self._labels: List[str] = []
+        self._init_columns()
+
+    def _init_columns(self) -> None:
+        self._label_column = array('I')
+        self._timestamps = array('d')
+        self._columns: Dict[str, _Column] = {}
+        self._size = 0
+        # Appended to without the lock (deque appends and pops are atomic); drained under it
+        self._pending: Deque[Tuple[str, Dict[str, Any], float]] = deque()
+
+    def _intern(self, label: str) -> int:
+        label_id = self._label_ids.get(label)
+        if label_id is None:
+            label_id = len(self._labels)
+            self._label_ids[label] = label_id
+            self._labels.append(label)
+        return label_id
+
+    def record(self, label: str, metrics: Dict[str, Any], timestamp: Optional[float] = None) -> None:
+        if timestamp is None:
+            timestamp = time.time()
+        if self.retention is None:
+            pending = self._pending
+            pending.append((label, metrics, timestamp))
+            if len(pending) >= _BATCH_SIZE:
+                self._flush()
+            return
+        with self._lock:
+            row = self.retention.admit(self, label, timestamp)
+            if row is None:
+                return
+            if row < self._size:
+                self._write_row(row, label, metrics, timestamp)
+                return
+            self._append_row(label, metrics, timestamp)
+
+    def _append_row(self, label: str, metrics: Dict[str, Any], timestamp: float) -> None:
+        self._label_column.append(self._intern(label))
+        self._timestamps.append(timestamp)
+        columns = self._columns
+        if metrics.keys() == columns.keys():
+            # Fast path: the event reports exactly the known metrics (the usual case)
+            for key, value in metrics.items():
+                column = columns[key]
+                pytype = column.pytype
+                if pytype is None or type(value) is pytype:
+                    try:
+                        column.append_value(value)
+                    except OverflowError:
+                        column.append(value)
+                        continue
+                    column.append_present(1)
+                else:
+                    column.append(value)
+            self._size += 1
+            return
+        for key, column in columns.items():
+            if key in metrics:
+                column.append(metrics[key])
+            else:
+                column.append_missing()
+        for key, value in metrics.items():
+            if key not in columns:
+                column = _Column(self._size, value)
+                column.append(value)
+                columns[key] = column
+        self._size += 1
+
+    def _flush_pending(self) -> None:
+        """Convert the buffered events to columns; the caller holds the lock."""
+        if not self._pending:
+            return
+        popleft = self._pending.popleft
+        pending = [popleft() for _ in range(len(self._pending))]
+        labels, events, timestamps = zip(*pending)
+        keys = events[0].keys()
+        columns = self._columns
+        # Events of the same size that all have the first event's keys report exactly its metrics
+        gathered = None
+        if all(map(len(keys).__eq__, map(len, events))):
+            try:
+                gathered = {key: list(map(operator.itemgetter(key), events)) for key in keys}
+            except KeyError:
+                pass
+        if gathered is None:
+            for label, metrics, timestamp in pending:
+                self._append_row(label, metrics, timestamp)
+            return
+        # Every event reports the same metrics: fill each column with one bulk extend
+        for key in keys:
+            if key not in columns:
+                columns[key] = _Column(self._size, events[0][key])
+        count = len(pending)
+        for label in dict.fromkeys(labels):
+            self._intern(label)
+        self._label_column.extend(array('I', map(self._label_ids.__getitem__, labels)))
+        self._timestamps.extend(array('d', timestamps))
+        present = b'\x01' * count
+        for key, column in columns.items():
+            if key not in keys:
+                for _ in range(count):
+                    column.append_missing()
+                continue
+            values = gathered[key]
+            if column.typecode is None:
+                column.values.extend(values)
+                column.present.extend(present)
+                continue
+            if set(map(type, values)) == {column.pytype}:
+                try:
+                    chunk = array(column.typecode, values)
+                except OverflowError:
+                    pass
+                else:
+                    column.values.extend(chunk)
+                    column.present.extend(present)
+                    continue
+            for value in values:
+                column.append(value)
+        self._size += count
+
+    def _flush(self) -> None:
+        if self._pending:
+            with self._lock:
+                self._flush_pending()
+
+    def _write_row(self, row: int, label: str, metrics: Dict[str, Any], timestamp: float) -> None:
+        """Overwrite an existing row in place (used by retention policies)."""
+        self._label_column[row] = self._intern(label)
+        self._timestamps[row] = timestamp
+        for key, column in self._columns.items():
+            if key in metrics:
+                column.set(row, metrics[key])
+            else:
+                column.set_missing(row)
+        for key, value in metrics.items():
+            if key not in self._columns:
+                column = _Column(self._size, value)
+                column.set(row, value)
+                self._columns[key] = column
+
+    def _drop_head(self, count: int) -> None:
+        """Physically remove the `count` oldest rows (used by retention policies)."""
+        del self._label_column[:count]
+        del self._timestamps[:count]
+        for column in self._columns.values():
+            column.drop_head(count)
+        self._size -= count
+
+    def clear(self) -> None:
+        with self._lock:
+            self._init_columns()
+            if self.retention is not None:
+                self.retention.reset()
+
+    @property
+    def physical_size(self) -> int:
+        """Number of allocated rows, including rows a retention policy no longer considers live."""
+        self._flush()
+        return self._size
+
+    @property
+    def timestamp_column(self) -> array:
+        """The raw timestamp column, indexed by physical row."""
+        self._flush()
+        return self._timestamps
+
+    def _live_rows(self) -> Sequence[int]:
+        self._flush()
+        if self.retention is None:
+            return range(self._size)
+        return self.retention.rows(self)
+
+    def __len__(self) -> int:
+        if self.retention is None:
+            return self._size + len(self._pending)
+        return len(self._live_rows())
+
+    def _row(self, row: int) -> Dict:
+        metrics = {key: column.get(row) for key, column in self._columns.items() if column.present[row]}
+        return {
+            'label': self._labels[self._label_column[row]],
+            'metrics': metrics,
+            'timestamp': self._timestamps[row],
+        }
+
+    def __iter__(self) -> Iterator[Dict]:
+        for row in self._live_rows():
+            yield self._row(row)
+
+    def __getitem__(self, index: Union[int, slice]):
+        rows = self._live_rows()
+        if isinstance(index, slice):
+            return [self._row(row) for row in rows[index]]
+        try:
+            row = rows[index]
+        except IndexError:
+            raise IndexError("event index out of range") from None
+        return self._row(row)
+
+    @property
+    def labels(self) -> List[str]:
+        """All labels seen so far, indexed by their interned ID."""
+        self._flush()
+        return list(self._labels)
+
+    @property
+    def metric_keys(self) -> List[str]:
+        """Names of all metric columns."""
+        self._flush()
+        return list(self._columns)
+
+    def _live_index(self) -> Optional[np.ndarray]:
+        """Physical indices of the live rows, or None when every row is live and in order."""
+        rows = self._live_rows()
+        if isinstance(rows, range) and rows.start == 0 and rows.stop == self._size:
+            return None
+        return np.fromiter(rows, dtype=np.intp, count=len(rows))
+
+    def _select(self, values: np.ndarray) -> np.ndarray:
+        index = self._live_index()
+        return values if index is None else values[index]
+
+    def label_ids(self) -> np.ndarray:
+        """Return the label-ID column of the live events as a NumPy array."""
+        self._flush()
+        return self._select(np.array(self._label_column, dtype=np.uint32))
+
+    def timestamps(self) -> np.ndarray:
+        """Return the timestamp column of the live events as a NumPy array."""
+        self._flush()
+        return self._select(np.array(self._timestamps, dtype=np.float64))
+
+    def column(self, key: str) -> np.ndarray:
+        """Return a metric column of the live events as a NumPy array.
+
+        Numeric columns are returned as float64 with NaN for events that did not report the
+        metric; non-numeric columns are returned as an object array with None for gaps.
+        """
+        self._flush()
+        column = self._columns.get(key)
+        if column is None:
+            raise KeyError(f"Unknown metric: '{key}'. Available: {list(self._columns)}")
+        present = np.frombuffer(bytes(column.present), dtype=np.uint8).astype(bool)
+        if column.typecode is None:
+            values = np.empty(len(column.values), dtype=object)
+            values[:] = column.values
+            values[~present] = None
+            return self._select(values)
+        values = np.array(column.values, dtype=np.float64)
+        values[~present] = np.nan
+        return self._select(values)
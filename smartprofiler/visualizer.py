@@ -35,10 +35,13 @@ def plot_profiling_stats(
             'NetworkProfiler': 'bytes_sent'
         }
 
+    # Materialize each profiler's stats once; get_stats() builds the event dicts on demand
+    profiler_stats = [profiler.get_stats() for profiler in profilers]
+
     # Collect all labels to align data
     all_labels = set()
-    for profiler in profilers:
-        for stat in profiler.get_stats():
+    for stats in profiler_stats:
+        for stat in stats:
             all_labels.add(stat['label'])
     all_labels = sorted(list(all_labels))  # Convert to list for indexing
 
@@ -82,11 +85,10 @@ def plot_profiling_stats(
         for label in all_labels:
             value = 0
             raw_value = 0
-            for profiler in profilers:
+            for profiler, stats in zip(profilers, profiler_stats):
                 metric_key = metrics.get(profiler.__class__.__name__, 'unknown')
                 if metric_key != metric:
                     continue
-                stats = profiler.get_stats()
                 label_metrics = {stat['label']: stat['metrics'] for stat in stats}
                 metrics_data = label_metrics.get(label, {})
                 raw_value = metrics_data.get(metric_key, 0)
@@ -0,0 +1,188 @@
+import unittest
+import random
+import statistics
+from smartprofiler import CPUProfiler, LogHistogram, MetricAggregate
+
+
+class TestAggregates(unittest.TestCase):
+    def test_histogram_percentiles_within_relative_error(self):
+        rng = random.Random(7)
+        values = [rng.lognormvariate(-5, 1.5) for _ in range(20000)]
+        histogram = LogHistogram(sub_buckets=64)
+        for value in values:
+            histogram.record(value)
+
+        ordered = sorted(values)
+        for q in (50, 90, 99):
+            exact = ordered[int(q / 100 * len(ordered)) - 1]
+            self.assertAlmostEqual(histogram.percentile(q), exact, delta=exact * 0.05)
+
+    def test_histogram_handles_zero_and_negative(self):
+        histogram = LogHistogram()
+        for value in (-4.0, 0.0, 0.0, 8.0):
+            histogram.record(value)
+        self.assertLess(histogram.percentile(0), 0)
+        self.assertEqual(histogram.percentile(50), 0.0)
+        self.assertGreater(histogram.percentile(100), 7.5)
+
+    def test_histogram_handles_non_finite_values(self):
+        histogram = LogHistogram()
+        for value in (float('inf'), 1.0, float('nan'), -float('inf'), 2.0):
+            histogram.record(value)
+        histogram.record_many([float('inf'), float('nan'), 3.0])
+        self.assertEqual(histogram.count, 6)
+        self.assertEqual(histogram.percentile(0), -float('inf'))
+        self.assertGreater(histogram.percentile(50), 0.9)
+        self.assertEqual(histogram.percentile(100), float('inf'))
+
+    def test_batched_values_match_single_values(self):
+        rng = random.Random(11)
+        values = [rng.uniform(-5, 5) for _ in range(500)] + [0, 0.0, 7, 5e-324, 1e3]
+        weights = [rng.choice((1, 2, 0.5)) for _ in values]
+        for batch_weights in (None, weights):
+            single, batched = MetricAggregate(), MetricAggregate()
+            for value, weight in zip(values, batch_weights or [1] * len(values)):
+                single.add(value, weight)
+            batched.add_many(values[:100], batch_weights and batch_weights[:100])
+            batched.add_many(values[100:], batch_weights and batch_weights[100:])
+            for attribute in ('count', 'total', 'mean', 'variance', 'min', 'max'):
+                self.assertAlmostEqual(getattr(batched, attribute), getattr(single, attribute))
+            self.assertEqual(batched.histogram._positive, single.histogram._positive)
+            self.assertEqual(batched.histogram._negative, single.histogram._negative)
+            self.assertEqual(batched.histogram.zero_count, single.histogram.zero_count)
+
+    def test_running_stats_and_merge(self):
+        left, right, combined = MetricAggregate(), MetricAggregate(), MetricAggregate()
+        values = [1.0, 2.0, 4.0, 8.0, 16.0, 3.5]
+        for value in values[:3]:
+            left.add(value)
+        for value in values[3:]:
+            right.add(value)
+        for value in values:
+            combined.add(value)
+        left.merge(right)
+
+        for aggregate in (left, combined):
+            self.assertEqual(aggregate.count, 6)
+            self.assertAlmostEqual(aggregate.mean, statistics.mean(values))
+            self.assertAlmostEqual(aggregate.variance, statistics.variance(values))
+            self.assertEqual((aggregate.min, aggregate.max), (1.0, 16.0))
+        self.assertEqual(left.percentile(50), combined.percentile(50))
+
+    def test_profiler_aggregates_without_raw_events(self):
+        profiler = CPUProfiler(enable_logging=False, store_events=False)
+        for _ in range(50):
+            with profiler.profile_block("block"):
+                pass
+
+        self.assertEqual(profiler.get_stats(), [])
+        aggregates = profiler.get_aggregates()
+        self.assertEqual(aggregates['block']['count'], 50)
+        summary = aggregates['block']['metrics']['execution_time']
+        self.assertEqual(summary['count'], 50)
+        self.assertLessEqual(summary['p50'], summary['p99'])
+        self.assertIsNotNone(profiler.percentile("block", 'execution_time', 99))
+        self.assertIsNone(profiler.percentile("missing", 'execution_time', 99))
+
+        profiler.clear_stats()
+        self.assertEqual(profiler.get_aggregates(), {})
+
+    def test_profiler_histograms_are_opt_in(self):
+        profiler = CPUProfiler(enable_logging=False)
+        for _ in range(300):
+            with profiler.profile_block("block"):
+                pass
+
+        summary = profiler.get_aggregates()['block']['metrics']['execution_time']
+        self.assertEqual(summary['count'], 300)
+        self.assertLessEqual(summary['p50'], summary['p99'])
+        self.assertIsNotNone(profiler.percentile("block", 'execution_time', 50))
+        self.assertIsNone(profiler._aggregates['block'].metrics['execution_time'].histogram)
+
+        profiler = CPUProfiler(enable_logging=False, histograms=True)
+        with profiler.profile_block("block"):
+            pass
+        profiler.get_aggregates()
+        self.assertIsNotNone(profiler._aggregates['block'].metrics['execution_time'].histogram)
+
+    def test_aggregates_computed_from_events_when_disabled(self):
+        profiler = CPUProfiler(enable_logging=False, aggregates=False, sample_every=2)
+        function = profiler.profile_function(lambda: None)
+        for _ in range(10):
+            function()
+
+        self.assertEqual(profiler._aggregates, {})
+        aggregate = profiler.get_aggregates()["Function '<lambda>'"]
+        self.assertEqual(aggregate['count'], 10)
+        self.assertNotIn('sample_weight', aggregate['metrics'])
+        self.assertIsNotNone(profiler.percentile("Function '<lambda>'", 'execution_time', 50))
+        with self.assertRaises(ValueError):
+            CPUProfiler(store_events=False, aggregates=False)
+
+    def test_weighted_values_match_repeated_values(self):
+        weighted, repeated = MetricAggregate(), MetricAggregate()
+        for value in (1.0, 3.0, 8.0):
+            weighted.add(value, weight=4)
+            for _ in range(4):
+                repeated.add(value)
+
+        for attribute in ('count', 'total', 'mean', 'variance', 'min', 'max'):
+            self.assertAlmostEqual(getattr(weighted, attribute), getattr(repeated, attribute))
+        self.assertEqual(weighted.percentile(50), repeated.percentile(50))
+
+    def test_sample_every_scales_aggregates(self):
+        profiler = CPUProfiler(enable_logging=False, sample_every=10)
+
+        @profiler.profile_function
+        def hot(x):
+            return x + 1
+
+        self.assertEqual(sum(hot(i) for i in range(100)), 5050)
+        stats = profiler.get_stats()
+        self.assertEqual(len(stats), 10)
+        self.assertEqual(stats[0]['metrics']['sample_weight'], 10)
+        aggregates = profiler.get_aggregates()["Function 'hot'"]
+        self.assertEqual(aggregates['count'], 100)
+        self.assertEqual(aggregates['metrics']['execution_time']['count'], 100)
+        self.assertNotIn('sample_weight', aggregates['metrics'])
+        self.assertEqual(profiler.get_call_paths()["Function 'hot'"]['count'], 100)
+
+    def test_sample_rate_estimates_call_count(self):
+        random.seed(3)
+        profiler = CPUProfiler(enable_logging=False, store_events=False, sample_rate=0.1)
+
+        @profiler.profile_function
+        def hot():
+            pass
+
+        for _ in range(20000):
+            hot()
+        count = profiler.get_aggregates()["Function 'hot'"]['count']
+        self.assertAlmostEqual(count, 20000, delta=1500)
+
+    def test_sampled_function_does_not_weight_inner_blocks(self):
+        profiler = CPUProfiler(enable_logging=False, sample_every=5)
+
+        @profiler.profile_function
+        def outer():
+            with profiler.profile_block("inner"):
+                pass
+
+        for _ in range(10):
+            outer()
+        aggregates = profiler.get_aggregates()
+        self.assertEqual(aggregates['inner']['count'], 10)
+        self.assertEqual(aggregates["Function 'outer'"]['count'], 10)
+        self.assertEqual(len(profiler.get_stats()), 12)
+
+    def test_invalid_sampling_arguments(self):
+        with self.assertRaises(ValueError):
+            CPUProfiler(sample_rate=0)
+        with self.assertRaises(ValueError):
+            CPUProfiler(sample_every=0)
+        with self.assertRaises(ValueError):
+            CPUProfiler(sample_rate=0.5, sample_every=2)
+
+
+if __name__ == '__main__':
+    unittest.main()
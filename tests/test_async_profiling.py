@@ -0,0 +1,208 @@
+import sys
+import time
+import asyncio
+import inspect
+import logging
+import unittest
+from smartprofiler import CPUProfiler, FunctionProfiler
+
+
+def _quiet_logger():
+    logger = logging.getLogger('test_async_profiling')
+    logger.addHandler(logging.NullHandler())
+    logger.propagate = False
+    return logger
+
+
+def _busy(seconds):
+    end = time.thread_time() + seconds
+    while time.thread_time() < end:
+        pass
+
+
+class TestAsyncProfiling(unittest.TestCase):
+    def setUp(self):
+        self.profiler = CPUProfiler(time_func='wall_time', logger=_quiet_logger(), enable_logging=False)
+
+    def test_coroutine_spans_awaits(self):
+        @self.profiler.profile_function
+        async def handler():
+            await asyncio.sleep(0.05)
+            return 'done'
+
+        self.assertTrue(inspect.iscoroutinefunction(handler))
+        self.assertEqual(asyncio.run(handler()), 'done')
+        stats = self.profiler.get_stats()
+        self.assertEqual(len(stats), 1)
+        metrics = stats[0]['metrics']
+        self.assertGreaterEqual(metrics['wall_time'], 0.04)
+        self.assertGreaterEqual(metrics['task_wall_time'], 0.04)
+        self.assertLess(metrics['task_cpu_time'], 0.03)
+        self.assertGreaterEqual(metrics['task_steps'], 2)
+
+    def test_cpu_time_counts_only_own_steps(self):
+        @self.profiler.profile_function
+        async def worker():
+            _busy(0.03)
+            await asyncio.sleep(0)
+            await asyncio.sleep(0)  # resumes after other() has run its busy step
+
+        async def other():
+            await asyncio.sleep(0)
+            _busy(0.03)
+
+        async def main():
+            await asyncio.gather(worker(), other())
+
+        asyncio.run(main())
+        metrics = self.profiler.get_stats()[0]['metrics']
+        self.assertGreaterEqual(metrics['task_cpu_time'], 0.025)
+        self.assertLess(metrics['task_cpu_time'], 0.05)
+        self.assertGreaterEqual(metrics['task_wall_time'], 0.05)
+
+    def test_generator(self):
+        @self.profiler.profile_function
+        def numbers(n):
+            for i in range(n):
+                yield i
+            return 'end'
+
+        def consume():
+            return (yield from numbers(3))
+
+        gen = consume()
+        self.assertEqual([next(gen), next(gen), next(gen)], [0, 1, 2])
+        with self.assertRaises(StopIteration) as raised:
+            next(gen)
+        self.assertEqual(raised.exception.value, 'end')
+        stats = self.profiler.get_stats()
+        self.assertEqual(len(stats), 1)
+        self.assertEqual(stats[0]['label'], "Function 'numbers'")
+        self.assertEqual(stats[0]['metrics']['task_steps'], 4)
+
+    def test_generator_closed_early(self):
+        @self.profiler.profile_function
+        def numbers():
+            yield from range(10)
+
+        gen = numbers()
+        next(gen)
+        gen.close()
+        self.assertEqual(len(self.profiler.get_stats()), 1)
+
+    def test_async_generator(self):
+        @self.profiler.profile_function
+        async def ticks(n):
+            for i in range(n):
+                await asyncio.sleep(0.01)
+                yield i
+
+        async def main():
+            return [i async for i in ticks(3)]
+
+        self.assertEqual(asyncio.run(main()), [0, 1, 2])
+        stats = self.profiler.get_stats()
+        self.assertEqual(len(stats), 1)
+        self.assertGreaterEqual(stats[0]['metrics']['task_wall_time'], 0.03)
+
+    def test_exception_propagates_and_is_recorded(self):
+        @self.profiler.profile_function
+        async def failing():
+            await asyncio.sleep(0)
+            raise KeyError('missing')
+
+        with self.assertRaises(KeyError):
+            asyncio.run(failing())
+        self.assertEqual(len(self.profiler.get_stats()), 1)
+
+    def test_sample_every_weights_coroutine_events(self):
+        profiler = CPUProfiler(logger=_quiet_logger(), enable_logging=False, sample_every=2)
+
+        @profiler.profile_function
+        async def handler():
+            await asyncio.sleep(0)
+
+        async def main():
+            for _ in range(4):
+                await handler()
+
+        asyncio.run(main())
+        stats = profiler.get_stats()
+        self.assertEqual(len(stats), 2)
+        self.assertEqual(stats[0]['metrics']['sample_weight'], 2.0)
+
+    def test_async_generator_protocol_with_sampling(self):
+        profiler = CPUProfiler(logger=_quiet_logger(), enable_logging=False, sample_every=2)
+        closed = []
+
+        @profiler.profile_function
+        async def echo():
+            received = None
+            try:
+                while True:
+                    try:
+                        received = yield received
+                    except KeyError:
+                        received = 'recovered'
+            finally:
+                closed.append(True)
+
+        async def main():
+            results = []
+            for _ in range(2):  # the first call is sampled, the second is not
+                generator = echo()
+                await generator.asend(None)
+                sent = await generator.asend(41)
+                thrown = await generator.athrow(KeyError('boom'))
+                await generator.aclose()
+                results.append((sent, thrown, len(closed)))
+            return results
+
+        self.assertEqual(asyncio.run(main()), [(41, 'recovered', 1), (41, 'recovered', 2)])
+        self.assertEqual(len(profiler.get_stats()), 1)
+
+    def test_function_profiler_ignores_step_timing(self):
+        profiler = FunctionProfiler(logger=_quiet_logger(), enable_logging=False)
+
+        def helper():
+            pass
+
+        @profiler.profile_function
+        async def handler():
+            helper()
+            await asyncio.sleep(0)
+            helper()
+
+        asyncio.run(handler())
+        metrics = profiler.get_stats()[0]['metrics']
+        self.assertEqual(sum(count for key, count in metrics['calls_by_function'].items() if 'helper' in key), 2)
+
+    def test_function_profiler_counts_resumed_frames_once(self):
+        backends = ['setprofile'] + (['monitoring'] if hasattr(sys, 'monitoring') else [])
+        for backend in backends:
+            with self.subTest(backend=backend):
+                profiler = FunctionProfiler(logger=_quiet_logger(), enable_logging=False, backend=backend)
+
+                def numbers():
+                    yield 1
+                    yield 2
+                    yield 3
+
+                async def inner():
+                    await asyncio.sleep(0)
+                    await asyncio.sleep(0)
+
+                @profiler.profile_function
+                async def handler():
+                    list(numbers())
+                    await inner()
+
+                asyncio.run(handler())
+                calls = profiler.get_stats()[0]['metrics']['calls_by_function']
+                self.assertEqual([count for key, count in calls.items() if 'numbers' in key], [1])
+                self.assertEqual([count for key, count in calls.items() if 'inner' in key], [1])
+                self.assertFalse(any('iscoroutine' in key for key in calls))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import os
+import json
+import tempfile
+import threading
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from smartprofiler import bench
+
+
+def _report(ns_per_call, bytes_per_event):
+    return {'results': [{'profiler': 'cpu', 'mode': 'block', 'logging': False, 'events': 100,
+                         'ns_per_call': ns_per_call, 'bytes_per_event': bytes_per_event}]}
+
+
+class TestBench(unittest.TestCase):
+    def test_bench_case_reports_overhead(self):
+        for mode in bench.MODES:
+            result = bench.bench_case('cpu', mode, logging_enabled=False, events=200, repeat=1)
+            self.assertNotIn('error', result)
+            self.assertGreater(result['ns_per_call'], 0)
+            self.assertGreater(result['bytes_per_event'], 0)
+
+    def test_bench_case_stops_async_log_writers(self):
+        result = bench.bench_case('cpu_async_logging', 'block', logging_enabled=True, events=50, repeat=2)
+        self.assertNotIn('error', result)
+        writers = [thread for thread in threading.enumerate() if thread.name == 'smartprofiler-log-writer']
+        self.assertEqual(writers, [])
+
+    def test_cpu_profiler_stays_within_overhead_budget(self):
+        for mode in ('function', 'block'):
+            # Best of a few runs, so that a busy machine does not fail the budget
+            cost = min(bench.bench_case('cpu', mode, False, events=2000, repeat=3)['relative_cost'] for _ in range(3))
+            self.assertLessEqual(cost, bench.OVERHEAD_BUDGETS[('cpu', mode)], mode)
+
+    def test_check_budgets_flags_cases_over_budget(self):
+        report = _report(1000.0, 100.0)
+        report['results'][0]['relative_cost'] = 7.0
+        self.assertEqual(bench.check_budgets(report, {('cpu', 'block'): 10.0}), [])
+        violations = bench.check_budgets(report, {('cpu', 'block'): 5.0})
+        self.assertEqual([(violation['relative_cost'], violation['budget']) for violation in violations], [(7.0, 5.0)])
+
+    def test_bench_case_rejects_unknown_profiler(self):
+        with self.assertRaises(ValueError):
+            bench.bench_case('gpu', 'block', False, 10)
+
+    def test_compare_flags_regressions_above_threshold_and_noise_floor(self):
+        baseline = _report(1000.0, 100.0)
+        self.assertFalse(bench.compare(_report(1200.0, 100.0), baseline)[0]['regression'])
+        self.assertTrue(bench.compare(_report(1500.0, 100.0), baseline)[0]['regression'])
+        self.assertTrue(bench.compare(_report(1000.0, 200.0), baseline)[0]['regression'])
+        # +50% but only 50 ns: below the absolute floor
+        self.assertFalse(bench.compare(_report(150.0, 100.0), _report(100.0, 100.0))[0]['regression'])
+
+    def test_main_writes_json_and_fails_on_regression(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'bench.json')
+            baseline = os.path.join(directory, 'baseline.json')
+            with open(baseline, 'w', encoding='utf-8') as f:
+                json.dump({'results': [{'profiler': 'cpu', 'mode': 'block', 'logging': False, 'events': 100,
+                                        'ns_per_call': 0.001, 'bytes_per_event': 0.001}]}, f)
+            args = ['--profilers', 'cpu', '--modes', 'block', '--logging', 'off', '--events', '100',
+                    '--repeat', '1', '--output', output, '--baseline', baseline]
+            with redirect_stdout(StringIO()):
+                exit_code = bench.main(args)
+            self.assertEqual(exit_code, 1)
+            with open(output, encoding='utf-8') as f:
+                report = json.load(f)
+            self.assertEqual(len(report['results']), 1)
+            self.assertIn('environment', report)
+
+
+if __name__ == '__main__':
+    unittest.main()
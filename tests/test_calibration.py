@@ -0,0 +1,99 @@
+import os
+import json
+import tempfile
+import unittest
+from unittest.mock import patch
+from smartprofiler import CPUProfiler, OverheadCalibration, RingBufferRetention, calibrate_overhead
+from smartprofiler.calibration import configuration_name
+
+
+def _calibration(inner, outer):
+    return {kind: OverheadCalibration(inner, 0.0, outer, 0.0, 100) for kind in ('function', 'block')}
+
+
+class TestCalibration(unittest.TestCase):
+    def test_calibrate_measures_positive_overhead(self):
+        profiler = CPUProfiler(enable_logging=False)
+        calibration = profiler.calibrate(iterations=200)
+        self.assertEqual(set(calibration), {'function', 'block'})
+        for kind in calibration.values():
+            self.assertGreater(kind.inner, 0)
+            self.assertGreaterEqual(kind.outer, kind.inner)
+
+    def test_correction_subtracts_nested_overhead(self):
+        clock = iter([0.0, 1.0, 2.0, 3.0, 10.0, 20.0])
+        profiler = CPUProfiler(enable_logging=False, calibrate=_calibration(inner=0.5, outer=2.0))
+        profiler.time_func = lambda: next(clock)
+        with profiler.profile_block('outer'):
+            with profiler.profile_block('inner'):
+                pass
+            with profiler.profile_block('inner'):
+                pass
+
+        events = profiler.get_stats()
+        inner = [event['metrics'] for event in events if event['label'] == 'inner']
+        outer = next(event['metrics'] for event in events if event['label'] == 'outer')
+        self.assertEqual([metrics['execution_time'] for metrics in inner], [0.5, 6.5])
+        # 20s raw, minus its own bias and the full cost of both nested sections
+        self.assertEqual(outer['overhead_correction'], 4.5)
+        self.assertEqual(outer['execution_time'], 15.5)
+        self.assertEqual(outer['self_time'], 8.5)
+
+    def test_corrected_duration_is_never_negative(self):
+        profiler = CPUProfiler(enable_logging=False, calibrate=_calibration(inner=1.0, outer=1.0))
+        with profiler.profile_block('empty'):
+            pass
+        metrics = profiler.get_stats()[0]['metrics']
+        self.assertEqual(metrics['execution_time'], 0.0)
+        self.assertIn('overhead_uncertainty', metrics)
+
+    def test_uncalibrated_events_have_no_correction(self):
+        profiler = CPUProfiler(enable_logging=False)
+        with profiler.profile_block('plain'):
+            pass
+        self.assertNotIn('overhead_correction', profiler.get_stats()[0]['metrics'])
+
+    def test_cache_round_trip(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache_path = os.path.join(directory, 'calibration.json')
+            profiler = CPUProfiler(enable_logging=False)
+            first = profiler.calibrate(iterations=50, cache_path=cache_path)
+            with open(cache_path, encoding='utf-8') as f:
+                self.assertEqual(len(json.load(f)), 1)
+
+            def fail():
+                raise AssertionError("cached calibration should not re-measure")
+            cached = calibrate_overhead(fail, 'execution_time', lambda: 0.0,
+                                        configuration_name('CPUProfiler', {'time_func': 'execution_time',
+                                                                           **profiler._configuration()}),
+                                        iterations=50, cache_path=cache_path)
+            self.assertEqual(cached['block'].to_dict(), first['block'].to_dict())
+
+    def test_calibration_uses_full_configuration(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache_path = os.path.join(directory, 'calibration.json')
+            profilers = [
+                CPUProfiler(enable_logging=False),
+                CPUProfiler(enable_logging=False, retention=RingBufferRetention(10)),
+                CPUProfiler(enable_logging=False, store_events=False, sample_every=4),
+            ]
+            measured = []
+            with patch('smartprofiler.cpu_profiler.calibrate_overhead', wraps=calibrate_overhead) as calibrate:
+                for profiler in profilers:
+                    profiler.calibrate(iterations=50, cache_path=cache_path)
+                    measured.append(calibrate.call_args[0][0]())
+            with open(cache_path, encoding='utf-8') as f:
+                self.assertEqual(len(json.load(f)), 3)
+
+        self.assertEqual(measured[1].stats.retention.capacity, 10)
+        self.assertIsNot(measured[1].stats.retention, profilers[1].stats.retention)
+        self.assertFalse(measured[2].store_events)
+        self.assertEqual(measured[2].sample_every, 4)
+
+    def test_invalid_iterations(self):
+        with self.assertRaises(ValueError):
+            CPUProfiler(enable_logging=False).calibrate(iterations=5)
+
+
+if __name__ == '__main__':
+    unittest.main()
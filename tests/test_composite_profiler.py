@@ -0,0 +1,121 @@
+import time
+import unittest
+from unittest.mock import patch, MagicMock
+from smartprofiler import CompositeProfiler, MetricProvider, TimeProvider, MemoryProvider
+
+
+class RecordingProvider(MetricProvider):
+    def __init__(self, name, cost, calls):
+        self.name = name
+        self.cost = cost
+        self.calls = calls
+
+    def start(self):
+        self.calls.append(('start', self.name))
+        return self.name
+
+    def stop(self, state):
+        self.calls.append(('stop', state))
+        return {self.name: 1}
+
+
+class TestCompositeProfiler(unittest.TestCase):
+    def test_expensive_providers_run_outside_cheap_ones(self):
+        calls = []
+        profiler = CompositeProfiler(
+            providers=[RecordingProvider('timer', 0, calls), RecordingProvider('tracemalloc', 100, calls),
+                       RecordingProvider('disk', 20, calls)],
+            enable_logging=False,
+        )
+
+        with profiler.profile_block("ordered"):
+            calls.append(('body', None))
+
+        self.assertEqual(calls, [
+            ('start', 'tracemalloc'), ('start', 'disk'), ('start', 'timer'), ('body', None),
+            ('stop', 'timer'), ('stop', 'disk'), ('stop', 'tracemalloc'),
+        ])
+        self.assertEqual(profiler.get_stats()[0]['metrics'], {'timer': 1, 'tracemalloc': 1, 'disk': 1})
+
+    @patch('smartprofiler.network_profiler.psutil.net_io_counters')
+    @patch('smartprofiler.disk_profiler.psutil.disk_io_counters')
+    def test_single_combined_event(self, mock_disk_io, mock_net_io):
+        mock_disk_io.side_effect = [MagicMock(read_bytes=0, write_bytes=0, read_count=0, write_count=0),
+                                    MagicMock(read_bytes=10, write_bytes=20, read_count=1, write_count=2)]
+        mock_net_io.side_effect = [MagicMock(bytes_sent=0, bytes_recv=0, packets_sent=0, packets_recv=0),
+                                   MagicMock(bytes_sent=5, bytes_recv=6, packets_sent=1, packets_recv=1)]
+        profiler = CompositeProfiler(enable_logging=False)
+
+        @profiler.profile_function
+        def work():
+            time.sleep(0.01)
+            return 42
+
+        self.assertEqual(work(), 42)
+        stats = profiler.get_stats()
+        self.assertEqual(len(stats), 1)
+        metrics = stats[0]['metrics']
+        self.assertGreaterEqual(metrics['execution_time'], 0.01)
+        self.assertIn('rss_mb', metrics)
+        self.assertEqual(metrics['write_bytes'], 20)
+        self.assertEqual(metrics['bytes_recv'], 6)
+        self.assertNotIn('disk_usage', metrics)
+
+    def test_failed_start_stops_started_providers(self):
+        calls = []
+
+        class Failing(MetricProvider):
+            cost = 0
+
+            def start(self):
+                raise RuntimeError("probe failed")
+
+            def stop(self, state):
+                return {}
+
+        profiler = CompositeProfiler(providers=[RecordingProvider('memory', 50, calls), Failing()],
+                                     enable_logging=False)
+        with self.assertRaises(RuntimeError):
+            with profiler.profile_block("broken"):
+                pass
+        self.assertEqual(calls, [('start', 'memory'), ('stop', 'memory')])
+        self.assertEqual(profiler.get_stats(), [])
+
+    def test_failed_stop_stops_remaining_providers(self):
+        calls = []
+
+        class FailingStop(RecordingProvider):
+            def stop(self, state):
+                super().stop(state)
+                raise RuntimeError(f"{state} stop failed")
+
+        profiler = CompositeProfiler(
+            providers=[FailingStop('timer', 0, calls), RecordingProvider('disk', 20, calls),
+                       FailingStop('tracemalloc', 100, calls)],
+            enable_logging=False,
+        )
+        with self.assertRaisesRegex(RuntimeError, "timer stop failed"):
+            with profiler.profile_block("broken"):
+                pass
+        self.assertEqual(calls[3:], [('stop', 'timer'), ('stop', 'disk'), ('stop', 'tracemalloc')])
+        self.assertEqual(profiler.get_stats(), [])
+
+    def test_tracemalloc_memory_provider(self):
+        profiler = CompositeProfiler(providers=[TimeProvider('cpu_time'), MemoryProvider(mode='tracemalloc')],
+                                     enable_logging=False)
+        with profiler.profile_line("alloc"):
+            data = [0] * 100_000
+        metrics = profiler.get_stats()[0]['metrics']
+        self.assertIn('cpu_time', metrics)
+        self.assertGreater(metrics['peak_mb'], 0.5)
+        del data
+
+    def test_invalid_configuration(self):
+        with self.assertRaises(ValueError):
+            CompositeProfiler(providers=[])
+        with self.assertRaises(ValueError):
+            TimeProvider('bogus')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import asyncio
+import logging
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from smartprofiler import CPUProfiler, FunctionProfiler
+from smartprofiler.context import ContextExecutor, current_span, span, wrap
+
+
+def _quiet_logger():
+    logger = logging.getLogger('test_context')
+    logger.addHandler(logging.NullHandler())
+    logger.propagate = False
+    return logger
+
+
+class TestContext(unittest.TestCase):
+    def test_spans_nest_and_share_trace_id(self):
+        self.assertIsNone(current_span())
+        with span("request") as request:
+            with span("query") as query:
+                self.assertIs(current_span(), query)
+                self.assertIs(query.parent, request)
+                self.assertEqual(query.trace_id, request.span_id)
+            self.assertIs(current_span(), request)
+        self.assertIsNone(current_span())
+
+    def test_out_of_order_exit_restores_open_ancestor(self):
+        outer = span("outer")
+        inner = span("inner")
+        outer_span = outer.__enter__()
+        inner.__enter__()
+        outer.__exit__(None, None, None)
+        self.assertTrue(outer_span.closed)
+        inner.__exit__(None, None, None)
+        self.assertIsNone(current_span())
+
+    def test_events_carry_trace_id(self):
+        profiler = CPUProfiler(logger=_quiet_logger(), enable_logging=False)
+        with span("request") as request:
+            with profiler.profile_block("work"):
+                pass
+        with profiler.profile_block("untraced"):
+            pass
+        traced, untraced = profiler.get_stats()
+        self.assertEqual(traced['metrics']['trace_id'], request.trace_id)
+        self.assertEqual(traced['metrics']['context_span_id'], request.span_id)
+        self.assertNotIn('trace_id', untraced['metrics'])
+        self.assertNotIn('trace_id', profiler.get_aggregates()['work']['metrics'])
+
+    def test_cpu_spans_follow_asyncio_tasks(self):
+        profiler = CPUProfiler(logger=_quiet_logger(), enable_logging=False)
+
+        async def request(name):
+            with profiler.profile_block(name):
+                await asyncio.sleep(0)
+                with profiler.profile_block("step"):
+                    await asyncio.sleep(0.01)
+
+        async def main():
+            await asyncio.gather(request("first"), request("second"))
+
+        asyncio.run(main())
+        self.assertEqual(set(profiler.get_call_paths()), {"first", "first;step", "second", "second;step"})
+
+    def test_context_executor_propagates_spans(self):
+        profiler = CPUProfiler(logger=_quiet_logger(), enable_logging=False)
+
+        def worker():
+            with profiler.profile_block("worker"):
+                return current_span()
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            with span("request") as request:
+                with profiler.profile_block("main"):
+                    propagated = ContextExecutor(pool).submit(worker).result()
+                    plain = pool.submit(worker).result()
+                    wrapped = pool.submit(wrap(worker)).result()
+
+        self.assertIs(propagated, request)
+        self.assertIsNone(plain)
+        self.assertIs(wrapped, request)
+        self.assertEqual(profiler.get_call_paths()["main;worker"]['count'], 2)
+        self.assertEqual(profiler.get_call_paths()["worker"]['count'], 1)
+
+    def test_function_profiler_sections_are_isolated(self):
+        profiler = FunctionProfiler(logger=_quiet_logger(), enable_logging=False)
+        barrier = threading.Barrier(2)
+
+        def leaf():
+            pass
+
+        def worker(name, calls):
+            with profiler.profile_block(name):
+                barrier.wait()
+                for _ in range(calls):
+                    leaf()
+                barrier.wait()
+
+        threads = [threading.Thread(target=worker, args=(f"worker{calls}", calls)) for calls in (3, 50)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for event in profiler.get_stats():
+            calls = int(event['label'][len("worker"):])
+            leaf_calls = {key: count for key, count in event['metrics']['calls_by_function'].items() if 'leaf' in key}
+            self.assertEqual(list(leaf_calls.values()), [calls])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import time
+import asyncio
+import logging
+import unittest
+from asyncio import events
+from smartprofiler import EventLoopProfiler
+
+
+def _quiet_logger():
+    logger = logging.getLogger('test_event_loop_profiler')
+    logger.addHandler(logging.NullHandler())
+    logger.propagate = False
+    return logger
+
+
+async def _blocking_step():
+    await asyncio.sleep(0.01)
+    time.sleep(0.08)
+    await asyncio.sleep(0.01)  # the step above ends here
+
+
+class TestEventLoopProfiler(unittest.TestCase):
+    def setUp(self):
+        self.profiler = EventLoopProfiler(logger=_quiet_logger(), enable_logging=False,
+                                          slow_callback_threshold=0.05, heartbeat_interval=0.01)
+
+    def test_block_around_asyncio_run(self):
+        original_run = events.Handle._run
+        with self.profiler.profile_block("serve"):
+            asyncio.run(asyncio.sleep(0.05))
+        self.assertIs(events.Handle._run, original_run)
+        metrics = self.profiler.get_stats()[0]['metrics']
+        self.assertGreater(metrics['callbacks'], 0)
+        self.assertGreaterEqual(metrics['heartbeats'], 2)
+        self.assertEqual(metrics['slow_callback_count'], 0)
+        self.assertLess(metrics['max_lag'], 0.05)
+
+    def test_slow_callback_location_and_lag(self):
+        async def main():
+            await asyncio.gather(_blocking_step(), asyncio.sleep(0.1))
+
+        with self.profiler.profile_block("serve"):
+            asyncio.run(main())
+        metrics = self.profiler.get_stats()[0]['metrics']
+        self.assertEqual(metrics['slow_callback_count'], 1)
+        self.assertGreaterEqual(metrics['max_callback_time'], 0.08)
+        self.assertGreaterEqual(metrics['max_lag'], 0.05)
+        (location, counts), = metrics['slow_callbacks'].items()
+        self.assertEqual(counts['callback'], '_blocking_step')
+        self.assertEqual(location, f"{__file__}:{_blocking_step.__code__.co_firstlineno + 3}")
+
+    def test_profile_coroutine_function(self):
+        @self.profiler.profile_function
+        async def handler():
+            await _blocking_step()
+
+        asyncio.run(handler())
+        stats = self.profiler.get_stats()
+        self.assertEqual(len(stats), 1)
+        self.assertEqual(stats[0]['metrics']['slow_callback_count'], 1)
+        location, = stats[0]['metrics']['slow_callbacks']
+        self.assertTrue(location.startswith(__file__))
+
+    def test_finished_profiled_coroutine_location(self):
+        @self.profiler.profile_function
+        async def handler():
+            await asyncio.sleep(0.01)
+            time.sleep(0.06)  # blocks the task's last step
+
+        async def main():
+            await asyncio.gather(handler(), asyncio.sleep(0.1))
+
+        with self.profiler.profile_block("serve"):
+            asyncio.run(main())
+        stats = self.profiler.get_stats()
+        slow_callbacks = stats[-1]['metrics']['slow_callbacks']
+        self.assertEqual(list(slow_callbacks), [f"{__file__}:{handler.__wrapped__.__code__.co_firstlineno}"])
+        self.assertIn('handler', slow_callbacks[next(iter(slow_callbacks))]['callback'])
+
+    def test_plain_callback_location(self):
+        def hog():
+            time.sleep(0.06)
+
+        async def main():
+            asyncio.get_running_loop().call_soon(hog)
+            await asyncio.sleep(0.08)
+
+        with self.profiler.profile_block("serve"):
+            asyncio.run(main())
+        counts, = self.profiler.get_stats()[0]['metrics']['slow_callbacks'].values()
+        self.assertIn('hog', counts['callback'])
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            EventLoopProfiler(slow_callback_threshold=0)
+        with self.assertRaises(ValueError):
+            EventLoopProfiler(heartbeat_interval=-1)
+
+
+if __name__ == '__main__':
+    unittest.main()
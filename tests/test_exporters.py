@@ -0,0 +1,54 @@
+import unittest
+import json
+import os
+import tempfile
+import time
+from smartprofiler import CPUProfiler, FunctionProfiler, MemoryProfiler, export_folded, export_speedscope
+
+
+class TestExporters(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cpu_profiler = CPUProfiler(enable_logging=False)
+        with self.cpu_profiler.profile_block("outer"):
+            with self.cpu_profiler.profile_block("inner"):
+                time.sleep(0.01)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_export_folded(self):
+        path = export_folded(self.cpu_profiler, os.path.join(self.tmpdir.name, 'cpu.folded'))
+        with open(path) as f:
+            lines = dict(line.rsplit(' ', 1) for line in f.read().splitlines())
+        self.assertIn("outer;inner", lines)
+        self.assertGreaterEqual(int(lines["outer;inner"]), 10000)
+
+    def test_export_speedscope(self):
+        func_profiler = FunctionProfiler(enable_logging=False)
+
+        def helper():
+            pass
+
+        with func_profiler.profile_block("calls"):
+            helper()
+
+        path = export_speedscope([self.cpu_profiler, func_profiler], os.path.join(self.tmpdir.name, 'profile.json'))
+        with open(path) as f:
+            data = json.load(f)
+
+        frames = [frame['name'] for frame in data['shared']['frames']]
+        cpu, calls = data['profiles']
+        self.assertEqual(cpu['unit'], 'seconds')
+        self.assertEqual(len(cpu['samples']), len(cpu['weights']))
+        self.assertIn(["outer", "inner"], [[frames[i] for i in sample] for sample in cpu['samples']])
+        self.assertAlmostEqual(cpu['endValue'], sum(cpu['weights']))
+        self.assertTrue(any(frames[sample[-1]].startswith(helper.__qualname__) for sample in calls['samples']))
+
+    def test_unsupported_profiler(self):
+        with self.assertRaises(TypeError):
+            export_folded(MemoryProfiler(enable_logging=False), os.path.join(self.tmpdir.name, 'x'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+import io
+import builtins
+import mmap
+import os
+import tempfile
+import threading
+import unittest
+from smartprofiler import FileIOProfiler
+
+
+class TestFileIOProfiler(unittest.TestCase):
+    def setUp(self):
+        self.profiler = FileIOProfiler(enable_logging=False)
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'data.bin')
+        with open(self.path, 'wb') as f:
+            f.write(b'x' * 4096)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_open_reads_and_writes_per_path(self):
+        out_path = os.path.join(self.tmpdir.name, 'out.txt')
+        with self.profiler.profile_block("etl"):
+            with open(self.path, 'rb') as f:
+                self.assertEqual(len(f.read(1000)), 1000)
+                buffer = bytearray(96)
+                f.readinto(buffer)
+            with open(out_path, 'w') as f:
+                f.write('hello')
+                f.writelines(['a\n', 'b\n'])
+
+        metrics = self.profiler.get_stats()[0]['metrics']
+        self.assertEqual(metrics['files'][self.path]['bytes_read'], 1096)
+        self.assertEqual(metrics['files'][self.path]['read_ops'], 2)
+        self.assertEqual(metrics['files'][out_path]['bytes_written'], 9)
+        self.assertEqual(metrics['bytes_read'], 1096)
+        self.assertEqual(metrics['write_ops'], 2)
+        self.assertGreater(metrics['io_time'], 0)
+
+    def test_os_read_write(self):
+        existing = mmap.mmap(-1, 16)
+        with self.profiler.profile_block("low_level"):
+            fd = os.open(self.path, os.O_RDWR)
+            try:
+                self.assertEqual(len(os.read(fd, 100)), 100)
+                os.write(fd, b'yy')
+                self.assertIsInstance(existing, mmap.mmap)
+            finally:
+                os.close(fd)
+        existing.close()
+
+        counts = self.profiler.get_stats()[0]['metrics']['files'][self.path]
+        self.assertEqual(counts['bytes_read'], 100)
+        self.assertEqual(counts['bytes_written'], 2)
+
+    def test_closed_file_descriptor_not_reused_for_path(self):
+        with self.profiler.profile_block("reuse"):
+            f = open(self.path, 'rb')
+            fd = f.fileno()
+            f.close()
+            read_end, write_end = os.pipe()
+            try:
+                self.assertIn(fd, (read_end, write_end))
+                os.write(write_end, b'abc')
+                os.read(read_end, 3)
+            finally:
+                os.close(read_end)
+                os.close(write_end)
+
+        files = self.profiler.get_stats()[0]['metrics']['files']
+        self.assertNotIn(self.path, files)
+        self.assertEqual(files[f"fd:{write_end}"]['bytes_written'], 3)
+
+    def test_path_patterns_group_files(self):
+        profiler = FileIOProfiler(enable_logging=False, path_patterns=['*.bin'])
+        other = os.path.join(self.tmpdir.name, 'other.bin')
+        with open(other, 'wb') as f:
+            f.write(b'z' * 10)
+
+        with profiler.profile_block("grouped"):
+            for path in (self.path, other):
+                with open(path, 'rb') as f:
+                    f.read()
+
+        files = profiler.get_stats()[0]['metrics']['files']
+        self.assertEqual(list(files), ['*.bin'])
+        self.assertEqual(files['*.bin']['bytes_read'], 4106)
+
+    def test_other_threads_not_attributed(self):
+        def read_file():
+            with open(self.path, 'rb') as f:
+                f.read()
+
+        with self.profiler.profile_block("main"):
+            worker = threading.Thread(target=read_file)
+            worker.start()
+            worker.join()
+
+        self.assertEqual(self.profiler.get_stats()[0]['metrics']['bytes_read'], 0)
+
+    def test_open_outside_collecting_context_is_not_wrapped(self):
+        opened = []
+
+        def open_file():
+            with open(self.path, 'rb') as f:
+                opened.append(isinstance(f, io.IOBase))
+
+        with self.profiler.profile_block("main"):
+            worker = threading.Thread(target=open_file)
+            worker.start()
+            worker.join()
+            with open(self.path, 'rb') as f:
+                f.read()
+
+        self.assertEqual(opened, [True])
+        self.assertEqual(self.profiler.get_stats()[0]['metrics']['bytes_read'], 4096)
+
+    def test_patches_removed_after_section(self):
+        original_open, original_read = builtins.open, os.read
+        with self.profiler.profile_block("patched"):
+            self.assertIsNot(builtins.open, original_open)
+        self.assertIs(builtins.open, original_open)
+        self.assertIs(os.read, original_read)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,10 @@
+import gc
+import json
 import unittest
 import logging
+import threading
 from io import StringIO
-from smartprofiler.logger_adapter import LoggerAdapter
+from smartprofiler.logger_adapter import LoggerAdapter, JSONLinesLogger
 
 try:
     from loguru import logger as loguru_logger
@@ -94,5 +97,166 @@ class TestLoggerAdapter(unittest.TestCase):
         adapter.log(logging.WARNING, "Custom level message")
         self.assertIn("Custom level message", self.output.getvalue())
 
+class _ExplodingArg:
+    def __str__(self):
+        raise AssertionError("filtered messages must not be formatted")
+
+
+class TestAsyncLoggerAdapter(unittest.TestCase):
+    def setUp(self):
+        self.records = []
+        self.logger = logging.getLogger('test_async_adapter')
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+        self.logger.handlers = []
+        handler = logging.Handler()
+        handler.emit = self.records.append
+        self.logger.addHandler(handler)
+
+    def tearDown(self):
+        self.logger.handlers = []
+
+    def test_emit_formats_lazily(self):
+        adapter = LoggerAdapter(self.logger)
+        adapter.emit(logging.DEBUG, "value %s", _ExplodingArg())
+        adapter.emit(logging.INFO, "value %d took %.2f", 3, 0.5)
+        self.assertEqual([record.getMessage() for record in self.records], ["value 3 took 0.50"])
+
+    def test_async_mode_writes_in_order_on_writer_thread(self):
+        adapter = LoggerAdapter(self.logger, async_mode=True, batch_size=4)
+        for index in range(20):
+            adapter.emit(logging.INFO, "event %d", index)
+        adapter.info("plain message")
+        adapter.flush()
+        self.assertEqual([record.getMessage() for record in self.records],
+                         [f"event {index}" for index in range(20)] + ["plain message"])
+        self.assertTrue(all(record.threadName == 'smartprofiler-log-writer' for record in self.records))
+        adapter.close()
+
+    def test_async_mode_drops_when_queue_is_full(self):
+        release = threading.Event()
+
+        class SlowLogger:
+            def __init__(self):
+                self.messages = []
+
+            def log(self, level, msg, *args, **kwargs):
+                release.wait()
+                self.messages.append(msg)
+            info = error = debug = warning = log
+
+        sink = SlowLogger()
+        adapter = LoggerAdapter(sink, async_mode=True, max_queue_size=2)
+        for index in range(10):
+            adapter.emit(logging.INFO, "event %d", index)
+        release.set()
+        adapter.close()
+        self.assertGreater(adapter.dropped, 0)
+        self.assertEqual(len(sink.messages) + adapter.dropped, 10)
+
+    def test_profilers_share_an_async_adapter(self):
+        from smartprofiler import CPUProfiler
+        profiler = CPUProfiler(logger=self.logger, async_logging=True)
+        self.assertTrue(profiler.logger.async_mode)
+        shared = CPUProfiler(logger=profiler.logger)
+        self.assertIs(shared.logger, profiler.logger)
+        with profiler.profile_block("async block"):
+            pass
+        with shared.profile_block("shared block"):
+            pass
+        profiler.flush_logs()
+        messages = [record.getMessage() for record in self.records]
+        self.assertTrue(messages[0].startswith("async block took"))
+        self.assertTrue(messages[1].startswith("shared block took"))
+        profiler.logger.close()
+
+    def test_dropped_profiler_stops_its_writer(self):
+        from smartprofiler import CPUProfiler
+        profiler = CPUProfiler(logger=self.logger, async_logging=True)
+        with profiler.profile_block("dropped"):
+            pass
+        writer = profiler.logger._writer
+        self.assertTrue(writer.is_alive())
+        del profiler
+        gc.collect()
+        writer.join(timeout=2)
+        self.assertFalse(writer.is_alive())
+        self.assertTrue(self.records[0].getMessage().startswith("dropped took"))
+
+
+class TestStructuredRecords(unittest.TestCase):
+    def setUp(self):
+        self.records = []
+        self.logger = logging.getLogger('test_structured_records')
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+        self.logger.handlers = []
+        handler = logging.Handler()
+        handler.emit = self.records.append
+        self.logger.addHandler(handler)
+
+    def tearDown(self):
+        self.logger.handlers = []
+
+    def test_stdlib_logger_receives_record_as_extra(self):
+        from smartprofiler import CPUProfiler
+        profiler = CPUProfiler(logger=self.logger)
+        with profiler.profile_block("structured"):
+            pass
+        record = self.records[0].smartprofiler
+        self.assertEqual(record['profiler'], 'CPUProfiler')
+        self.assertEqual(record['label'], 'structured')
+        self.assertIn('execution_time', record['metrics'])
+        self.assertEqual(record['span_id'], record['metrics']['span_id'])
+        self.assertEqual(record['timestamp'], profiler.get_stats()[0]['timestamp'])
+        self.assertTrue(self.records[0].getMessage().startswith("structured took"))
+
+    def test_bind_style_logger_receives_record_fields(self):
+        class BindingLogger:
+            def __init__(self, bound=None):
+                self.bound, self.messages = bound or {}, []
+
+            def bind(self, **fields):
+                child = BindingLogger(dict(self.bound, **fields))
+                child.messages = self.messages
+                return child
+
+            def log(self, level, msg, *args, **kwargs):
+                self.messages.append((self.bound, msg))
+            info = error = debug = warning = log
+
+        sink = BindingLogger()
+        adapter = LoggerAdapter(sink)
+        adapter.log_record(logging.INFO, {'label': 'bound', 'metrics': {'x': 1}}, "%s took %d", 'bound', 1)
+        self.assertEqual(sink.messages, [({'label': 'bound', 'metrics': {'x': 1}}, "bound took 1")])
+
+    def test_json_lines_logger_writes_compact_records(self):
+        from smartprofiler import MemoryProfiler
+        stream = StringIO()
+        sink = JSONLinesLogger(stream)
+        profiler = MemoryProfiler(logger=sink, mode='rss', async_logging=True)
+        with profiler.profile_block("json block"):
+            pass
+        profiler.logger.info("plain %s", "message")
+        profiler.flush_logs()
+        profiler.logger.close()
+
+        lines = stream.getvalue().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertNotIn(' ', lines[0].replace('json block', ''))
+        event, plain = json.loads(lines[0]), json.loads(lines[1])
+        self.assertEqual(event['level'], 'INFO')
+        self.assertEqual(event['label'], 'json block')
+        self.assertIn('rss_mb', event['metrics'])
+        self.assertNotIn('message', event)
+        self.assertEqual(plain['message'], 'plain message')
+
+    def test_json_lines_logger_respects_level(self):
+        stream = StringIO()
+        adapter = LoggerAdapter(JSONLinesLogger(stream, level=logging.WARNING))
+        adapter.log_record(logging.INFO, {'label': 'filtered'}, "filtered")
+        self.assertEqual(stream.getvalue(), '')
+
+
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
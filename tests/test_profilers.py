@@ -1,7 +1,11 @@
+import os
+import socket
+import tempfile
 import unittest
 import time
 import logging
 import sys
+import threading
 import tracemalloc
 from unittest.mock import patch, MagicMock
 from smartprofiler import CPUProfiler, DiskProfiler, FunctionProfiler, MemoryProfiler, NetworkProfiler
@@ -73,6 +77,48 @@ class TestProfilers(unittest.TestCase):
         self.cpu_profiler.summarize_stats()
         self.assertTrue(any("test_block" in call[0][0] for call in self.log_stream.write.call_args_list))
 
+    def test_cpu_profiler_nested_spans(self):
+        with self.cpu_profiler.profile_block("outer"):
+            time.sleep(0.05)
+            with self.cpu_profiler.profile_block("inner"):
+                time.sleep(0.1)
+
+        inner, outer = self.cpu_profiler.get_stats()
+        self.assertEqual(inner['metrics']['call_path'], "outer;inner")
+        self.assertEqual(inner['metrics']['parent_id'], outer['metrics']['span_id'])
+        self.assertEqual(outer['metrics']['parent_id'], 0)
+        self.assertGreater(outer['metrics']['execution_time'], 0.14)
+        self.assertLess(outer['metrics']['self_time'], 0.09)
+        self.assertAlmostEqual(inner['metrics']['self_time'], inner['metrics']['execution_time'])
+
+        tree = self.cpu_profiler.get_call_tree()
+        self.assertEqual(tree['outer']['children']['inner']['count'], 1)
+        self.assertAlmostEqual(tree['outer']['total_time'],
+                               tree['outer']['self_time'] + tree['outer']['children']['inner']['total_time'])
+        self.assertNotIn('span_id', self.cpu_profiler.get_aggregates()['outer']['metrics'])
+
+    def test_cpu_profiler_call_paths_are_shared(self):
+        for _ in range(2):
+            with self.cpu_profiler.profile_block("outer"):
+                with self.cpu_profiler.profile_block("inner"):
+                    pass
+
+        paths = [event['metrics']['call_path'] for event in self.cpu_profiler.get_stats()]
+        self.assertEqual(paths, ["outer;inner", "outer", "outer;inner", "outer"])
+        self.assertIs(paths[0], paths[2])
+
+    def test_cpu_profiler_spans_are_per_thread(self):
+        def worker():
+            with self.cpu_profiler.profile_block("worker"):
+                pass
+
+        with self.cpu_profiler.profile_block("main"):
+            thread = threading.Thread(target=worker)
+            thread.start()
+            thread.join()
+
+        self.assertEqual(set(self.cpu_profiler.get_call_paths()), {"main", "worker"})
+
     @patch('builtins.open', new_callable=MagicMock)
     def test_disk_profiler_function(self, mock_open):
         mock_file = MagicMock()
@@ -117,6 +163,150 @@ class TestProfilers(unittest.TestCase):
         self.assertEqual(stats[0]['label'], "disk_line")
         self.assertIn('write_bytes', stats[0]['metrics'])
 
+    @patch('smartprofiler.disk_profiler.psutil.Process')
+    def test_disk_profiler_process_scope(self, mock_process_cls):
+        process = mock_process_cls.return_value
+        process.io_counters.side_effect = [
+            MagicMock(read_bytes=100, write_bytes=200, read_count=1, write_count=2),
+            MagicMock(read_bytes=150, write_bytes=1200, read_count=3, write_count=7),
+        ]
+        process_profiler = DiskProfiler(disk_path='/tmp', logger=self.logger, scope='process')
+
+        with process_profiler.profile_block("process_io"):
+            pass
+
+        metrics = process_profiler.get_stats()[0]['metrics']
+        self.assertEqual(metrics['read_bytes'], 50)
+        self.assertEqual(metrics['write_bytes'], 1000)
+        self.assertEqual(metrics['write_count'], 5)
+
+    @patch('smartprofiler.disk_profiler.psutil.Process')
+    def test_disk_profiler_process_scope_children(self, mock_process_cls):
+        process = mock_process_cls.return_value
+        process.io_counters.return_value = MagicMock(read_bytes=0, write_bytes=0, read_count=0, write_count=0)
+        child = MagicMock()
+        child.io_counters.side_effect = [
+            MagicMock(read_bytes=10, write_bytes=0, read_count=1, write_count=0),
+            MagicMock(read_bytes=40, write_bytes=0, read_count=2, write_count=0),
+        ]
+        process.children.return_value = [child]
+        process_profiler = DiskProfiler(disk_path='/tmp', logger=self.logger, scope='process', include_children=True)
+
+        with process_profiler.profile_block("children_io"):
+            pass
+
+        self.assertEqual(process_profiler.get_stats()[0]['metrics']['read_bytes'], 30)
+
+    @patch('smartprofiler.disk_profiler.psutil.disk_io_counters')
+    def test_disk_profiler_device_scope(self, mock_disk_io):
+        mock_disk_io.side_effect = [
+            {'sda': MagicMock(read_bytes=0, write_bytes=0, read_count=0, write_count=0),
+             'sdb': MagicMock(read_bytes=0, write_bytes=0, read_count=0, write_count=0)},
+            {'sda': MagicMock(read_bytes=4096, write_bytes=0, read_count=1, write_count=0),
+             'sdb': MagicMock(read_bytes=0, write_bytes=8192, read_count=0, write_count=2)},
+        ]
+        device_profiler = DiskProfiler(disk_path='/tmp', logger=self.logger, scope='device')
+
+        with device_profiler.profile_block("device_io"):
+            pass
+
+        mock_disk_io.assert_called_with(perdisk=True)
+        metrics = device_profiler.get_stats()[0]['metrics']
+        self.assertEqual(metrics['read_bytes'], 4096)
+        self.assertEqual(metrics['write_bytes'], 8192)
+        self.assertEqual(metrics['per_device']['sdb']['write_count'], 2)
+
+    @patch('smartprofiler.disk_profiler.psutil.disk_usage')
+    @patch('smartprofiler.disk_profiler.psutil.disk_io_counters')
+    def test_disk_profiler_cached_usage(self, mock_disk_io, mock_disk_usage):
+        mock_disk_io.return_value = MagicMock(read_bytes=0, write_bytes=0, read_count=0, write_count=0)
+        mock_disk_usage.return_value = MagicMock(total=2 * 1024 ** 3, used=1024 ** 3, free=1024 ** 3)
+        cached_profiler = DiskProfiler(disk_path='/cached-usage', logger=self.logger, usage_max_age=60)
+
+        for _ in range(10):
+            with cached_profiler.profile_block("cached"):
+                pass
+
+        self.assertEqual(mock_disk_usage.call_count, 1)
+        self.assertEqual(len(cached_profiler.get_stats()), 10)
+        self.assertAlmostEqual(cached_profiler.get_stats()[-1]['metrics']['disk_usage']['after']['used'], 1.0)
+
+    @patch('smartprofiler.disk_profiler.psutil.disk_usage')
+    @patch('smartprofiler.disk_profiler.psutil.disk_io_counters')
+    def test_disk_profiler_usage_min_duration(self, mock_disk_io, mock_disk_usage):
+        mock_disk_io.return_value = MagicMock(read_bytes=0, write_bytes=0, read_count=0, write_count=0)
+        mock_disk_usage.return_value = MagicMock(total=2 * 1024 ** 3, used=1024 ** 3, free=1024 ** 3)
+        threshold_profiler = DiskProfiler(disk_path='/usage-threshold', logger=self.logger, usage_min_duration=0.05)
+
+        with threshold_profiler.profile_block("short"):
+            pass
+        with threshold_profiler.profile_block("long"):
+            time.sleep(0.06)
+
+        short, long = threshold_profiler.get_stats()
+        self.assertNotIn('disk_usage', short['metrics'])
+        self.assertIn('disk_usage', long['metrics'])
+        self.assertIn('write_bytes', short['metrics'])
+
+    @patch('smartprofiler.disk_profiler.psutil.disk_usage')
+    @patch('smartprofiler.disk_profiler.psutil.disk_io_counters')
+    def test_disk_profiler_usage_min_duration_ignores_stale_entry(self, mock_disk_io, mock_disk_usage):
+        mock_disk_io.return_value = MagicMock(read_bytes=0, write_bytes=0, read_count=0, write_count=0)
+        mock_disk_usage.return_value = MagicMock(total=2 * 1024 ** 3, used=1024 ** 3, free=1024 ** 3)
+        profiler = DiskProfiler(disk_path='/usage-stale', logger=self.logger, usage_min_duration=0.01)
+        with profiler.profile_block("warm"):
+            time.sleep(0.02)
+
+        mock_disk_usage.return_value = MagicMock(total=2 * 1024 ** 3, used=1.5 * 1024 ** 3, free=0.5 * 1024 ** 3)
+        with profiler.profile_block("long"):
+            time.sleep(0.02)
+
+        usage = profiler.get_stats()[-1]['metrics']['disk_usage']
+        self.assertEqual(usage['before']['used'], usage['after']['used'])
+
+    @patch('smartprofiler.disk_profiler.psutil.disk_usage')
+    @patch('smartprofiler.disk_profiler.psutil.disk_io_counters')
+    def test_disk_profiler_usage_min_duration_defers_entry_reading(self, mock_disk_io, mock_disk_usage):
+        mock_disk_io.return_value = MagicMock(read_bytes=0, write_bytes=0, read_count=0, write_count=0)
+        mock_disk_usage.return_value = MagicMock(total=2 * 1024 ** 3, used=1024 ** 3, free=1024 ** 3)
+        profiler = DiskProfiler(disk_path='/usage-deferred', logger=self.logger, usage_min_duration=0.05)
+
+        with profiler.profile_block("short"):
+            pass
+        self.assertFalse(mock_disk_usage.called)
+
+        with profiler.profile_block("long"):
+            time.sleep(0.06)
+        self.assertEqual(mock_disk_usage.call_count, 1)
+        self.assertIn('disk_usage', profiler.get_stats()[-1]['metrics'])
+
+    @patch('smartprofiler.disk_profiler.psutil.disk_usage')
+    @patch('smartprofiler.disk_profiler.psutil.disk_io_counters')
+    def test_disk_profiler_disable_logging(self, mock_disk_io, mock_disk_usage):
+        mock_disk_io.return_value = MagicMock(read_bytes=0, write_bytes=0, read_count=0, write_count=0)
+        mock_disk_usage.return_value = MagicMock(total=2 * 1024 ** 3, used=1024 ** 3, free=1024 ** 3)
+        silent_profiler = DiskProfiler(disk_path='/silent', logger=self.logger, enable_logging=False)
+
+        with silent_profiler.profile_block("silent_block"):
+            pass
+
+        self.assertFalse(self.log_stream.write.called, "No log messages should be written when enable_logging=False")
+        self.assertIn('disk_usage', silent_profiler.get_stats()[0]['metrics'])
+
+    @patch('smartprofiler.disk_profiler.psutil.disk_usage')
+    @patch('smartprofiler.disk_profiler.psutil.disk_io_counters')
+    def test_disk_profiler_custom_log_level(self, mock_disk_io, mock_disk_usage):
+        mock_disk_io.return_value = MagicMock(read_bytes=0, write_bytes=0, read_count=0, write_count=0)
+        mock_disk_usage.return_value = MagicMock(total=2 * 1024 ** 3, used=1024 ** 3, free=1024 ** 3)
+        self.logger.setLevel(logging.INFO)
+        debug_profiler = DiskProfiler(disk_path='/debug', logger=self.logger, log_level=logging.DEBUG)
+        self.logger.setLevel(logging.INFO)  # the profiler lowers the logger to its level
+
+        with debug_profiler.profile_block("debug_block"):
+            pass
+
+        self.assertFalse(self.log_stream.write.called, "DEBUG messages should be filtered by an INFO logger")
+
     def test_disk_profiler_summarize_stats(self):
         with self.disk_profiler.profile_block("disk_block"):
             pass  # No actual disk I/O needed for this test
@@ -159,6 +349,104 @@ class TestProfilers(unittest.TestCase):
         self.assertEqual(stats[0]['label'], "func_line")
         self.assertGreaterEqual(stats[0]['metrics']['call_count'], 1)
 
+    def test_function_profiler_per_function_counts(self):
+        def helper():
+            pass
+
+        @self.func_profiler.profile_function
+        def test_func():
+            for _ in range(3):
+                helper()
+
+        test_func()
+        metrics = self.func_profiler.get_stats()[0]['metrics']
+        self.assertEqual(metrics['call_count'], 4)
+        counts = {key.split(' ')[0]: count for key, count in metrics['calls_by_function'].items()}
+        self.assertEqual(counts[helper.__qualname__], 3)
+        self.assertEqual(counts[test_func.__wrapped__.__qualname__], 1)
+
+    def test_function_profiler_nested_sections(self):
+        def helper():
+            pass
+
+        with self.func_profiler.profile_block("outer"):
+            helper()
+            with self.func_profiler.profile_block("inner"):
+                helper()
+            helper()
+
+        inner, outer = self.func_profiler.get_stats()
+        self.assertEqual(inner['metrics']['call_count'], 1)
+        self.assertEqual(outer['metrics']['call_count'], 3)
+
+    def test_function_profiler_ignores_profiler_internals(self):
+        from smartprofiler.context import span
+
+        def helper():
+            pass
+
+        backends = ['setprofile'] + (['monitoring'] if hasattr(sys, 'monitoring') else [])
+        for backend in backends:
+            with self.subTest(backend=backend):
+                profiler = FunctionProfiler(logger=self.logger, backend=backend, enable_logging=False)
+                with profiler.profile_block("outer"):
+                    with span("request"):
+                        with profiler.profile_line("inner"):
+                            helper()
+                        with self.cpu_profiler.profile_block("timed"):
+                            helper()
+
+                inner, outer = profiler.get_stats()
+                self.assertEqual(inner['metrics']['call_count'], 1)
+                self.assertEqual(outer['metrics']['call_count'], 2)
+                functions = [key.split(' ')[0] for key in outer['metrics']['calls_by_function']]
+                self.assertEqual(functions, [helper.__qualname__])
+
+    def test_function_profiler_keeps_existing_profile_function(self):
+        events = []
+
+        def existing(frame, event, arg):
+            events.append(event)
+
+        profiler = FunctionProfiler(logger=self.logger, backend='setprofile')
+        sys.setprofile(existing)
+        try:
+            with profiler.profile_block("chained"):
+                pass
+            self.assertIs(sys.getprofile(), existing)
+        finally:
+            sys.setprofile(None)
+        self.assertTrue(events)
+
+    def test_function_profiler_threads_drop_hook_after_release(self):
+        profiler = FunctionProfiler(logger=self.logger, backend='setprofile')
+        started, released, hooks = threading.Event(), threading.Event(), []
+
+        def worker():
+            started.set()
+            released.wait()
+            hooks.append(sys.getprofile())  # the first event after the release uninstalls the hook
+            hooks.append(sys.getprofile())
+
+        with profiler.profile_block("spawn"):
+            thread = threading.Thread(target=worker)
+            thread.start()
+            started.wait()
+        released.set()
+        thread.join()
+        self.assertIsNone(hooks[-1])
+
+    @unittest.skipIf(not hasattr(sys, 'monitoring'), "sys.monitoring requires Python 3.12+")
+    def test_function_profiler_monitoring_backend(self):
+        profiler = FunctionProfiler(logger=self.logger, backend='monitoring')
+
+        @profiler.profile_function
+        def test_func():
+            pass
+
+        test_func()
+        self.assertEqual(profiler.get_stats()[0]['metrics']['call_count'], 1)
+
     def test_function_profiler_summarize_stats(self):
         with self.func_profiler.profile_block("func_block"):
             pass
@@ -166,7 +454,7 @@ class TestProfilers(unittest.TestCase):
         self.func_profiler.summarize_stats()
         self.assertTrue(any("func_block" in call[0][0] for call in self.log_stream.write.call_args_list))
 
-    @patch('tracemalloc.get_traced_memory', return_value=(1000, 2000))
+    @patch('tracemalloc.get_traced_memory', side_effect=[(1000, 1000), (1000, 3000)])
     @patch('tracemalloc.start')
     @patch('tracemalloc.stop')
     def test_memory_profiler_function(self, mock_stop, mock_start, mock_get_traced):
@@ -180,7 +468,7 @@ class TestProfilers(unittest.TestCase):
         self.assertIn('peak_mb', stats[0]['metrics'])
         self.assertAlmostEqual(stats[0]['metrics']['peak_mb'], 2000 / (1024 ** 2))
 
-    @patch('tracemalloc.get_traced_memory', return_value=(1000, 2000))
+    @patch('tracemalloc.get_traced_memory', side_effect=[(1000, 1000), (1000, 3000)])
     @patch('tracemalloc.start')
     @patch('tracemalloc.stop')
     def test_memory_profiler_block(self, mock_stop, mock_start, mock_get_traced):
@@ -192,7 +480,7 @@ class TestProfilers(unittest.TestCase):
         self.assertEqual(stats[0]['label'], "mem_block")
         self.assertIn('peak_mb', stats[0]['metrics'])
 
-    @patch('tracemalloc.get_traced_memory', return_value=(1000, 2000))
+    @patch('tracemalloc.get_traced_memory', side_effect=[(1000, 1000), (1000, 3000)])
     @patch('tracemalloc.start')
     @patch('tracemalloc.stop')
     def test_memory_profiler_line(self, mock_stop, mock_start, mock_get_traced):
@@ -204,6 +492,90 @@ class TestProfilers(unittest.TestCase):
         self.assertEqual(stats[0]['label'], "mem_line")
         self.assertIn('peak_mb', stats[0]['metrics'])
 
+    def test_memory_profiler_nested_sections(self):
+        with self.mem_profiler.profile_block("outer"):
+            outer_data = bytearray(2 * 1024 ** 2)
+            with self.mem_profiler.profile_block("inner"):
+                inner_data = bytearray(1024 ** 2)
+                del inner_data
+            self.assertTrue(tracemalloc.is_tracing())
+
+        self.assertFalse(tracemalloc.is_tracing())
+        inner, outer = self.mem_profiler.get_stats()
+        self.assertAlmostEqual(inner['metrics']['peak_mb'], 1.0, delta=0.1)
+        self.assertLess(inner['metrics']['current_mb'], 0.1)
+        self.assertAlmostEqual(outer['metrics']['current_mb'], 2.0, delta=0.1)
+        self.assertAlmostEqual(outer['metrics']['peak_mb'], 3.0, delta=0.1)
+        del outer_data
+
+    def test_memory_profiler_keeps_external_tracing(self):
+        tracemalloc.start()
+        try:
+            with self.mem_profiler.profile_block("external"):
+                pass
+            self.assertTrue(tracemalloc.is_tracing())
+        finally:
+            tracemalloc.stop()
+
+    def test_memory_profiler_rss_mode(self):
+        rss_profiler = MemoryProfiler(logger=self.logger, mode='rss', sample_interval=0.005)
+        with rss_profiler.profile_block("rss_block"):
+            data = b'x' * (64 * 1024 ** 2)
+            time.sleep(0.05)
+            del data
+        self.assertFalse(tracemalloc.is_tracing())
+
+        metrics = rss_profiler.get_stats()[0]['metrics']
+        self.assertGreater(metrics['peak_mb'], 50)
+        self.assertLess(metrics['current_mb'], metrics['peak_mb'])
+        self.assertGreater(metrics['rss_mb'], 0)
+
+    def test_memory_profiler_rss_sampler_thread_is_reused(self):
+        rss_profiler = MemoryProfiler(logger=self.logger, mode='rss', sample_interval=0.001, enable_logging=False)
+        original_start = threading.Thread.start
+        started = []
+
+        def counting_start(thread):
+            started.append(thread.name)
+            original_start(thread)
+
+        with patch.object(threading.Thread, 'start', counting_start):
+            for _ in range(100):
+                with rss_profiler.profile_block("short"):
+                    pass
+
+        self.assertLessEqual(started.count('smartprofiler-memory-sampler'), 1)
+        self.assertEqual(len(rss_profiler.get_stats()), 100)
+
+    def test_memory_profiler_top_allocations(self):
+        alloc_profiler = MemoryProfiler(logger=self.logger, track_allocations=True, top_n=3)
+
+        def allocate():
+            return [bytes(1024) for _ in range(1000)]
+
+        with alloc_profiler.profile_block("alloc_block"):
+            data = allocate()
+
+        top = alloc_profiler.get_stats()[0]['metrics']['top_allocations']
+        self.assertLessEqual(len(top), 3)
+        self.assertIn(__file__, top[0]['site'])
+        self.assertGreater(top[0]['size_diff_kb'], 900)
+        self.assertGreaterEqual(top[0]['count_diff'], 1000)
+        del data
+
+    def test_memory_profiler_allocation_filters(self):
+        alloc_profiler = MemoryProfiler(logger=self.logger, track_allocations=True, exclude=[__file__])
+        with alloc_profiler.profile_block("filtered"):
+            data = [bytes(1024) for _ in range(100)]
+
+        top = alloc_profiler.get_stats()[0]['metrics']['top_allocations']
+        self.assertFalse(any(__file__ in entry['site'] for entry in top))
+        del data
+
+    def test_memory_profiler_invalid_mode(self):
+        with self.assertRaises(ValueError):
+            MemoryProfiler(logger=self.logger, mode='vms')
+
     def test_memory_profiler_summarize_stats(self):
         with self.mem_profiler.profile_block("mem_block"):
             pass
@@ -294,6 +666,111 @@ class TestProfilers(unittest.TestCase):
         self.assertEqual(len(stats), 1)
         self.assertIn('bytes_sent', stats[0]['metrics'])
 
+    @patch('smartprofiler.network_profiler.psutil.net_io_counters')
+    def test_network_profiler_pernic_filters(self, mock_net_io):
+        def nic(sent, recv):
+            return MagicMock(bytes_sent=sent, bytes_recv=recv, packets_sent=1, packets_recv=1)
+        mock_net_io.side_effect = [
+            {'lo': nic(0, 0), 'eth0': nic(100, 200), 'veth1': nic(0, 0)},
+            {'lo': nic(5000, 5000), 'eth0': nic(150, 260), 'veth1': nic(70, 70)},
+        ]
+        nic_profiler = NetworkProfiler(logger=self.logger, pernic=True, exclude_interfaces=['lo', 'veth*'])
+
+        with nic_profiler.profile_block("nic_block"):
+            pass
+
+        mock_net_io.assert_called_with(pernic=True)
+        metrics = nic_profiler.get_stats()[0]['metrics']
+        self.assertEqual(metrics['bytes_sent'], 50)
+        self.assertEqual(metrics['bytes_recv'], 60)
+        self.assertEqual(list(metrics['per_interface']), ['eth0'])
+
+    @unittest.skipUnless(sys.platform.startswith('linux'), "/proc/self/net/dev is Linux only")
+    def test_network_profiler_process_scope(self):
+        header = "Inter-|   Receive |  Transmit\n face |bytes packets ...|bytes packets ...\n"
+        line = "  eth0: {recv} 10 0 0 0 0 0 0 {sent} 20 0 0 0 0 0 0\n"
+        process_profiler = NetworkProfiler(logger=self.logger, scope='process')
+
+        with tempfile.NamedTemporaryFile('w', suffix='-net-dev', delete=False) as f:
+            f.write(header + line.format(recv=1000, sent=2000))
+        try:
+            with patch('smartprofiler.network_profiler._PROC_NET_DEV', f.name):
+                with process_profiler.profile_block("netns_block"):
+                    with open(f.name, 'w') as rewritten:
+                        rewritten.write(header + line.format(recv=1500, sent=2100))
+        finally:
+            os.unlink(f.name)
+
+        metrics = process_profiler.get_stats()[0]['metrics']
+        self.assertEqual(metrics['bytes_recv'], 500)
+        self.assertEqual(metrics['bytes_sent'], 100)
+        self.assertNotIn('per_interface', metrics)
+
+    def test_network_profiler_tracks_connections(self):
+        conn_profiler = NetworkProfiler(logger=self.logger, track_connections=True)
+
+        with conn_profiler.profile_block("listen_block"):
+            server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            server.bind(('127.0.0.1', 0))
+            server.listen(1)
+        try:
+            port = server.getsockname()[1]
+            connections = conn_profiler.get_stats()[0]['metrics']['connections']
+            self.assertIn(f"127.0.0.1:{port}", [conn['local'] for conn in connections])
+        finally:
+            server.close()
+
+    @patch('smartprofiler.network_profiler.psutil.net_io_counters')
+    def test_network_profiler_socket_accounting(self, mock_net_io):
+        mock_net_io.return_value = MagicMock(bytes_sent=0, bytes_recv=0, packets_sent=0, packets_recv=0)
+        socket_profiler = NetworkProfiler(logger=self.logger, socket_accounting=True)
+        left, right = socket.socketpair()
+        try:
+            left.sendall(b'x' * 1000)  # outside any section: not counted
+            right.recv(1000)
+            with socket_profiler.profile_block("socket_block"):
+                left.sendall(b'a' * 3000)
+                buffer = bytearray(4096)
+                received = 0
+                while received < 3000:
+                    received += right.recv_into(memoryview(buffer)[received:])
+                right.send(b'pong')
+                self.assertEqual(left.recv(4), b'pong')
+            left.sendall(b'y')  # after the section: not counted
+            right.recv(1)
+        finally:
+            left.close()
+            right.close()
+
+        metrics = socket_profiler.get_stats()[0]['metrics']
+        self.assertEqual(metrics['socket_bytes_sent'], 3004)
+        self.assertEqual(metrics['socket_bytes_recv'], 3004)
+        (endpoint, counts), = metrics['socket_endpoints'].items()
+        self.assertEqual(endpoint, 'unix:<unnamed>')
+        self.assertEqual(counts['send_calls'], 2)
+        self.assertNotIn('send', socket.socket.__dict__)
+
+    def test_network_profiler_socket_accounting_per_thread(self):
+        socket_profiler = NetworkProfiler(logger=self.logger, socket_accounting=True, enable_logging=False)
+        left, right = socket.socketpair()
+        try:
+            with socket_profiler.profile_block("main_thread"):
+                other = threading.Thread(target=left.sendall, args=(b'z' * 500,))
+                other.start()
+                other.join()
+                right.recv(500)
+        finally:
+            left.close()
+            right.close()
+
+        metrics = socket_profiler.get_stats()[0]['metrics']
+        self.assertEqual(metrics['socket_bytes_sent'], 0)
+        self.assertEqual(metrics['socket_bytes_recv'], 500)
+
+    def test_network_profiler_invalid_scope(self):
+        with self.assertRaises(ValueError):
+            NetworkProfiler(logger=self.logger, scope='container')
+
     def test_cpu_profiler_custom_log_level(self):
         # Create a profiler with DEBUG log level
         debug_profiler = CPUProfiler(time_func='execution_time', logger=self.logger, log_level=logging.DEBUG)
@@ -0,0 +1,81 @@
+import unittest
+from unittest.mock import patch
+from smartprofiler import (CPUProfiler, ColumnarStatsStore, ListStatsStore, RingBufferRetention,
+                           ReservoirRetention, TimeWindowRetention)
+
+
+class TestRetention(unittest.TestCase):
+    def test_ring_buffer_keeps_most_recent(self):
+        store = ColumnarStatsStore(retention=RingBufferRetention(3))
+        for i in range(10):
+            store.record(f"event_{i}", {'value': i}, timestamp=float(i))
+
+        self.assertEqual(store.physical_size, 3)
+        self.assertEqual([stat['metrics']['value'] for stat in store], [7, 8, 9])
+        self.assertEqual(store[0]['label'], "event_7")
+        self.assertEqual(store.column('value').tolist(), [7.0, 8.0, 9.0])
+
+    def test_reservoir_bounds_each_label(self):
+        retention = ReservoirRetention(per_label=5, seed=42)
+        store = ColumnarStatsStore(retention=retention)
+        for i in range(1000):
+            store.record("hot", {'value': i})
+        for i in range(3):
+            store.record("cold", {'value': i})
+
+        labels = [stat['label'] for stat in store]
+        self.assertEqual(labels.count("hot"), 5)
+        self.assertEqual(labels.count("cold"), 3)
+        self.assertEqual(retention.seen, {'hot': 1000, 'cold': 3})
+        self.assertEqual(store.physical_size, 8)
+
+    def test_reservoir_rows_are_oldest_first(self):
+        store = ColumnarStatsStore(retention=ReservoirRetention(per_label=5, seed=7))
+        for i in range(500):
+            store.record("hot", {'value': i}, timestamp=float(i))
+
+        values = [stat['metrics']['value'] for stat in store]
+        self.assertEqual(values, sorted(values))
+        self.assertEqual(store.column('value').tolist(), [float(value) for value in values])
+
+    def test_time_window_evicts_old_events(self):
+        store = ColumnarStatsStore(retention=TimeWindowRetention(window=10.0))
+        for i in range(100):
+            store.record("tick", {'value': i}, timestamp=float(i))
+
+        with patch('smartprofiler.retention.time.time', return_value=99.5):
+            values = [stat['metrics']['value'] for stat in store]
+        self.assertEqual(values, list(range(90, 100)))
+        self.assertLessEqual(store.physical_size, 22)
+
+    def test_time_window_max_events(self):
+        store = ColumnarStatsStore(retention=TimeWindowRetention(window=100.0, max_events=4))
+        for i in range(50):
+            store.record("tick", {'value': i}, timestamp=float(i))
+
+        with patch('smartprofiler.retention.time.time', return_value=50.0):
+            values = [stat['metrics']['value'] for stat in store]
+        self.assertEqual(values, [46, 47, 48, 49])
+        self.assertLessEqual(store.physical_size, 8)
+
+    def test_clear_resets_policy(self):
+        store = ColumnarStatsStore(retention=RingBufferRetention(2))
+        for i in range(5):
+            store.record("a", {'value': i})
+        store.clear()
+        store.record("a", {'value': 100})
+        self.assertEqual([stat['metrics']['value'] for stat in store], [100])
+
+    def test_profiler_retention(self):
+        profiler = CPUProfiler(enable_logging=False, retention=RingBufferRetention(10))
+        for _ in range(100):
+            with profiler.profile_block("block"):
+                pass
+        self.assertEqual(len(profiler.get_stats()), 10)
+
+        with self.assertRaises(ValueError):
+            CPUProfiler(stats_store=ListStatsStore(), retention=RingBufferRetention(10))
+
+
+if __name__ == '__main__':
+    unittest.main()
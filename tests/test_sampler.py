@@ -0,0 +1,127 @@
+import os
+import unittest
+from unittest.mock import patch, MagicMock
+from smartprofiler import DiskProfiler, MemoryProfiler, MetricsSampler, NetworkProfiler
+
+
+class FakeCounter:
+    def __init__(self):
+        self.value = 0.0
+
+    def read(self):
+        return (self.value, self.value * 2)
+
+
+class TestMetricsSampler(unittest.TestCase):
+    def setUp(self):
+        # A long interval keeps the background thread idle; tests poll with sample_now()
+        self.sampler = MetricsSampler(interval=3600, capacity=8)
+        self.counter = FakeCounter()
+        self.sampler.register('fake', self.counter.read, ('a', 'b'))
+
+    def tearDown(self):
+        self.sampler.stop()
+
+    def _append(self, timestamp, value):
+        self.sampler._series['fake'].append(timestamp, (value, value * 2))
+
+    def test_register_takes_initial_sample(self):
+        self.assertEqual(self.sampler.value_at('fake'), (0.0, 0.0))
+        self.assertIsNone(self.sampler.value_at('missing'))
+
+    def test_value_at_interpolates(self):
+        self.sampler.unregister('fake')
+        self.sampler.register('fake', self.counter.read, ('a', 'b'))
+        self.sampler._series['fake'].size = 0
+        self._append(10.0, 100)
+        self._append(20.0, 200)
+        self.assertEqual(self.sampler.value_at('fake', 15.0), (150.0, 300.0))
+        self.assertEqual(self.sampler.value_at('fake', 5.0), (100.0, 200.0))
+        self.assertEqual(self.sampler.value_at('fake', 25.0), (200.0, 400.0))
+
+    def test_ring_buffer_overwrites_oldest(self):
+        self.sampler._series['fake'].size = 0
+        for second in range(20):
+            self._append(float(second), second)
+        series = self.sampler.series('fake')
+        self.assertEqual(list(series['timestamp']), [float(second) for second in range(12, 20)])
+        self.assertEqual(self.sampler.value_at('fake', 12.5), (12.5, 25.0))
+
+    def test_max_between(self):
+        self.sampler._series['fake'].size = 0
+        for timestamp, value in [(1.0, 5), (2.0, 50), (3.0, 7)]:
+            self._append(timestamp, value)
+        self.assertEqual(self.sampler.max_between('fake', 'a', 1.5, 3.0), 50)
+        self.assertIsNone(self.sampler.max_between('fake', 'a', 3.5, 4.0))
+
+    def test_failed_poll_is_skipped(self):
+        self.counter.read = MagicMock(side_effect=OSError("gone"))
+        self.sampler._series['fake'].read = self.counter.read
+        self.sampler.sample_now()
+        self.assertEqual(len(self.sampler.series('fake')['timestamp']), 1)
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            MetricsSampler(interval=0)
+        with self.assertRaises(ValueError):
+            MetricsSampler(capacity=1)
+
+
+class TestProfilersWithSampler(unittest.TestCase):
+    def setUp(self):
+        self.sampler = MetricsSampler(interval=3600)
+
+    def tearDown(self):
+        self.sampler.stop()
+
+    @patch('smartprofiler.disk_profiler.psutil.disk_io_counters')
+    def test_disk_profiler_reads_boundaries_from_sampler(self, mock_disk_io):
+        mock_disk_io.return_value = MagicMock(read_bytes=0, write_bytes=0, read_count=0, write_count=0)
+        profiler = DiskProfiler(enable_logging=False, sampler=self.sampler, disk_metrics={'disk_usage': False})
+        self.assertEqual(mock_disk_io.call_count, 1)  # the initial sample
+
+        with profiler.profile_block("sampled"):
+            mock_disk_io.return_value = MagicMock(read_bytes=4096, write_bytes=0, read_count=1, write_count=0)
+            self.sampler.sample_now()
+
+        self.assertEqual(mock_disk_io.call_count, 2)
+        self.assertEqual(profiler.get_stats()[0]['metrics']['read_bytes'], 4096)
+
+    @patch('smartprofiler.network_profiler.psutil.net_io_counters')
+    def test_network_profiler_shares_source(self, mock_net_io):
+        mock_net_io.return_value = MagicMock(bytes_sent=10, bytes_recv=10, packets_sent=1, packets_recv=1)
+        first = NetworkProfiler(enable_logging=False, sampler=self.sampler)
+        second = NetworkProfiler(enable_logging=False, sampler=self.sampler)
+
+        with first.profile_block("a"), second.profile_block("b"):
+            pass
+
+        self.assertEqual(self.sampler.sources, ['net_io:system:None:None'])
+        self.assertEqual(mock_net_io.call_count, 1)
+        self.assertEqual(first.get_stats()[0]['metrics']['bytes_sent'], 0)
+        with self.assertRaises(ValueError):
+            NetworkProfiler(sampler=self.sampler, pernic=True)
+
+    def test_memory_profiler_peak_from_samples(self):
+        profiler = MemoryProfiler(mode='rss', enable_logging=False, sampler=self.sampler)
+        with profiler.profile_block("rss"):
+            self.sampler.sample_now()
+        metrics = profiler.get_stats()[0]['metrics']
+        self.assertGreaterEqual(metrics['peak_mb'], metrics['current_mb'])
+        self.assertGreater(metrics['rss_mb'], 0)
+        with self.assertRaises(ValueError):
+            MemoryProfiler(sampler=self.sampler)
+
+    @unittest.skipUnless(os.path.isdir('/proc/self/fd'), "needs /proc/self/fd")
+    def test_memory_profilers_share_one_reader(self):
+        first = MemoryProfiler(mode='rss', enable_logging=False, sampler=self.sampler)
+        open_fds = len(os.listdir('/proc/self/fd'))
+        for _ in range(20):
+            MemoryProfiler(mode='rss', enable_logging=False, sampler=self.sampler)
+            MemoryProfiler(mode='rss', enable_logging=False)
+        self.assertEqual(len(os.listdir('/proc/self/fd')), open_fds)
+        self.assertIs(MemoryProfiler(mode='rss', enable_logging=False)._sampler.reader, first._sampler.reader)
+
+
+if __name__ == '__main__':
+    unittest.main()
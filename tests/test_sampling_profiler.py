@@ -0,0 +1,81 @@
+import unittest
+import time
+import threading
+from smartprofiler import SamplingProfiler
+
+
+def busy_loop(duration):
+    end = time.perf_counter() + duration
+    while time.perf_counter() < end:
+        pass
+
+
+class TestSamplingProfiler(unittest.TestCase):
+    def setUp(self):
+        self.profiler = SamplingProfiler(interval=0.002, idle_timeout=0.05, enable_logging=False)
+
+    def test_block_collects_samples(self):
+        with self.profiler.profile_block("busy"):
+            busy_loop(0.2)
+
+        stats = self.profiler.get_stats()
+        self.assertEqual(len(stats), 1)
+        self.assertGreater(stats[0]['metrics']['samples'], 10)
+        self.assertTrue(any('busy_loop' in key for key in stats[0]['metrics']['top_functions']))
+
+    def test_sampler_thread_outlives_sections_until_idle(self):
+        with self.profiler.profile_block("first"):
+            pass
+        thread = self.profiler._thread
+        self.assertIsNotNone(thread)
+        with self.profiler.profile_block("second"):
+            pass
+        self.assertIs(self.profiler._thread, thread)
+        thread.join(timeout=2)
+        self.assertFalse(thread.is_alive())
+        self.assertIsNone(self.profiler._thread)
+
+    def test_explicit_start_keeps_sampler_running(self):
+        self.profiler.start()
+        thread = self.profiler._thread
+        time.sleep(0.1)
+        self.assertTrue(thread.is_alive())
+        self.profiler.stop()
+        self.assertFalse(thread.is_alive())
+
+    def test_function_stacks_are_aggregated(self):
+        @self.profiler.profile_function
+        def outer():
+            busy_loop(0.1)
+
+        outer()
+        stacks = self.profiler.get_stack_counts()
+        self.assertTrue(stacks)
+        hot = max(stacks, key=stacks.get)
+        self.assertIn('busy_loop', hot[-1])
+        self.assertTrue(any('outer' in frame for frame in hot))
+        functions = self.profiler.get_function_samples()
+        busy = next(value for key, value in functions.items() if key.startswith('busy_loop'))
+        self.assertLessEqual(busy['self'], busy['total'])
+
+    def test_only_profiled_threads_are_sampled(self):
+        stop = threading.Event()
+
+        def background():
+            while not stop.is_set():
+                busy_loop(0.01)
+
+        thread = threading.Thread(target=background)
+        thread.start()
+        try:
+            with self.profiler.profile_block("idle"):
+                time.sleep(0.1)
+        finally:
+            stop.set()
+            thread.join()
+
+        self.assertFalse(any('background' in frame for frames in self.profiler.get_stack_counts() for frame in frames))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+import math
+from smartprofiler import CPUProfiler, ColumnarStatsStore, ListStatsStore
+
+
+class TestColumnarStatsStore(unittest.TestCase):
+    def setUp(self):
+        self.store = ColumnarStatsStore()
+
+    def test_round_trip(self):
+        self.store.record("a", {'execution_time': 0.5, 'call_count': 3}, timestamp=10.0)
+        self.store.record("b", {'execution_time': 1.5}, timestamp=11.0)
+
+        stats = self.store.to_list()
+        self.assertEqual(len(stats), 2)
+        self.assertEqual(stats[0], {'label': "a", 'metrics': {'execution_time': 0.5, 'call_count': 3}, 'timestamp': 10.0})
+        self.assertEqual(stats[1], {'label': "b", 'metrics': {'execution_time': 1.5}, 'timestamp': 11.0})
+        self.assertEqual(self.store[-1]['label'], "b")
+
+    def test_labels_are_interned(self):
+        for _ in range(5):
+            self.store.record("same", {'execution_time': 1.0})
+        self.assertEqual(self.store.labels, ["same"])
+        self.assertEqual(self.store.label_ids().tolist(), [0] * 5)
+
+    def test_typed_columns_and_promotion(self):
+        self.store.record("a", {'value': 1})
+        self.store.record("a", {'value': 2.5})
+        self.store.record("a", {'other': {'nested': True}})
+
+        values = self.store.column('value')
+        self.assertEqual(values[:2].tolist(), [1.0, 2.5])
+        self.assertTrue(math.isnan(values[2]))
+        self.assertEqual(self.store.column('other').tolist(), [None, None, {'nested': True}])
+        self.assertEqual(self.store[0]['metrics'], {'value': 1.0})
+
+    def test_batched_columns_keep_types(self):
+        count = 600  # spans several buffered batches
+        for i in range(count):
+            self.store.record(f"label{i % 3}", {'n': i, 'x': i / 2, 'flag': i % 2 == 0}, timestamp=float(i))
+        self.store.record("big", {'n': 2 ** 70, 'x': 1, 'flag': False}, timestamp=float(count))
+
+        self.assertEqual(len(self.store), count + 1)
+        self.assertEqual(self.store.labels, ["label0", "label1", "label2", "big"])
+        self.assertEqual(self.store[count - 1],
+                         {'label': "label2", 'metrics': {'n': count - 1, 'x': (count - 1) / 2, 'flag': False},
+                          'timestamp': float(count - 1)})
+        self.assertEqual(self.store[-1]['metrics'], {'n': 2 ** 70, 'x': 1.0, 'flag': False})
+        self.assertIs(self.store[0]['metrics']['flag'], True)
+        self.assertEqual(self.store.timestamps().tolist(), [float(i) for i in range(count + 1)])
+
+    def test_clear(self):
+        self.store.record("a", {'value': 1})
+        self.store.clear()
+        self.assertEqual(len(self.store), 0)
+        self.assertEqual(self.store.to_list(), [])
+
+
+class TestProfilerStatsStore(unittest.TestCase):
+    def test_default_store_is_columnar(self):
+        profiler = CPUProfiler(enable_logging=False)
+        self.assertIsInstance(profiler.stats, ColumnarStatsStore)
+
+    def test_custom_store(self):
+        store = ListStatsStore()
+        profiler = CPUProfiler(enable_logging=False, stats_store=store)
+        with profiler.profile_block("block"):
+            pass
+        self.assertEqual(len(store), 1)
+        self.assertEqual(profiler.get_stats()[0]['label'], "block")
+        profiler.clear_stats()
+        self.assertEqual(len(store), 0)
+
+    def test_legacy_append(self):
+        profiler = CPUProfiler(enable_logging=False)
+        profiler.stats.append({'label': "manual", 'metrics': {'execution_time': 0.1}})
+        self.assertEqual(profiler.get_stats()[0]['metrics'], {'execution_time': 0.1})
+
+
+if __name__ == '__main__':
+    unittest.main()